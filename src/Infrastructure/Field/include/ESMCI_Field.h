@@ -141,6 +141,11 @@ namespace ESMCI{
                         const char *filename, RouteHandle **routehandle,
                         ESMC_Logical *ignoreUnmatchedIndices,
                         int *srcTermProcessing, int *pipeLineDepth);
+    static int smmstorefactors(Field *fieldsrc, Field *fielddst,
+                        double *factorList, int *factorIndexList,
+                        int numFactors, RouteHandle **routehandle,
+                        ESMC_Logical *ignoreUnmatchedIndices,
+                        int *srcTermProcessing, int *pipeLineDepth);
     int write(const char *file,
       const char* variableName,
       int overwrite,
@@ -1169,6 +1169,61 @@ int ESMC_FieldSMMStore(
 //EOP
 //-----------------------------------------------------------------------------
 
+//-----------------------------------------------------------------------------
+//BOP
+// !IROUTINE: ESMC_FieldSMMStoreFactors - Precompute a Field sparse matrix multiplication from factors
+//
+// !INTERFACE:
+int ESMC_FieldSMMStoreFactors(
+    ESMC_Field srcField,                           // in
+    ESMC_Field dstField,                           // in
+    double *factorList,                            // in
+    int *factorIndexList,                          // in
+    int numFactors,                                // in
+    ESMC_RouteHandle *routehandle,                 // out
+    enum ESMC_Logical *ignoreUnmatchedIndices,     // in
+    int *srcTermProcessing,                        // in
+    int *pipeLineDepth);                           // in
+
+// !RETURN VALUE:
+//   Return code; equals ESMF_SUCCESS if there are no errors.
+//
+// !DESCRIPTION:
+//
+//   Creates a sparse matrix operation (stored in routehandle) from the
+//   factors held in memory by each PET, in the same way as
+//   ESMC\_FieldSMMStore() does for the factors read from a file. Every PET
+//   may provide any subset of the factors, including none. The routehandle
+//   can then be used in the call ESMC\_FieldRegrid() to interpolate between
+//   the Fields.
+//
+//  The arguments are:
+//  \begin{description}
+//  \item[srcField]
+//    ESMC\_Field with source data.
+//  \item[dstField]
+//    ESMC\_Field with destination data.
+//  \item [factorList]
+//    The {\tt numFactors} factors provided by this PET.
+//  \item [factorIndexList]
+//    The sequence indices of the factors provided by this PET, stored as
+//    {\tt numFactors} pairs of source and destination sequence index, i.e.
+//    with the layout of a Fortran array of shape (2, {\tt numFactors}).
+//  \item [numFactors]
+//    The number of factors provided by this PET, may be zero.
+//  \item[routehandle]
+//    The handle that implements the regrid, to be used in {\tt ESMC\_FieldRegrid()}.
+//  \item [{[ignoreUnmatchedIndices]}]
+//    See {\tt ESMC\_FieldSMMStore()}.
+//  \item [{[srcTermProcessing]}]
+//    See {\tt ESMC\_FieldSMMStore()}.
+//  \item [{[pipelineDepth]}]
+//    See {\tt ESMC\_FieldSMMStore()}.
+//  \end{description}
+//
+//EOP
+//-----------------------------------------------------------------------------
+
 //-----------------------------------------------------------------------------
 //BOPI
 // !IROUTINE: ESMC_FieldWrite - Write Field
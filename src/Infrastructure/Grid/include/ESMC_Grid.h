@@ -498,6 +498,38 @@ int ESMC_GridGetCoordBounds(
 //EOP
 //-----------------------------------------------------------------------------
 
+//------------------------------------------------------------------------------
+//BOP
+// !IROUTINE: ESMC_GridGetLocalDECount - Get the number of local DEs of a Grid
+//
+// !INTERFACE:
+int ESMC_GridGetLocalDECount(
+  ESMC_Grid grid,                         // in
+  int *localDECount,                      // out
+  int *rc                                 // out
+);
+
+// !RETURN VALUE:
+//  Return code; equals ESMF_SUCCESS if there are no errors.
+//
+// !DESCRIPTION:
+//  Get the number of decompositional elements of the Grid that are local to
+//  this PET.  A PET may hold several DEs, e.g. several tiles of a cubed
+//  sphere Grid, or none at all.
+//
+//  The arguments are:
+//  \begin{description}
+//  \item[grid]
+//    Grid object from which to obtain the number of local DEs.
+//  \item[localDECount]
+//    Upon return this holds the number of DEs local to this PET.
+//  \item[rc]
+//  Return code; equals {\tt ESMF\_SUCCESS} if there are no errors. 
+//  \end{description}
+//
+//EOP
+//-----------------------------------------------------------------------------
+
 //------------------------------------------------------------------------------
 //BOPI
 // !IROUTINE: ESMC_GridWrite - Write a Grid to a VTK file
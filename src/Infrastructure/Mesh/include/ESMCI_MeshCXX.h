@@ -38,6 +38,8 @@ namespace ESMCI {
     void getLocalCoords(double *, int *, int *, int *);
     void getLocalElemCoords(double *, int *, int *, int *);
     void getConnectivity(double *, int *, int *);
+    void getConnectivityCount(int *, int *, int *);
+    void getConnectivityIndices(int *, int *, int *);
     static int destroy(MeshCXX **);
 
     int addElements(int, int*, int*, int*, int*, double *, double *);
@@ -178,6 +178,12 @@ void ESMCI_geteleminfointoarray(Mesh *mesh,
 void ESMCI_getconnectivity(Mesh **meshpp, double *connCoord, int *nodesPerElem,
                                    int *_orig_sdim, int *rc);
 
+void ESMCI_getconnectivitycount(Mesh **meshpp, int *num_elems, int *num_conn,
+                                int *rc);
+
+void ESMCI_getconnectivityindices(Mesh **meshpp, int *elemConn, int *nodesPerElem,
+                                  int *rc);
+
 void ESMCI_meshgetarea(Mesh **meshpp, int *num_elem, double *elem_areas, int *rc);
 
 void ESMCI_meshgetdimensions(Mesh **meshpp, int *sdim, int *pdim, int *rc);
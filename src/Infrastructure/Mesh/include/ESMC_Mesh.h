@@ -427,6 +427,77 @@ void ESMC_MeshGetConnectivity(
 //EOP
 //-----------------------------------------------------------------------------
 
+//------------------------------------------------------------------------------
+//BOP
+// !IROUTINE: ESMC_MeshGetConnectivityCount - Get Mesh connectivity size
+//
+// !INTERFACE:
+void ESMC_MeshGetConnectivityCount(
+                         ESMC_Mesh mesh_in,     // in (required)
+                         int *num_elems,        // out
+                         int *num_conn,         // out
+                         int *rc                // out
+                         );
+// !RETURN VALUE:
+//  None
+//
+// !DESCRIPTION:
+//
+// This call returns the sizes of the buffers needed by
+// {\tt ESMC\_MeshGetConnectivityIndices()}.
+//
+// The arguments are:
+// \begin{description}
+// \item[mesh\_in] Mesh object.
+// \item[num\_elems] Pointer to an integer.  The number of locally owned
+//    elements is returned here.
+// \item[num\_conn] Pointer to an integer.  The total number of nodes
+//    referenced by the locally owned elements is returned here.
+// \item[rc] Return code; equals {\tt ESMF\_SUCCESS} if there are no
+// errors.
+// \end{description}
+//
+//EOP
+//-----------------------------------------------------------------------------
+
+//------------------------------------------------------------------------------
+//BOP
+// !IROUTINE: ESMC_MeshGetConnectivityIndices - Get Mesh connectivity indices
+//
+// !INTERFACE:
+void ESMC_MeshGetConnectivityIndices(
+                         ESMC_Mesh mesh_in,     // in (required)
+                         int *elemConn,         // out
+                         int *nodesPerElem,     // out
+                         int *rc                // out
+                         );
+// !RETURN VALUE:
+//  None
+//
+// !DESCRIPTION:
+//
+// This call returns the connectivity of the locally owned elements of the
+// given {\tt ESMC\_Mesh} as node indices.  The elements are in the same
+// order as the coordinates returned by {\tt ESMC\_MeshGetElemCoord()}.  Each
+// index is the 0-based position of the node among all local nodes, which is
+// the order in which the nodes were added to the {\tt ESMC\_Mesh}.  The sizes
+// of the buffers can be retrieved with
+// {\tt ESMC\_MeshGetConnectivityCount()}.
+//
+// The arguments are:
+// \begin{description}
+// \item[mesh\_in] Mesh object.
+// \item[elemConn] Pointer to integers of size {\tt num\_conn}.  The node
+//    indices of each element are returned here.
+// \item[nodesPerElem] Pointer to integers of size {\tt num\_elems}.  The
+//    number of nodes in each element is returned here.
+// \item[rc] Return code; equals {\tt ESMF\_SUCCESS} if there are no
+// errors.
+// \end{description}
+//
+//EOP
+//-----------------------------------------------------------------------------
+
 
 //------------------------------------------------------------------------------
 //BOPI
@@ -177,9 +177,15 @@ class TestExamplesDryrunCommand(TestExamplesCommand):
 
 class TestRegridFromFileCommand(AbstractESMFCommand):
     description = "test regrid from file"
+    user_options = [('jobs=', 'j',
+                     "Number of test cases to run concurrently")]
     _filename = 'run_regrid_from_file.py'
     _flags = None
 
+    def initialize_options(self):
+        self.cwd = None
+        self.jobs = None
+
     def run(self):
         original_pp = os.environ.get('PYTHONPATH', '')
         path = os.path.join(os.getcwd(), 'src')
@@ -189,11 +195,14 @@ class TestRegridFromFileCommand(AbstractESMFCommand):
         cmd = [sys.executable, target]
         if self._flags is not None:
             cmd.append(self._flags)
+        if self.jobs is not None:
+            cmd += ['--jobs', str(self.jobs)]
         subprocess.check_call(cmd)
 
 
 class TestRegridFromFileDryrunCommand(TestRegridFromFileCommand):
     description = "test regrid from file dryrun"
+    user_options = []
     _filename = 'run_regrid_from_file_dryrun.py'
 
 
@@ -49,6 +49,9 @@ _ESMF_VERSION = None
 _ESMF_MPIRUN = None
 _ESMF_MPIRUN_NP = None
 
+# ESMPY_THREAD_SAFE
+_ESMPY_THREAD_SAFE = False
+
 #### NAMED CONSTANTS ##########################################################
 
 # CoordSys
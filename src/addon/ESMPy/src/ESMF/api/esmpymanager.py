@@ -9,9 +9,11 @@ The ESMPyManager API
 from ESMF.api.constants import *
 from ESMF.util.exceptions import *
 from ESMF.interface.cbindings import *
-from ESMF.util.decorators import initialize
+from ESMF.util.decorators import _lock, initialize, synchronized
 
+import itertools
 import re
+import weakref
 
 #### UTILITIES ################################################################
 
@@ -72,7 +74,9 @@ class Manager(object):
     Calls ESMP_Initialize and registers __del__ with atexit when called the
     first time.  Subsequent calls only return whether or not ESMF is
     initialized.  Registering __del__ with atexit ensures the ESMP_Finalize
-    will always be called prior to exiting Python.  Calling __init__
+    will always be called prior to exiting Python.  The ESMF allocations of
+    ESMPy objects that have not been released by then are released before
+    ESMP_Finalize is called.  Calling __init__
     explicitly results in a no-op.
 
     :param bool debug: outputs logging information to ESMF logfiles. If
@@ -81,6 +85,7 @@ class Manager(object):
     # The singleton instance for this class
     __singleton = None
     
+    @synchronized
     def __new__(cls, debug=False):
         '''
         Returns the singleton instance of this class, creating it if it does 
@@ -93,9 +98,14 @@ class Manager(object):
             cls.__singleton = super(Manager, cls).__new__(cls)
             cls.__singleton.__esmp_initialized = False
             cls.__singleton.__esmp_finalized = False
+            # weak references to the ESMPy objects that may need to be
+            # destroyed before ESMF is finalized, by creation order
+            cls.__singleton.__objects = weakref.WeakValueDictionary()
+            cls.__singleton.__object_ids = itertools.count()
         return cls.__singleton
 
 
+    @synchronized
     def __init__(self, debug=False):
         # Return no-op
         if self.__esmp_finalized:
@@ -141,16 +151,34 @@ class Manager(object):
         this function can be called directly (presumably to delete the log file)
         before exiting without causing problems.
         '''
-        # If ESMP not initialize, or already finalized, just return
-        if not self.__esmp_initialized:
-            return
-        if self.__esmp_finalized:
-            return
-
-        # Call ESMP_Finalize and set flags indicating this has been done
-        ESMP_Finalize()
-        self.__esmp_initialized = False
-        self.__esmp_finalized = True
+        with _lock:
+            # If ESMP not initialize, or already finalized, just return
+            if not self.__esmp_initialized:
+                return
+            if self.__esmp_finalized:
+                return
+
+            # The objects that are still alive, newest first so e.g. a
+            # Regrid is released before its Fields
+            objects = [self.__objects.get(object_id) for object_id in
+                       sorted(self.__objects.keys(), reverse=True)]
+            self.__objects.clear()
+
+        # Destroy outside of the lock, a Regrid waits for its submitted
+        # applications and the worker thread may need the lock to finish them
+        for obj in objects:
+            if obj is not None:
+                obj.destroy()
+        del objects
+
+        with _lock:
+            if self.__esmp_finalized:
+                return
+
+            # Call ESMP_Finalize and set flags indicating this has been done
+            ESMP_Finalize()
+            self.__esmp_initialized = False
+            self.__esmp_finalized = True
 
     def __repr__(self):
         string = ("ESMPyManager:\n"
@@ -180,6 +208,18 @@ class Manager(object):
         '''
         ESMP_VMBroadcast(self.vm, bcstBuf, count, rootPet)
 
+    @synchronized
+    def _register_(self, obj):
+        '''
+        Register an ESMPy object or the handle of an ESMF allocation to be
+        destroyed before ESMF is finalized.  Only a weak reference is held,
+        so an allocation is still released as soon as neither its object
+        nor any of its arrays is referenced.\n
+            Arguments:\n
+                object with a destroy method :: obj\n
+        '''
+        self.__objects[next(self.__object_ids)] = obj
+
     def _reduce_(self, sendBuf, recvBuf, count, reduceflag=Reduce.SUM, rootPet=0):
         '''
         Reduce data from sendBuf into recvBuf across the VM.\n
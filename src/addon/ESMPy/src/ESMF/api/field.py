@@ -10,6 +10,7 @@ from ESMF.api.grid import *
 from ESMF.api.mesh import *
 from ESMF.api.locstream import *
 from ESMF.util.esmpyarray import *
+import ESMF.api.constants as constants
 
 #### Field class ##############################################################
 [node, element] = [0, 1]
@@ -63,6 +64,11 @@ class Field(object):
         single value, a list or a tuple containing the number of entries for
         each desired extra dimension of the :class:`~ESMF.api.field.Field`. The
         time dimension must be last, following Fortran indexing conventions.
+    :param bool ungridded_first: For internal use, place the extra dimensions
+        given by ``ndbounds`` before the gridded dimensions so they vary fastest
+        in memory. This allows a :class:`~ESMF.api.regrid.Regrid` computed on
+        :class:`Fields <ESMF.api.field.Field>` without extra dimensions to be
+        applied to all extra dimensions at once. Defaults to ``False``.
     """
 
     @initialize
@@ -70,7 +76,8 @@ class Field(object):
                 typekind=None,
                 staggerloc=None,
                 meshloc=None,
-                ndbounds=None):
+                ndbounds=None,
+                ungridded_first=False):
         # optional arguments
         if staggerloc is None:
             staggerloc = StaggerLoc.CENTER
@@ -102,6 +109,9 @@ class Field(object):
             ungridded_upper_bound = np.array(local_ndbounds, dtype=np.int32)
             # set this to put gridded dimension in the first available dimensions of the field, dependent on grid rank
             grid_to_field_map = np.array([i+1 for i in range(grid.rank)], dtype=np.int32)
+            # or shift it behind the extra dimensions
+            if ungridded_first:
+                grid_to_field_map += xd
             rank += len(local_ndbounds)
 
         if isinstance(grid, Grid):
@@ -136,21 +146,53 @@ class Field(object):
         else:
             raise FieldDOError
 
-        # get data and bounds to create a new instance of this object
-        lbounds, ubounds = ESMP_FieldGetBounds(struct, rank)
+        # the ESMF allocation, released when neither the Field nor any of its
+        # arrays is referenced, or by the Manager at exit, the allocation of
+        # the grid is kept until then
+        self._allocation = ESMFAllocation(
+            struct, ESMP_FieldDestroy,
+            parents=[a for a in [grid._allocation] if a is not None])
+        Manager()._register_(self._allocation)
 
-        # initialize field data
-        # TODO: MaskedArray gives better interpolation values than Array (171128 removed .copy from .data below
-        # self._data = MaskedArray(ESMP_FieldGetPtr(struct), None, typekind, ubounds-lbounds).data
-        self._data = ndarray_from_esmf(ESMP_FieldGetPtr(struct), typekind, ubounds-lbounds)
+        # a Field on a Grid has the DEs of the Grid on this PET
+        if isinstance(grid, Grid):
+            local_decount = grid.local_decount
+        else:
+            local_decount = 1
+
+        # get data and bounds of every local DE to create a new instance of
+        # this object, a PET without DEs gets empty data
+        self._data_de = []
+        self._lower_bounds_de = []
+        self._upper_bounds_de = []
+        for localde in range(local_decount):
+            lbounds, ubounds = ESMP_FieldGetBounds(struct, rank,
+                                                   localDe=localde)
+
+            # initialize field data
+            # TODO: MaskedArray gives better interpolation values than Array (171128 removed .copy from .data below
+            # self._data = MaskedArray(ESMP_FieldGetPtr(struct), None, typekind, ubounds-lbounds).data
+            self._data_de.append(ndarray_from_esmf(
+                ESMP_FieldGetPtr(struct, localDe=localde), typekind,
+                ubounds-lbounds, owner=self._allocation))
+            self._lower_bounds_de.append(lbounds)
+            self._upper_bounds_de.append(ubounds)
+        if local_decount == 0:
+            self._data_de.append(np.zeros([0] * rank,
+                dtype=constants._ESMF2PythonType[typekind]))
+            self._lower_bounds_de.append(np.zeros(rank, dtype=np.int32))
+            self._upper_bounds_de.append(np.zeros(rank, dtype=np.int32))
+
+        self._data = self._data_de[0]
+        self._local_decount = local_decount
         self._name = name
         self._type = typekind
         self._rank = rank
         self._struct = struct
         self._xd = xd
         self._staggerloc = staggerloc
-        self._lower_bounds = lbounds
-        self._upper_bounds = ubounds
+        self._lower_bounds = self._lower_bounds_de[0]
+        self._upper_bounds = self._upper_bounds_de[0]
         self._ndbounds = local_ndbounds
 
         self._grid = grid
@@ -158,14 +200,8 @@ class Field(object):
         # for arbitrary metadata
         self._meta = {}
 
-        # register function with atexit
-        import atexit
-        atexit.register(self.__del__)
         self._finalized = False
 
-    def __del__(self):
-        self.destroy()
-
     def __getitem__(self, slc):
         if pet_count() > 1:
             raise SerialMethod
@@ -188,6 +224,11 @@ class Field(object):
         ret._upper_bounds = np.array(ret.data.shape, dtype=np.int32)
         # lower bounds do not need to be sliced yet because slicing is not yet enabled in parallel
 
+        # the slice holds a single DE
+        ret._data_de = [ret._data]
+        ret._lower_bounds_de = [ret._lower_bounds]
+        ret._upper_bounds_de = [ret._upper_bounds]
+
         return ret
 
     def __repr__(self):
@@ -246,6 +287,19 @@ class Field(object):
         """
         return self._grid
 
+    @property
+    def local_decount(self):
+        """
+        :rtype: int
+        :return: The number of DEs of the :class:`~ESMF.api.field.Field` on
+            this PET, which is that of its :class:`~ESMF.api.grid.Grid`.  The
+            data and bounds of the :class:`~ESMF.api.field.Field` are those of
+            the first local DE, the others are returned by
+            :meth:`~ESMF.api.field.Field.get_data` and
+            :meth:`~ESMF.api.field.Field.get_bounds`.
+        """
+        return self._local_decount
+
     @property
     def lower_bounds(self):
         """
@@ -344,13 +398,14 @@ class Field(object):
 
         return ret
 
+    @synchronized
     def destroy(self):
         """
         Release the memory associated with a :class:`~ESMF.api.field.Field`.
         """
         if hasattr(self, '_finalized'):
             if self._finalized is False:
-                ESMP_FieldDestroy(self)
+                self._allocation.destroy()
                 self._finalized = True
 
     def get_area(self):
@@ -363,6 +418,41 @@ class Field(object):
         # call into the ctypes layer
         ESMP_FieldRegridGetArea(self)
 
+    def get_bounds(self, localde=0):
+        """
+        Return the lower and upper bounds of a DE of the
+        :class:`~ESMF.api.field.Field` on this PET.
+
+        *OPTIONAL:*
+
+        :param int localde: The DE on this PET, from ``0`` to
+            :attr:`~ESMF.api.field.Field.local_decount` ``- 1``.
+
+        :return: A tuple of numpy arrays holding the lower and upper bounds.
+        """
+
+        self._check_localde_(localde)
+
+        return self._lower_bounds_de[localde], self._upper_bounds_de[localde]
+
+    def get_data(self, localde=0):
+        """
+        Return the data of a DE of the :class:`~ESMF.api.field.Field` on this
+        PET.  The returned array is NOT a copy, it is directly aliased to the
+        underlying memory allocated by ESMF.
+
+        *OPTIONAL:*
+
+        :param int localde: The DE on this PET, from ``0`` to
+            :attr:`~ESMF.api.field.Field.local_decount` ``- 1``.
+
+        :return: A numpy array of the data of the DE.
+        """
+
+        self._check_localde_(localde)
+
+        return self._data_de[localde]
+
     def read(self, filename, variable, timeslice=None):
         """
         Read data into an existing :class:`~ESMF.api.field.Field` from a
@@ -407,3 +497,10 @@ class Field(object):
                        variablename=variable,
                        timeslice=local_timeslice,
                        iofmt=format)
+
+    ################ Helper functions ##########################################
+
+    def _check_localde_(self, localde):
+        if not 0 <= localde < max(self.local_decount, 1):
+            raise ValueError("localde must be in the range [0, {}) of the DEs "
+                             "on this PET".format(self.local_decount))
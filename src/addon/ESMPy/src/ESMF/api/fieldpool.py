@@ -0,0 +1,221 @@
+# $Id$
+
+"""
+The Field pool API
+"""
+
+from contextlib import contextmanager
+
+from ESMF.api.field import *
+
+
+class FieldPool(object):
+    """
+    The :class:`~ESMF.api.fieldpool.FieldPool` hands out scratch
+    :class:`Fields <ESMF.api.field.Field>` and keeps them for reuse when they
+    are returned, so that temporary Fields created over and over, e.g. for a
+    mass diagnostic in a time loop, are only allocated once.  Pooled Fields
+    are identified by their :class:`~ESMF.api.grid.Grid`,
+    :class:`~ESMF.api.mesh.Mesh` or :class:`~ESMF.api.locstream.LocStream`,
+    stagger or mesh location, type kind and extra dimensions.  The data of a
+    Field is set to zero when it is handed out for the first time and when it
+    is returned to the pool.
+
+    Creating and destroying a :class:`~ESMF.api.field.Field` are collective
+    calls, so all PETs must request and return Fields in the same order.
+
+    .. code::
+
+        pool = ESMF.FieldPool()
+        with pool.field(grid) as areafield:
+            areafield.get_area()
+            mass = np.sum(areafield.data * field.data)
+
+    *OPTIONAL:*
+
+    :param int max_fields: the maximum number of idle
+        :class:`Fields <ESMF.api.field.Field>` kept by the pool, Fields
+        returned to a full pool are destroyed.  If ``None``, the number of
+        Fields is not limited.
+    """
+
+    @initialize
+    def __init__(self, max_fields=None):
+        if max_fields is not None and max_fields < 0:
+            raise ValueError("max_fields must not be negative")
+
+        self._max_fields = max_fields
+
+        # Idle Fields by key, each list ordered from the least to the most
+        # recently returned Field
+        self._fields = {}
+        # ids of the idle Fields, which the pool keeps alive
+        self._idle = set()
+
+        # Hit and miss counters for this process
+        self._hits = 0
+        self._misses = 0
+
+    def __len__(self):
+        return sum(len(fields) for fields in self._fields.values())
+
+    def __repr__(self):
+        string = ("FieldPool:\n"
+                  "    fields = %r\n"
+                  "    max_fields = %r\n"
+                  "    hits = %r\n"
+                  "    misses = %r\n"
+                  %
+                  (len(self),
+                   self.max_fields,
+                   self.hits,
+                   self.misses))
+
+        return string
+
+    @property
+    def hits(self):
+        """
+        :rtype: int
+        :return: The number of requests served with a pooled
+            :class:`~ESMF.api.field.Field`.
+        """
+
+        return self._hits
+
+    @property
+    def max_fields(self):
+        """
+        :rtype: int
+        :return: The maximum number of idle
+            :class:`Fields <ESMF.api.field.Field>` kept by the pool.
+        """
+
+        return self._max_fields
+
+    @property
+    def misses(self):
+        """
+        :rtype: int
+        :return: The number of requests that created a new
+            :class:`~ESMF.api.field.Field`.
+        """
+
+        return self._misses
+
+    @synchronized
+    def acquire(self, grid, typekind=None, staggerloc=None, meshloc=None,
+                ndbounds=None):
+        """
+        Take a :class:`~ESMF.api.field.Field` from the pool, creating it if
+        no matching Field is idle.  The Field must be handed back with
+        :meth:`~ESMF.api.fieldpool.FieldPool.release`.  The optional
+        arguments are the same as for :class:`~ESMF.api.field.Field`.
+
+        *REQUIRED:*
+
+        :param :class:`~ESMF.api.grid.Grid`/Mesh/:class:`~ESMF.api.locstream.LocStream` grid:
+            the discretization object of the :class:`~ESMF.api.field.Field`.
+
+        :return: :class:`~ESMF.api.field.Field`
+        """
+
+        key = _field_key_(grid, typekind, staggerloc, meshloc, ndbounds)
+
+        fields = self._fields.get(key, [])
+        while fields:
+            field = fields.pop()
+            self._idle.discard(id(field))
+            # the Field or its grid may have been destroyed in the meantime
+            if not field.finalized and not field.grid.finalized:
+                self._hits += 1
+                return field
+        self._fields.pop(key, None)
+
+        self._misses += 1
+        field = Field(grid, name='scratch', typekind=typekind,
+                      staggerloc=staggerloc, meshloc=meshloc,
+                      ndbounds=ndbounds)
+        field.data[...] = 0
+        field.meta['pool_key'] = key
+        return field
+
+    @synchronized
+    def release(self, field):
+        """
+        Zero the data of a :class:`~ESMF.api.field.Field` taken with
+        :meth:`~ESMF.api.fieldpool.FieldPool.acquire` and return it to the
+        pool.  Returning a Field that is already idle in the pool raises a
+        ValueError.
+
+        *REQUIRED:*
+
+        :param Field field: the :class:`~ESMF.api.field.Field` to return.
+        """
+
+        key = field.meta.get('pool_key')
+        if key is None:
+            raise ValueError("the Field was not taken from a FieldPool")
+        if id(field) in self._idle:
+            raise ValueError("the Field has already been returned to the pool")
+        if field.finalized:
+            return
+
+        if self.max_fields is not None and len(self) >= self.max_fields:
+            field.destroy()
+            return
+
+        field.data[...] = 0
+        self._fields.setdefault(key, []).append(field)
+        self._idle.add(id(field))
+
+    @contextmanager
+    def field(self, grid, typekind=None, staggerloc=None, meshloc=None,
+              ndbounds=None):
+        """
+        Context manager yielding a scratch :class:`~ESMF.api.field.Field`
+        from the pool, which is zeroed and returned to the pool at the end of
+        the ``with`` block.  The arguments are the same as for
+        :meth:`~ESMF.api.fieldpool.FieldPool.acquire`.
+
+        :return: :class:`~ESMF.api.field.Field`
+        """
+
+        field = self.acquire(grid, typekind=typekind, staggerloc=staggerloc,
+                             meshloc=meshloc, ndbounds=ndbounds)
+        try:
+            yield field
+        finally:
+            self.release(field)
+
+    @synchronized
+    def clear(self):
+        """
+        Destroy all idle :class:`Fields <ESMF.api.field.Field>` held by the
+        pool.  This is a collective call.
+        """
+
+        self._idle.clear()
+        while self._fields:
+            _, fields = self._fields.popitem()
+            for field in fields:
+                field.destroy()
+
+
+def _field_key_(grid, typekind, staggerloc, meshloc, ndbounds):
+    """Return the pool key of a Field, with the defaults of the Field
+    arguments filled in.  The pooled Fields keep their grid alive, so its id
+    is not reused while the key is in use."""
+
+    if typekind is None:
+        typekind = TypeKind.R8
+    if isinstance(grid, Mesh):
+        location = MeshLoc.NODE if meshloc is None else meshloc
+    elif isinstance(grid, Grid):
+        location = StaggerLoc.CENTER if staggerloc is None else staggerloc
+    else:
+        location = None
+    if ndbounds is not None:
+        ndbounds = tuple(np.atleast_1d(ndbounds).tolist()) or None
+
+    return (id(grid), type(grid).__name__, location, typekind, ndbounds)
@@ -10,8 +10,9 @@ import warnings
 from copy import copy
 
 from ESMF.api.esmpymanager import *
-from ESMF.util.esmpyarray import ndarray_from_esmf
+from ESMF.util.esmpyarray import ESMFAllocation, ndarray_from_esmf
 import ESMF.api.constants as constants
+import ESMF.util.fingerprint as fingerprint
 from ESMF.util.slicing import get_formatted_slice, get_none_or_slice, get_none_or_bound, get_none_or_ssslice
 
 
@@ -436,43 +437,48 @@ class Grid(object):
         # staggerloc
         self._staggerloc = [False for a in range(2**self.rank)]
 
+        # the ESMF allocation, released when neither the Grid nor any of its
+        # arrays is referenced, or by the Manager at exit
+        self._allocation = ESMFAllocation(self._struct, ESMP_GridDestroy)
+        Manager()._register_(self._allocation)
+
+        # number of DEs on this PET, a PET may hold several tiles of a cubed
+        # sphere Grid, or none at all
+        self._local_decount = ESMP_GridGetLocalDECount(self)
+        nde = max(self.local_decount, 1)
+
         # bounds
-        # lower_bounds[staggerLoc]
-        self._lower_bounds = [None for a in range(2**self.rank)]
-        # upper_bounds[staggerLoc]
-        self._upper_bounds = [None for a in range(2**self.rank)]
-        # size[staggerloc]
-        self._size = [None for a in range(2**self.rank)]
-        # coords[staggerLoc][coord_dim]
-        self._coords = [[None for a in range(self.rank)] \
-                        for b in range(2**self.rank)]
-        # mask[staggerloc]
-        self._mask = [None for a in range(2**self.rank)]
-        # area[staggerloc]
-        self._area = [None for a in range(2**self.rank)]
-
-        # if self.decount == 1:
-        # elif self.decount > 1:
-        #     # lower_bounds[de][staggerLoc]
-        #     self._lower_bounds = [[None for a in range(2**self.rank)] \
-        #                            for b in range(self.decount)]
-        #     # upper_bounds[de][staggerLoc]
-        #     self._upper_bounds = [[None for a in range(2**self.rank)] \
-        #                            for b in range(self.decount)]
-        #     # size[de][staggerloc]
-        #     self._size = [[None for a in range(2**self.rank)] \
-        #                   for b in range(self.decount)]
-        #     # coords[de][staggerLoc][coord_dim]
-        #     self._coords = [[[None for a in range(self.rank)] \
-        #                      for b in range(2**self.rank)] \
-        #                     for c in range(self.decount)]
-        #     # mask[de][staggerloc]
-        #     self._mask = [[None for a in range(2**self.rank)] \
-        #                   for b in range(self.decount)]
-        #     # area[de][staggerloc]
-        #     self._area = [[None for a in range(2**self.rank)] \
-        #                   for b in range(self.decount)]
-        # else: raise IndexError
+        # lower_bounds[de][staggerLoc]
+        self._lower_bounds_de = [[None for a in range(2**self.rank)] \
+                                 for b in range(nde)]
+        # upper_bounds[de][staggerLoc]
+        self._upper_bounds_de = [[None for a in range(2**self.rank)] \
+                                 for b in range(nde)]
+        # size[de][staggerloc]
+        self._size_de = [[None for a in range(2**self.rank)] \
+                         for b in range(nde)]
+        # coords[de][staggerLoc][coord_dim]
+        self._coords_de = [[[None for a in range(self.rank)] \
+                            for b in range(2**self.rank)] \
+                           for c in range(nde)]
+        # coords_1d[de][staggerLoc][coord_dim], only for 1D coordinates
+        self._coords_1d_de = [[None for a in range(2**self.rank)] \
+                              for b in range(nde)]
+        # mask[de][staggerloc]
+        self._mask_de = [[None for a in range(2**self.rank)] \
+                         for b in range(nde)]
+        # area[de][staggerloc]
+        self._area_de = [[None for a in range(2**self.rank)] \
+                         for b in range(nde)]
+
+        # the public properties hold the first local DE
+        self._lower_bounds = self._lower_bounds_de[0]
+        self._upper_bounds = self._upper_bounds_de[0]
+        self._size = self._size_de[0]
+        self._coords = self._coords_de[0]
+        self._coords_1d = self._coords_1d_de[0]
+        self._mask = self._mask_de[0]
+        self._area = self._area_de[0]
 
         # Add coordinates if a staggerloc is specified
         if staggerloc is not None:
@@ -490,13 +496,8 @@ class Grid(object):
         # for arbitrary metadata
         self._meta = {}
 
-        # regist with atexit
-        import atexit; atexit.register(self.__del__)
         self._finalized = False
 
-    def __del__(self):
-        self.destroy()
-
     def __getitem__(self, slc):
         # no slicing in parallel
         if pet_count() > 1:
@@ -513,6 +514,7 @@ class Grid(object):
         ret._coords = [[get_none_or_ssslice(get_none_or_slice(get_none_or_slice(self.coords, stagger), coorddim), slc,
                                             stagger, self.rank)
                         for coorddim in range(self.rank)] for stagger in range(2 ** self.rank)]
+        ret._coords_1d = [None for stagger in range(2 ** self.rank)]
         ret._mask = [get_none_or_slice(get_none_or_slice(self.mask, stagger), slc) for stagger in range(2 ** self.rank)]
         ret._area = [get_none_or_slice(get_none_or_slice(self.area, stagger), slc) for stagger in range(2 ** self.rank)]
 
@@ -521,6 +523,15 @@ class Grid(object):
                              range(2 ** self.rank)]
         # lower bounds do not need to be sliced yet because slicing is not yet enabled in parallel
 
+        # the slice holds a single DE
+        ret._lower_bounds_de = [ret._lower_bounds]
+        ret._upper_bounds_de = [ret._upper_bounds]
+        ret._size_de = [ret._size]
+        ret._coords_de = [ret._coords]
+        ret._coords_1d_de = [ret._coords_1d]
+        ret._mask_de = [ret._mask]
+        ret._area_de = [ret._area]
+
         return ret
 
     def __repr__(self):
@@ -587,7 +598,10 @@ class Grid(object):
             the stagger locations of the :class:`~ESMF.api.grid.Grid` and the
             second index represent the coordinate dimensions of the
             :class:`~ESMF.api.grid.Grid`.
-        :return: The coordinates of the :class:`~ESMF.api.grid.Grid`.
+        :return: The coordinates of the :class:`~ESMF.api.grid.Grid`.  If the
+            :class:`~ESMF.api.grid.Grid` has 1D coordinates, e.g. when created
+            from a rectilinear GRIDSPEC file, these are read-only broadcast
+            views of the 1D coordinate arrays held by ESMF.
         """
 
         return self._coords
@@ -621,6 +635,24 @@ class Grid(object):
 
         return self._has_corners
 
+    @property
+    def local_decount(self):
+        """
+        :rtype: int
+        :return: The number of DEs of the :class:`~ESMF.api.grid.Grid` on this
+            PET, e.g. several tiles of a cubed sphere
+            :class:`~ESMF.api.grid.Grid` created with ``regDecompPTile``.  The
+            properties of the :class:`~ESMF.api.grid.Grid` hold the first
+            local DE, the others are returned by
+            :meth:`~ESMF.api.grid.Grid.get_coords`,
+            :meth:`~ESMF.api.grid.Grid.get_item` and
+            :meth:`~ESMF.api.grid.Grid.get_bounds`.  On a PET without DEs
+            these return empty arrays, like the data of a
+            :class:`~ESMF.api.field.Field`.
+        """
+
+        return self._local_decount
+
     @property
     def lower_bounds(self):
         """
@@ -826,15 +858,20 @@ class Grid(object):
                 staggerloc = [staggerloc]
 
         for stagger in staggerloc:
-            if self.coords[stagger][0] is not None:
+            if self.staggerloc[stagger]:
                 warnings.warn("This coordinate has already been added.")
             else:
                 # request that ESMF allocate space for the coordinates
                 if not from_file:
                     ESMP_GridAddCoord(self, staggerloc=stagger)
 
-                # and now for Python
-                self._allocate_coords_(stagger, from_file=from_file)
+                # and now for Python, on every DE of this PET, a PET without
+                # DEs gets empty arrays
+                for localde in range(self.local_decount):
+                    self._allocate_coords_(stagger, localde=localde,
+                                           from_file=from_file)
+                if self.local_decount == 0:
+                    self._allocate_empty_coords_(stagger)
 
                 # set the staggerlocs to be done
                 self.staggerloc[stagger] = True
@@ -892,8 +929,13 @@ class Grid(object):
                 if not from_file:
                     ESMP_GridAddItem(self, item, staggerloc=stagger)
 
-                # and now for Python..
-                self._allocate_items_(item, stagger, from_file=from_file)
+                # and now for Python, on every DE of this PET, a PET without
+                # DEs gets empty arrays
+                for localde in range(self.local_decount):
+                    self._allocate_items_(item, stagger, localde=localde,
+                                          from_file=from_file)
+                if self.local_decount == 0:
+                    self._allocate_empty_items_(item, stagger)
 
         if len(staggerloc) is 1:
             if item == GridItem.MASK:
@@ -916,16 +958,176 @@ class Grid(object):
 
         return ret
 
+    @synchronized
     def destroy(self):
         """
         Release the memory associated with a :class:`~ESMF.api.grid.Grid`.
         """
         if hasattr(self, '_finalized'):
             if not self._finalized:
-                ESMP_GridDestroy(self)
+                self._allocation.destroy()
                 self._finalized = True
 
-    def get_coords(self, coord_dim, staggerloc=None):
+    def fingerprint(self):
+        """
+        Compute a digest of the geometry of the :class:`~ESMF.api.grid.Grid`,
+        e.g. to key a cache of objects built on it.  The digest covers the
+        coordinates, mask and area of every stagger location, the bounds, the
+        periodicity and the coordinate system.  The local arrays are hashed in
+        place and the digests of all PETs are combined through the VM.  This is
+        a collective call.
+
+        :return: A hexadecimal string that is identical on all PETs.
+        """
+
+        return fingerprint.digest(self)
+
+    @classmethod
+    def from_arrays(cls, lon, lat, lon_bounds=None, lat_bounds=None,
+                    mask=None, area=None, periodic=False, coord_sys=None,
+                    coord_typekind=None, name=None):
+        """
+        Create a 2D :class:`~ESMF.api.grid.Grid` from in-memory coordinate
+        arrays in the layout of CF files, e.g. the values of xarray
+        variables.  Each PET copies its own part of the arrays once, directly
+        into the memory allocated by ESMF.  The arrays must be identical on
+        all PETs.
+
+        2D arrays are given in the CF dimension order ``(lat, lon)``, which
+        is the transpose of the ``(lon, lat)`` index order of the
+        :class:`~ESMF.api.grid.Grid`.
+
+        *REQUIRED:*
+
+        :param ndarray lon: the longitudes of the cell centers, either a 1D
+            array of ``nlon`` values or a 2D array of shape ``(nlat, nlon)``.
+        :param ndarray lat: the latitudes of the cell centers, either a 1D
+            array of ``nlat`` values or a 2D array of shape ``(nlat, nlon)``.
+
+        *OPTIONAL:*
+
+        :param ndarray lon_bounds: the longitudes of the cell bounds, of shape
+            ``(nlon, 2)`` for 1D coordinates or ``(nlat, nlon, 4)`` for 2D
+            coordinates, with the vertices of each cell in counterclockwise
+            order starting from the lower left.  If given, the
+            :attr:`~ESMF.api.constants.StaggerLoc.CORNER` stagger is added.
+        :param ndarray lat_bounds: the latitudes of the cell bounds, in the
+            same layout as ``lon_bounds``.
+        :param ndarray mask: the :attr:`~ESMF.api.constants.GridItem.MASK`
+            values of the cells, of shape ``(nlat, nlon)``.
+        :param ndarray area: the :attr:`~ESMF.api.constants.GridItem.AREA`
+            of the cells, of shape ``(nlat, nlon)``.
+        :param bool periodic: Set to ``True`` if the longitude dimension is
+            periodic. Defaults to ``False``.
+        :param CoordSys coord_sys: Coordinate system for the
+            :class:`~ESMF.api.grid.Grid`.
+            If ``None``, defaults to :attr:`~ESMF.api.constants.CoordSys.SPH_DEG`.
+        :param TypeKind coord_typekind: Type of the :class:`~ESMF.api.grid.Grid`
+            coordinates.
+            If ``None``, defaults to :attr:`~ESMF.api.constants.TypeKind.R8`.
+        :param str name: The name of the :class:`~ESMF.api.grid.Grid`.
+
+        :return: :class:`~ESMF.api.grid.Grid`
+        """
+
+        [x, y] = [0, 1]
+
+        lon = np.asarray(lon)
+        lat = np.asarray(lat)
+        if lon.ndim != lat.ndim or lon.ndim not in (1, 2):
+            raise ValueError("lon and lat must both be 1D or both be 2D arrays")
+        if lon.ndim == 1:
+            max_index = np.array([lon.size, lat.size], dtype=np.int32)
+        else:
+            if lon.shape != lat.shape:
+                raise ValueError("lon and lat must have the same shape")
+            max_index = np.array(lon.shape[::-1], dtype=np.int32)
+        if (lon_bounds is None) != (lat_bounds is None):
+            raise ValueError("lon_bounds and lat_bounds must be given together")
+
+        staggerloc = [StaggerLoc.CENTER]
+        if lon_bounds is not None:
+            staggerloc.append(StaggerLoc.CORNER)
+
+        if periodic:
+            grid = cls(max_index, num_peri_dims=1, periodic_dim=x, pole_dim=y,
+                       coord_sys=coord_sys, coord_typekind=coord_typekind,
+                       staggerloc=staggerloc, name=name)
+        else:
+            grid = cls(max_index, coord_sys=coord_sys,
+                       coord_typekind=coord_typekind, staggerloc=staggerloc,
+                       name=name)
+
+        items = []
+        for item, values in [(GridItem.MASK, mask), (GridItem.AREA, area)]:
+            if values is not None:
+                values = np.asarray(values)
+                if values.shape != tuple(max_index[::-1]):
+                    raise ValueError("mask and area must have the shape "
+                                     "(nlat, nlon) of the cells")
+                grid.add_item(item)
+                items.append((item, values))
+
+        if lon_bounds is not None and lon.ndim == 1:
+            grid.set_corners_from_cf_bounds([lon_bounds, lat_bounds])
+
+        for localde in range(grid.local_decount):
+            # the local window of the cell centers on this DE
+            lb, ub = grid.get_bounds(localde=localde)
+            window = (slice(lb[x], ub[x]), slice(lb[y], ub[y]))
+
+            if lon.ndim == 1:
+                grid.get_coords(x, localde=localde)[...] = \
+                    lon[window[x]].reshape(-1, 1)
+                grid.get_coords(y, localde=localde)[...] = \
+                    lat[window[y]].reshape(1, -1)
+            else:
+                grid.get_coords(x, localde=localde)[...] = lon.T[window]
+                grid.get_coords(y, localde=localde)[...] = lat.T[window]
+
+            if lon_bounds is not None and lon.ndim == 2:
+                clb, cub = grid.get_bounds(staggerloc=StaggerLoc.CORNER,
+                                           localde=localde)
+                for coord_dim, bounds in [(x, lon_bounds), (y, lat_bounds)]:
+                    grid.get_coords(coord_dim, staggerloc=StaggerLoc.CORNER,
+                                    localde=localde)[...] = \
+                        _cf_vertices_to_corners_(bounds, clb, cub)
+
+            for item, values in items:
+                grid.get_item(item, localde=localde)[...] = values.T[window]
+
+        return grid
+
+    def get_bounds(self, staggerloc=None, localde=0):
+        """
+        Return the lower and upper bounds of a DE of the
+        :class:`~ESMF.api.grid.Grid` at a specified stagger location.
+
+        *OPTIONAL:*
+
+        :param StaggerLoc staggerloc: The stagger location of the bounds.
+            If ``None``, defaults to
+            :attr:`~ESMF.api.constants.StaggerLoc.CENTER`
+            in 2D and :attr:`~ESMF.api.constants.StaggerLoc.CENTER_VCENTER` in
+            3D.
+        :param int localde: The DE on this PET, from ``0`` to
+            :attr:`~ESMF.api.grid.Grid.local_decount` ``- 1``.
+
+        :return: A tuple of numpy arrays holding the lower and upper bounds.
+        """
+
+        if staggerloc is None:
+            staggerloc = StaggerLoc.CENTER
+        elif type(staggerloc) is list:
+            raise GridSingleStaggerloc
+        elif type(staggerloc) is tuple:
+            raise GridSingleStaggerloc
+        self._check_localde_(localde)
+
+        return (self._lower_bounds_de[localde][staggerloc],
+                self._upper_bounds_de[localde][staggerloc])
+
+    def get_coords(self, coord_dim, staggerloc=None, localde=0):
         """
         Return a numpy array of coordinates at a specified stagger 
         location. The returned array is NOT a copy, it is
@@ -945,6 +1147,8 @@ class Grid(object):
             :attr:`~ESMF.api.constants.StaggerLoc.CENTER`
             in 2D and :attr:`~ESMF.api.constants.StaggerLoc.CENTER_VCENTER` in
             3D.
+        :param int localde: The DE on this PET, from ``0`` to
+            :attr:`~ESMF.api.grid.Grid.local_decount` ``- 1``.
 
         :return: A numpy array of coordinate values at the specified staggerloc.
         """
@@ -957,13 +1161,15 @@ class Grid(object):
             raise GridSingleStaggerloc
         elif type(staggerloc) is tuple:
             raise GridSingleStaggerloc
+        self._check_localde_(localde)
 
-        assert (self.coords[staggerloc][coord_dim] is not None)
-        ret = self.coords[staggerloc][coord_dim]
+        coords = self._coords_de[localde]
+        assert (coords[staggerloc][coord_dim] is not None)
+        ret = coords[staggerloc][coord_dim]
 
         return ret
 
-    def get_item(self, item, staggerloc=None):
+    def get_item(self, item, staggerloc=None, localde=0):
         """
         Return a numpy array of item values at a specified stagger
         location.  The returned array is NOT a copy, it is
@@ -980,6 +1186,8 @@ class Grid(object):
             values. If ``None``, defaults to
             :attr:`~ESMF.api.constants.StaggerLoc.CENTER` in 2D and
             :attr:`~ESMF.api.constants.StaggerLoc.CENTER_VCENTER` in 3D.
+        :param int localde: The DE on this PET, from ``0`` to
+            :attr:`~ESMF.api.grid.Grid.local_decount` ``- 1``.
 
         :return: A numpy array of mask or area values at the specified staggerloc.
         """
@@ -992,14 +1200,15 @@ class Grid(object):
             raise GridSingleStaggerloc
         elif type(staggerloc) is tuple:
             raise GridSingleStaggerloc
+        self._check_localde_(localde)
 
         # selec the grid item
         if item == GridItem.MASK:
-            assert (self.mask[staggerloc] is not None)
-            ret = self.mask[staggerloc]
+            assert (self._mask_de[localde][staggerloc] is not None)
+            ret = self._mask_de[localde][staggerloc]
         elif item == GridItem.AREA:
-            assert (self.area[staggerloc] is not None)
-            ret = self.area[staggerloc]
+            assert (self._area_de[localde][staggerloc] is not None)
+            ret = self._area_de[localde][staggerloc]
         else:
             raise GridItemNotSupported
 
@@ -1013,6 +1222,58 @@ class Grid(object):
         # use user coordinates to initialize underlying ESMF data
         # self.coords[staggerloc][:,:,coord_dim] = coord_data.copy()
 
+    def set_corners_from_cf_bounds(self, bounds, staggerloc=None):
+        """
+        Set the corner coordinates of the :class:`~ESMF.api.grid.Grid` from
+        the cell bounds of its coordinate dimensions in the format of CF
+        files, where the ``n`` cells along a dimension have bounds of shape
+        ``(n, 2)``.  The corner coordinates are allocated if they have not
+        been added yet.  Each PET sets the corners within its own bounds.
+
+        *REQUIRED:*
+
+        :param list bounds: a list with one array of shape ``(n, 2)`` for each
+            dimension of the :class:`~ESMF.api.grid.Grid`, holding the lower
+            and upper bounds of the ``n`` cells along that dimension.
+
+        *OPTIONAL:*
+
+        :param StaggerLoc staggerloc: The stagger location of the corner
+            coordinates. If ``None``, defaults to
+            :attr:`~ESMF.api.constants.StaggerLoc.CORNER` in 2D and
+            :attr:`~ESMF.api.constants.StaggerLoc.CORNER_VFACE` in 3D.
+        """
+
+        if staggerloc is None:
+            if self.rank == 3:
+                staggerloc = StaggerLoc.CORNER_VFACE
+            else:
+                staggerloc = StaggerLoc.CORNER
+
+        if len(bounds) != self.rank:
+            raise ValueError("bounds must hold one array for each of the {} "
+                             "dimensions of the Grid".format(self.rank))
+
+        if not self.staggerloc[staggerloc]:
+            self.add_coords(staggerloc=staggerloc)
+
+        for localde in range(self.local_decount):
+            lb, ub = self.get_bounds(staggerloc=staggerloc, localde=localde)
+            coords_1d = self._coords_1d_de[localde][staggerloc]
+            for coord_dim in range(self.rank):
+                corners = _cf_bounds_to_corners_(bounds[coord_dim],
+                                                 self.max_index[coord_dim],
+                                                 lb[coord_dim], ub[coord_dim])
+                # broadcast along the other dimensions of the Grid
+                if coords_1d is not None:
+                    coords_1d[coord_dim][...] = corners
+                else:
+                    shape = [1] * self.rank
+                    shape[coord_dim] = corners.size
+                    self.get_coords(coord_dim, staggerloc=staggerloc,
+                                    localde=localde)[...] = \
+                        corners.reshape(shape)
+
     def set_item(self, item, staggerloc, item_data):
         raise MethodNotImplemented
         # check sizes
@@ -1022,39 +1283,38 @@ class Grid(object):
 
     ################ Helper functions ##########################################
 
+    def _check_localde_(self, localde):
+        if not 0 <= localde < max(self.local_decount, 1):
+            raise ValueError("localde must be in the range [0, {}) of the DEs "
+                             "on this PET".format(self.local_decount))
+
     def _verify_grid_bounds_(self, stagger, localde):
-        if self.lower_bounds[stagger] is None:
+        lower_bounds = self._lower_bounds_de[localde]
+        upper_bounds = self._upper_bounds_de[localde]
+        size = self._size_de[localde]
+        if lower_bounds[stagger] is None:
             try:
                 lb, ub = ESMP_GridGetCoordBounds(self, staggerloc=stagger, localde=localde)
             except:
                 raise GridBoundsNotCreated
 
-            self._lower_bounds[stagger] = np.copy(lb)
-            self._upper_bounds[stagger] = np.copy(ub)
+            lower_bounds[stagger] = np.copy(lb)
+            upper_bounds[stagger] = np.copy(ub)
 
             # find the local size of this stagger
-            self._size[stagger] = np.array(self.upper_bounds[stagger] -
-                                       self.lower_bounds[stagger])
+            size[stagger] = np.array(upper_bounds[stagger] -
+                                     lower_bounds[stagger])
         else:
             lb, ub = ESMP_GridGetCoordBounds(self, staggerloc=stagger, localde=localde)
-            assert(self.lower_bounds[stagger].all() == lb.all())
-            assert(self.upper_bounds[stagger].all() == ub.all())
-            assert(self.size[stagger].all() == np.array(ub-lb).all())
+            assert(lower_bounds[stagger].all() == lb.all())
+            assert(upper_bounds[stagger].all() == ub.all())
+            assert(size[stagger].all() == np.array(ub-lb).all())
 
     def _allocate_coords_(self, stagger, localde=0, from_file=False):
         # this could be one of several entry points to the grid,
         # verify that bounds and other necessary data are available
         self._verify_grid_bounds_(stagger, localde)
 
-        # allocate space for the coordinates on the Python side
-        self._coords[stagger][0] = np.zeros(shape = (self.size[stagger]),
-                                            dtype = constants._ESMF2PythonType[self.type])
-        self._coords[stagger][1] = np.zeros(shape = (self.size[stagger]),
-                                            dtype = constants._ESMF2PythonType[self.type])
-        if self.rank == 3:
-            self._coords[stagger][2] = np.zeros(shape = (self.size[stagger]),
-                                                dtype = constants._ESMF2PythonType[self.type])
-
         # link the ESMF allocations to the Python grid properties
         # first if number of coordinate dimensions is equivalent to the grid rank
         if (self.ndims == self.rank) or (self.ndims == 0):
@@ -1069,10 +1329,41 @@ class Grid(object):
 
         # initialize to zeros, because ESMF doesn't handle that
         if not from_file:
-            self._coords[stagger][0][...] = 0
-            self._coords[stagger][1][...] = 0
-            if self.rank == 3:
-               self._coords[stagger][2][...] = 0
+            coords = self._coords_1d_de[localde][stagger] or \
+                     self._coords_de[localde][stagger]
+            for xyz in range(self.rank):
+                coords[xyz][...] = 0
+
+    def _allocate_empty_coords_(self, stagger):
+        # a PET without DEs holds empty coordinates, like the data of a Field
+        self._set_empty_bounds_(stagger)
+        dtype = constants._ESMF2PythonType[self.type]
+        if 0 < self.ndims < self.rank:
+            self._coords_1d_de[0][stagger] = [np.zeros(0, dtype=dtype)
+                                              for xyz in range(self.rank)]
+        for xyz in range(self.rank):
+            self._coords_de[0][stagger][xyz] = np.zeros([0] * self.rank,
+                                                        dtype=dtype)
+
+        if stagger in (StaggerLoc.CORNER, StaggerLoc.CORNER_VFACE):
+            self._has_corners = True
+
+    def _allocate_empty_items_(self, item, stagger):
+        # a PET without DEs holds empty items, like the data of a Field
+        self._set_empty_bounds_(stagger)
+        if item == GridItem.MASK:
+            self._mask_de[0][stagger] = np.zeros(
+                [0] * self.rank, dtype=constants._ESMF2PythonType[TypeKind.I4])
+        elif item == GridItem.AREA:
+            self._area_de[0][stagger] = np.zeros(
+                [0] * self.rank, dtype=constants._ESMF2PythonType[TypeKind.R8])
+        else:
+            raise GridItemNotSupported
+
+    def _set_empty_bounds_(self, stagger):
+        self._lower_bounds_de[0][stagger] = np.zeros(self.rank, dtype=np.int32)
+        self._upper_bounds_de[0][stagger] = np.zeros(self.rank, dtype=np.int32)
+        self._size_de[0][stagger] = np.zeros(self.rank, dtype=np.int32)
 
     def _allocate_items_(self, item, stagger, localde=0, from_file=False):
         # this could be one of several entry points to the grid,
@@ -1081,13 +1372,13 @@ class Grid(object):
 
         # if the item is a mask it is of type I4
         if item == GridItem.MASK:
-            self._mask[stagger] = np.zeros(
-                shape=(self.size[stagger]),
+            self._mask_de[localde][stagger] = np.zeros(
+                shape=(self._size_de[localde][stagger]),
                 dtype=constants._ESMF2PythonType[TypeKind.I4])
         # if the item is area then it is of type R8
         elif item == GridItem.AREA:
-            self._area[stagger] = np.zeros(
-                shape=(self.size[stagger]),
+            self._area_de[localde][stagger] = np.zeros(
+                shape=(self._size_de[localde][stagger]),
                 dtype=constants._ESMF2PythonType[TypeKind.R8])
         else:
             raise GridItemNotSupported
@@ -1098,9 +1389,9 @@ class Grid(object):
         # initialize to zeros, because ESMF doesn't handle that
         if not from_file:
             if item == GridItem.MASK:
-                self._mask[stagger][...] = 1
+                self._mask_de[localde][stagger][...] = 1
             elif item == GridItem.AREA:
-                self._area[stagger][...] = 0
+                self._area_de[localde][stagger][...] = 0
             else:
                 raise GridItemNotSupported
 
@@ -1109,10 +1400,10 @@ class Grid(object):
         data = ESMP_GridGetCoordPtr(self, coord_dim, staggerloc=stagger, localde=localde)
         lb, ub = ESMP_GridGetCoordBounds(self, staggerloc=stagger, localde=localde)
 
-        gridCoordP = ndarray_from_esmf(data, self.type, ub-lb)
+        gridCoordP = ndarray_from_esmf(data, self.type, ub-lb, owner=self._allocation)
 
         # alias the coordinates to a grid property
-        self._coords[stagger][coord_dim] = gridCoordP
+        self._coords_de[localde][stagger][coord_dim] = gridCoordP
 
         if stagger in (StaggerLoc.CORNER, StaggerLoc.CORNER_VFACE):
             self._has_corners = True
@@ -1121,21 +1412,22 @@ class Grid(object):
         # get the data pointer and bounds of the ESMF allocation
         lb, ub = ESMP_GridGetCoordBounds(self, staggerloc=stagger, localde=localde)
 
-        gc0 = ndarray_from_esmf(ESMP_GridGetCoordPtr(self, 0, staggerloc=stagger, localde=localde), self.type, ((ub - lb)[0],))
-        gc1 = ndarray_from_esmf(ESMP_GridGetCoordPtr(self, 1, staggerloc=stagger, localde=localde), self.type, ((ub - lb)[1],))
-        if self.rank == 3:
-            gc2 = ndarray_from_esmf(ESMP_GridGetCoordPtr(self, 2, staggerloc=stagger, localde=localde), self.type, ((ub - lb)[2],))
-            gc00, gc11, gc22 = np.meshgrid(gc0, gc1, gc2, indexing="ij")
-        elif self.rank == 2:
-            gc00, gc11 = np.meshgrid(gc0, gc1, indexing="ij")
-        else:
+        if self.rank not in (2, 3):
             raise ValueError("Grid rank must be 2 or 3")
 
-        # alias the coordinates to a grid property
-        self._coords[stagger][0] = gc00
-        self._coords[stagger][1] = gc11
-        if self.rank == 3:
-            self._coords[stagger][2] = gc22
+        shape = tuple(ub - lb)
+        coords_1d = [None for a in range(self.rank)]
+        self._coords_1d_de[localde][stagger] = coords_1d
+        for xyz in range(self.rank):
+            gc = ndarray_from_esmf(ESMP_GridGetCoordPtr(self, xyz, staggerloc=stagger, localde=localde),
+                                   self.type, (shape[xyz],), owner=self._allocation)
+            coords_1d[xyz] = gc
+
+            # alias the coordinates to a grid property as a read-only view
+            # broadcast along the other dimensions, without copies
+            view_shape = [1] * self.rank
+            view_shape[xyz] = shape[xyz]
+            self._coords_de[localde][stagger][xyz] = np.broadcast_to(gc.reshape(view_shape), shape)
 
         if stagger in (StaggerLoc.CORNER, StaggerLoc.CORNER_VFACE):
             self._has_corners = True
@@ -1158,9 +1450,9 @@ class Grid(object):
 
         # create Array of the appropriate type the appropriate type
         if item == GridItem.MASK:
-            self._mask[stagger] = ndarray_from_esmf(data, TypeKind.I4, ub-lb)
+            self._mask_de[localde][stagger] = ndarray_from_esmf(data, TypeKind.I4, ub-lb, owner=self._allocation)
         elif item == GridItem.AREA:
-            self._area[stagger] = ndarray_from_esmf(data, TypeKind.R8, ub-lb)
+            self._area_de[localde][stagger] = ndarray_from_esmf(data, TypeKind.R8, ub-lb, owner=self._allocation)
         else:
             raise GridItemNotSupported
 
@@ -1190,3 +1482,48 @@ class Grid(object):
             raise GridSingleStaggerloc
 
         ESMP_GridWrite(self, filename, staggerloc=staggerloc)
+
+
+def _cf_bounds_to_corners_(bounds, n, lb, ub):
+    """Return the corner coordinates lb to ub of a dimension with n cells
+    from its CF bounds of shape (n, 2).  Corner i is the lower bound of cell
+    i, the last corner of a non-periodic dimension is the upper bound of the
+    last cell."""
+
+    bounds = np.asarray(bounds)
+    if bounds.shape != (n, 2):
+        raise ValueError("CF bounds must have shape ({}, 2), not {}".format(
+            n, bounds.shape))
+
+    edges = np.empty(n + 1, dtype=bounds.dtype)
+    edges[:n] = bounds[:, 0]
+    edges[n] = bounds[n - 1, 1]
+
+    return edges[lb:ub]
+
+
+def _cf_vertices_to_corners_(bounds, lb, ub):
+    """Return the corner coordinates between lb and ub of a 2D Grid from the
+    CF cell vertices of shape (nlat, nlon, 4), counterclockwise from the
+    lower left.  Corner (i, j) is vertex 0 of cell (i, j), the corners past
+    the last cell along a dimension are taken from vertices 1 to 3 of the
+    cells at the upper edges."""
+
+    bounds = np.asarray(bounds)
+    if bounds.ndim != 3 or bounds.shape[2] != 4:
+        raise ValueError("CF vertices must have shape (nlat, nlon, 4), not "
+                         "{}".format(bounds.shape))
+    # in the (lon, lat) index order of the Grid
+    bounds = bounds.transpose(1, 0, 2)
+    nx, ny = bounds.shape[:2]
+
+    ii = np.arange(lb[0], ub[0])
+    jj = np.arange(lb[1], ub[1])
+    upper_i = (ii >= nx).astype(np.intp).reshape(-1, 1)
+    upper_j = (jj >= ny).astype(np.intp).reshape(1, -1)
+    # (lower, lower) -> 0, (upper, lower) -> 1, (upper, upper) -> 2,
+    # (lower, upper) -> 3
+    vertex = upper_i + 3 * upper_j - 2 * upper_i * upper_j
+
+    return bounds[np.minimum(ii, nx - 1).reshape(-1, 1),
+                  np.minimum(jj, ny - 1).reshape(1, -1), vertex]
@@ -7,8 +7,9 @@ The LocStream API
 #### IMPORT LIBRARIES #########################################################
 
 from ESMF.api.esmpymanager import *
-from ESMF.util.esmpyarray import ndarray_from_esmf
+from ESMF.util.esmpyarray import ESMFAllocation, ndarray_from_esmf
 import ESMF.api.constants as constants
+import ESMF.util.fingerprint as fingerprint
 from ESMF.util.slicing import get_formatted_slice
 
 
@@ -90,18 +91,22 @@ class LocStream(dict):
         self._size = location_count
 
         # call the ESMP layer
+        self._allocation = None
         if esmf:
             self._struct = ESMP_LocStreamCreateLocal(location_count,
                                                      coordSys=coord_sys)
 
+            # the ESMF allocation, released when neither the LocStream nor
+            # any of its keys is referenced, or by the Manager at exit
+            self._allocation = ESMFAllocation(self._struct,
+                                              ESMP_LocStreamDestroy)
+            Manager()._register_(self._allocation)
+
             # get bounds
             lbounds, ubounds = ESMP_LocStreamGetBounds(self.struct)
             self._lower_bounds = lbounds
             self._upper_bounds = ubounds
 
-        # regist with atexit
-        import atexit;
-        atexit.register(self.__del__)
         self._finalized = False
 
         # set the single stagger flag
@@ -109,9 +114,6 @@ class LocStream(dict):
 
         super(LocStream, self).__init__()
 
-    def __del__(self):
-        self.destroy()
-
     def __getitem__(self, slc):
         # initialize slc_ls
         slc_ls = slc
@@ -288,6 +290,7 @@ class LocStream(dict):
 
         return ret
 
+    @synchronized
     def destroy(self):
         """
         Release the memory associated with a
@@ -296,9 +299,20 @@ class LocStream(dict):
 
         if hasattr(self, '_finalized'):
             if not self._finalized:
-                ESMP_LocStreamDestroy(self)
+                if self._allocation is not None:
+                    self._allocation.destroy()
                 self._finalized = True
 
+    def fingerprint(self):
+        """
+        Compute a digest of the keys and their values on all PETs, see
+        :meth:`~ESMF.api.grid.Grid.fingerprint`.  This is a collective call.
+
+        :return: A hexadecimal string that is identical on all PETs.
+        """
+
+        return fingerprint.digest(self)
+
     def _add_(self, key_name, typekind=None):
         # allocate the key
         ESMP_LocStreamAddKeyAlloc(self.struct, key_name, keyTypeKind=typekind)
@@ -307,6 +321,6 @@ class LocStream(dict):
         key_ptr = ESMP_LocStreamGetKeyPtr(self.struct, key_name)
 
         # create a numpy array out of the pointer
-        keyvals = ndarray_from_esmf(key_ptr, typekind, (self.size,))
+        keyvals = ndarray_from_esmf(key_ptr, typekind, (self.size,), owner=self._allocation)
 
         return keyvals
\ No newline at end of file
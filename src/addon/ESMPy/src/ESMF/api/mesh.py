@@ -13,6 +13,8 @@ from ESMF.interface.cbindings import *
 from ESMF.util.decorators import initialize
 
 from ESMF.api.esmpymanager import *
+from ESMF.util.esmpyarray import ESMFAllocation
+import ESMF.util.fingerprint as fingerprint
 from ESMF.util.slicing import get_formatted_slice, get_none_or_slice, get_none_or_bound_list
 
 import warnings
@@ -172,20 +174,22 @@ class Mesh(object):
         self._mask = [None, None]
         self._area = [None, None]
 
+        # element and node information, only the connectivity is retrieved
+        # from ESMF for meshes created from file
+        self._element_count = None
+        self._element_ids = None
+        self._element_types = None
+        self._element_conn = None
+        self._element_mask = None
+        self._element_area = None
+        self._element_coords = None
+        self._nodes_per_elem = None
+        self._node_count = None
+        self._node_ids = None
+        self._node_coords = None
+        self._node_owners = None
+
         if not fromfile:
-            # initialize not fromfile variables
-            self._element_count = None
-            self._element_ids = None
-            self._element_types = None
-            self._element_conn = None
-            self._element_mask = None
-            self._element_area = None
-            self._element_coords = None
-            self._node_count = None
-            self._node_ids = None
-            self._node_coords = None
-            self._node_owners = None
-            
             # call into ctypes layer
             self._struct = ESMP_MeshCreate(parametricDim=parametric_dim,
                                           spatialDim=spatial_dim,
@@ -209,16 +213,16 @@ class Mesh(object):
             self._link_coords_()
             # NOTE: parametric_dim is set in the _link_coords_ call for meshes created from file
 
+        # the ESMF allocation, released when the Mesh is not referenced any
+        # more, or by the Manager at exit
+        self._allocation = ESMFAllocation(self._struct, ESMP_MeshDestroy)
+        Manager()._register_(self._allocation)
+
         # for arbitrary metadata
         self._meta = {}
 
-        # register with atexit
-        import atexit; atexit.register(self.__del__)
         self._finalized = False
 
-    def __del__(self):
-        self.destroy()
-
     def __getitem__(self, slc):
         if pet_count() > 1:
             raise SerialMethod
@@ -286,6 +290,15 @@ class Mesh(object):
 
     @property
     def element_conn(self):
+        """
+        :rtype: A numpy array of integers.
+        :return: The connectivity of the :class:`~ESMF.api.mesh.Mesh`
+            elements as 0-based indices of the local nodes, with
+            :attr:`~ESMF.api.mesh.Mesh.nodes_per_elem` entries per element.
+            For meshes created from file this is retrieved from ESMF, and
+            elements with more than four nodes are returned as the triangles
+            ESMF splits them into.
+        """
         return self._element_conn
 
     @property
@@ -335,6 +348,15 @@ class Mesh(object):
         """
         return self._meta
 
+    @property
+    def nodes_per_elem(self):
+        """
+        :rtype: A numpy array of integers.
+        :return: The number of nodes of each element of the
+            :class:`~ESMF.api.mesh.Mesh`.
+        """
+        return self._nodes_per_elem
+
     @property
     def node_coords(self):
         return self._node_coords
@@ -463,6 +485,13 @@ class Mesh(object):
             else:
                 self._element_coords = element_coords
 
+        # the element types of 2D elements are the number of nodes
+        if self.parametric_dim == 3:
+            self._nodes_per_elem = np.where(self._element_types == MeshElemType.TETRA,
+                                            4, 8).astype(np.int32)
+        else:
+            self._nodes_per_elem = self._element_types.copy()
+
         # call into ctypes layer
         ESMP_MeshAddElements(self, self.element_count, self.element_ids, 
                              self.element_types, self.element_conn, 
@@ -529,15 +558,27 @@ class Mesh(object):
 
         return ret
 
+    @synchronized
     def destroy(self):
         """
         Release the memory associated with a :class:`~ESMF.api.mesh.Mesh`.
         """
         if hasattr(self, '_finalized'):
             if not self._finalized:
-                ESMP_MeshDestroy(self)
+                self._allocation.destroy()
                 self._finalized = True
 
+    def fingerprint(self):
+        """
+        Compute a digest of the node and element arrays, masks, areas and
+        coordinate system of the :class:`~ESMF.api.mesh.Mesh`, see
+        :meth:`~ESMF.api.grid.Grid.fingerprint`.  This is a collective call.
+
+        :return: A hexadecimal string that is identical on all PETs.
+        """
+
+        return fingerprint.digest(self)
+
     def free_memory(self):
         """
         Free memory associated with the creation of a
@@ -590,32 +631,28 @@ class Mesh(object):
         if not self.parametric_dim:
             self._parametric_dim = num_dims
 
-        try:
-            pass
-            # TODO: removed connectivity because the hardcoded array allocation is
-            #       eating up too much memory on some systems, this method can be
-            #       added back in after mesh connectivity retrieval has been fixed the
-            #       C interface
-            # self._connectivity, self._nodes_per_elem = ESMP_MeshGetConnectivityPtr(self)
-        except:
-            warnings.warn("Mesh connectivity could not be read")
+        # the connectivity of meshes created in memory is known from add_elements
+        if self._element_conn is None:
+            try:
+                self._element_conn, self._nodes_per_elem = ESMP_MeshGetConnectivity(self)
+            except ValueError:
+                warnings.warn("Mesh connectivity could not be read")
 
         # initialize the coordinates structures
         # index order is [meshloc][coord_dim]
         self._coords = [[None for a in range(num_dims)] \
                         for b in range(2)]
 
-        # alias the coordinates to the mesh
-        self._coords[node][0] = np.array([coords_interleaved[2*i] for i in range(num_nodes)])
-        self._coords[node][1] = np.array([coords_interleaved[2*i+1] for i in range(num_nodes)])
-        if num_dims == 3:
-            self._coords[node][2] = np.array([coords_interleaved[2*i+2] for i in range(num_nodes)])
+        # alias the coordinates to the mesh, the buffers are interleaved as
+        # [x0, y0, (z0,) x1, y1, (z1,) ...] so each dimension is a strided view
+        coords_interleaved = coords_interleaved[:num_nodes*num_dims].reshape(num_nodes, num_dims)
+        for coord_dim in range(num_dims):
+            self._coords[node][coord_dim] = coords_interleaved[:, coord_dim]
 
         if elemcoords:
-            self._coords[element][0] = np.array([coords_elem[2 * i] for i in range(num_elems)])
-            self._coords[element][1] = np.array([coords_elem[2 * i + 1] for i in range(num_elems)])
-            if num_dims == 3:
-                self._coords[element][2] = np.array([coords_elem[2 * i + 2] for i in range(num_elems)])
+            coords_elem = coords_elem[:num_elems*num_dims].reshape(num_elems, num_dims)
+            for coord_dim in range(num_dims):
+                self._coords[element][coord_dim] = coords_elem[:, coord_dim]
 
     def _write_(self, filename):
         """
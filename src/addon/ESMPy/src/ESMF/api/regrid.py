@@ -5,6 +5,8 @@ The Regrid API
 """
 from ESMF.api import constants
 from ESMF.api.field import *
+import ESMF.util.fingerprint as fingerprint
+import ESMF.util.weight_file as weight_file
 
 
 class Regrid(object):
@@ -117,9 +119,16 @@ class Regrid(object):
         self._factor_list = None
         self._factor_index_list = None
         self._num_factors = None
-        # We need to reference the pointers for deallocation
-        self._ptr_fl = None
-        self._ptr_fil = None
+        # Handle of the ESMF factor allocation, shared with the factor arrays
+        self._factor_allocation = None
+        # Cached sparse matrix - only used by "apply_sparse"
+        self._sparse_matrix = None
+        # Cached compressed sparse row factors - only used with "csr=True"
+        self._csr = None
+        # Cached Fields with extra dimensions - only used by "apply_batch"
+        self._batch_fields = {}
+        # Futures of applications that may be pending - only used by "submit"
+        self._futures = []
 
         # Convert source and destination mask values to NumPy arrays if they
         # are present.
@@ -195,6 +204,12 @@ class Regrid(object):
             if factors:
                 self._handle_factors_(fil, fl, num_factors)
 
+        # the routehandle, released when the Regrid is not referenced any
+        # more, or by the Manager at exit
+        self._allocation = ESMFAllocation(self._routehandle,
+                                          _release_routehandle_)
+        Manager()._register_(self._allocation)
+
         if rh_filename is not None:
             ESMP_RouteHandleWrite(self._routehandle, rh_filename)
 
@@ -222,8 +237,8 @@ class Regrid(object):
         # for arbitrary metadata
         self._meta = {}
 
-        # regist with atexit
-        import atexit; atexit.register(self.__del__)
+        # destroyed by the Manager at exit, after pending applications
+        Manager()._register_(self)
         self._finalized = False
 
     def __call__(self, srcfield, dstfield, zero_region=None):
@@ -249,9 +264,6 @@ class Regrid(object):
                          self._routehandle, zeroregion=zero_region)
         return dstfield
 
-    def __del__(self):
-        self.destroy()
-
     def __repr__(self):
         string = ("Regrid:\n"
                   "    routehandle = %r\n"
@@ -384,6 +396,188 @@ class Regrid(object):
     def unmapped_action(self):
         return self._unmapped_action
 
+    def adjoint(self):
+        """
+        Return the adjoint of this :class:`~ESMF.api.regrid.Regrid`. The
+        weights are real, so this is the same operator as
+        :meth:`~ESMF.api.regrid.Regrid.transpose`.
+
+        :return: :class:`~ESMF.api.regrid.Regrid`
+        """
+
+        return self.transpose()
+
+    def apply_batch(self, src_data, dst_data=None, chunk_size=None,
+                    zero_region=None):
+        """
+        Regrid a stack of source arrays (e.g. levels and times) with one
+        weight application per chunk instead of one call per slice.
+
+        The leading dimensions of ``src_data`` must match the local gridded
+        shape of the source :class:`~ESMF.api.field.Field` and the trailing
+        dimensions are the extra dimensions of the stack, using the same
+        ordering as a :class:`~ESMF.api.field.Field` created with ``ndbounds``.
+        Each chunk is copied into a cached :class:`~ESMF.api.field.Field`
+        whose extra dimensions vary fastest in memory so the routehandle of
+        this :class:`~ESMF.api.regrid.Regrid` is applied to the whole chunk in
+        a single ``ESMF`` call. Chunks are taken along the last dimension of
+        ``src_data``.
+
+        .. note:: The :class:`~ESMF.api.regrid.Regrid` must have been created
+            with :class:`Fields <ESMF.api.field.Field>` without extra
+            dimensions.
+
+        *REQUIRED:*
+
+        :param ndarray src_data: the stack of source data to regrid.
+
+        *OPTIONAL:*
+
+        :param ndarray dst_data: an array with the local gridded shape of the
+            destination :class:`~ESMF.api.field.Field` followed by the extra
+            dimensions of ``src_data`` to hold the regridded stack. If
+            ``None``, a new array is allocated.
+        :param int chunk_size: the number of entries of the last dimension
+            of ``src_data`` to regrid in a single call. If ``None``, the whole
+            stack is regridded at once.
+        :param Region zero_region: specify which region of the field indices
+            will be zeroed out before adding the values resulting from the
+            interpolation.  If ``None``, defaults to
+            :attr:`~ESMF.api.constants.Region.TOTAL`.
+
+        :return: ndarray of regridded values
+        """
+
+        if self.srcfield.xd > 0 or self.dstfield.xd > 0:
+            raise ValueError("apply_batch requires a Regrid created with "
+                             "Fields without extra dimensions")
+
+        src_shape = _gridded_shape_(self.srcfield)
+        dst_shape = _gridded_shape_(self.dstfield)
+
+        src_data = np.asarray(src_data)
+        if src_data.shape[0:len(src_shape)] != src_shape:
+            raise ValueError("src_data shape {0} does not match the source "
+                             "Field shape {1}".format(src_data.shape, src_shape))
+        extra_shape = src_data.shape[len(src_shape):]
+        if len(extra_shape) == 0:
+            raise ValueError("src_data must have at least one extra dimension")
+
+        if dst_data is None:
+            dst_data = np.zeros(dst_shape + extra_shape, order='F',
+                                dtype=constants._ESMF2PythonType[self.dstfield.type])
+        elif dst_data.shape != dst_shape + extra_shape:
+            raise ValueError("dst_data shape {0} does not match the expected "
+                             "shape {1}".format(dst_data.shape, dst_shape + extra_shape))
+
+        # values outside of the regridded region are kept unless everything
+        # is zeroed, so the destination chunk has to be copied in as well
+        keep_dst = zero_region is not None and zero_region != Region.TOTAL
+
+        nstack = extra_shape[-1]
+        if chunk_size is None:
+            chunk_size = nstack
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be a positive integer")
+
+        for start in range(0, nstack, chunk_size):
+            stop = min(start + chunk_size, nstack)
+            srcbatch, dstbatch = self._get_batch_fields_(extra_shape[0:-1] + (stop - start,))
+
+            _gridded_first_view_(srcbatch)[...] = src_data[..., start:stop]
+            if keep_dst:
+                _gridded_first_view_(dstbatch)[...] = dst_data[..., start:stop]
+
+            # call into the ctypes layer
+            ESMP_FieldRegrid(srcbatch, dstbatch, self._routehandle,
+                             zeroregion=zero_region)
+
+            dst_data[..., start:stop] = _gridded_first_view_(dstbatch)
+
+        return dst_data
+
+    def apply_sparse(self, src_array, out=None):
+        """
+        Apply the regridding weights to a NumPy array without calling into
+        ``ESMF``. The weights are converted once to a SciPy CSR matrix which is
+        cached on the :class:`~ESMF.api.regrid.Regrid` object, so repeated
+        calls only pay for the sparse matrix multiplication. This is only
+        available if the ``Regrid`` object was initialized with ``factors=True``.
+
+        The leading dimensions of ``src_array`` must match the gridded shape of
+        the source :class:`~ESMF.api.field.Field`. Any trailing dimensions are
+        treated as extra (ungridded) dimensions and carried through to the
+        result, following the :class:`~ESMF.api.field.Field` dimension
+        ordering.
+
+        .. note:: This method requires SciPy and is only supported in serial.
+
+        *REQUIRED:*
+
+        :param ndarray src_array: the source data to regrid.
+
+        *OPTIONAL:*
+
+        :param ndarray out: an array with the gridded shape of the destination
+            :class:`~ESMF.api.field.Field` followed by the extra dimensions of
+            ``src_array`` to hold the result (e.g. ``dstfield.data``). If
+            ``None``, a new array is allocated.
+
+        :return: ndarray of regridded values
+        """
+
+        if pet_count() > 1:
+            raise SerialMethod
+
+        return _apply_sparse_matrix_(self._get_sparse_matrix_(), self.srcfield,
+                                     self.dstfield, src_array, out)
+
+    def compose(self, other):
+        """
+        Chain this :class:`~ESMF.api.regrid.Regrid` with another one into a
+        single operator. If this object regrids from ``A`` to ``B`` and
+        ``other`` regrids from ``B`` to ``C``, the returned
+        :class:`~ESMF.api.regrid.Regrid` regrids from ``A`` to ``C`` with the
+        product of the two weight matrices, so the intermediate
+        :class:`~ESMF.api.field.Field` is neither allocated nor regridded.
+        Both objects must have been initialized with ``factors=True``.
+
+        The composed object holds its factors in memory and supports
+        :meth:`~ESMF.api.regrid.Regrid.__call__`,
+        :meth:`~ESMF.api.regrid.Regrid.apply_batch`,
+        :meth:`~ESMF.api.regrid.Regrid.apply_sparse`,
+        :meth:`~ESMF.api.regrid.Regrid.get_factors` and
+        :meth:`~ESMF.api.regrid.Regrid.write_weights`. Regrid options such as
+        ``regrid_method`` are not carried over and are ``None``. This is a
+        collective call, in parallel the product is computed on PET 0, which
+        holds all factors of the composed object.
+
+        *REQUIRED:*
+
+        :param Regrid other: the :class:`~ESMF.api.regrid.Regrid` applied
+            after this one. Its source :class:`~ESMF.api.field.Field` must be
+            built on the same :class:`~ESMF.api.grid.Grid`,
+            :class:`~ESMF.api.mesh.Mesh` or :class:`~ESMF.api.locstream.LocStream`
+            and location as the destination of this one.
+
+        :return: :class:`~ESMF.api.regrid.Regrid`
+        """
+
+        if self._factor_list is None or other._factor_list is None:
+            raise ValueError("factors are not available, both Regrids must "
+                             "be created with factors=True")
+        if other.srcfield.grid is not self.dstfield.grid or \
+                other.srcfield.staggerloc != self.dstfield.staggerloc:
+            raise ValueError("the source Field of other must be on the "
+                             "destination location of this Regrid")
+
+        first = _gather_factors_(self._factor_list, self._factor_index_list)
+        second = _gather_factors_(other._factor_list, other._factor_index_list)
+        factors, factor_index_list = _compose_factors_(first, second)
+
+        return Regrid._from_factors_(self.srcfield, other.dstfield, factors,
+                                     factor_index_list)
+
     def copy(self):
         """
         Copy a :class:`~ESMF.api.regrid.Regrid` in an ESMF-safe manner.
@@ -406,22 +600,10 @@ class Regrid(object):
         # This detects if the object has made it through initialization
         # before the destroy method has been called
         if hasattr(self, '_finalized'):
+            # Let submitted applications finish with the routehandle
             if not self._finalized:
-                ESMP_FieldRegridRelease(self.routehandle)
-
-                # Also destroy factor allocations in Fortran
-                if self._ptr_fl is not None:
-                    numfac = ct.c_int(self._num_factors)
-                    self._factor_list = None
-                    self._factor_index_list = None
-                    self._num_factors = None
-                    ESMP_FieldRegridReleaseFactors(self._ptr_fl,
-                                                   self._ptr_fil,
-                                                   numfac)
-                    self._ptr_fl = None
-                    self._ptr_fil = None
-
-                self._finalized = True
+                _wait_futures_(self._futures)
+            self._release_()
 
     def get_factors(self, deep_copy=False):
         """
@@ -443,6 +625,11 @@ class Regrid(object):
         .. note:: If ``deep_copy=True``, array memory is C contiguous according
             to NumPy array flags (``<array>.flags``).
 
+        .. note:: Very large factor sets should be consumed with
+            :meth:`~ESMF.api.regrid.Regrid.iter_factors` or written with
+            :meth:`~ESMF.api.regrid.Regrid.to_file`, which do not copy the
+            whole set.
+
         .. warning:: Remember to call :meth:`~ESMF.api.regrid.destroy` to deallocate
             memory associated with a regrid operation. This will be called by
             the Python garbage collector. However, if numerous regridding operations
@@ -462,7 +649,42 @@ class Regrid(object):
             factor_index_list = factor_index_list.copy()
         return factor_list, factor_index_list
 
-    def get_weights_dict(self, deep_copy=False):
+    def iter_factors(self, chunk_size=1048576, deep_copy=False):
+        """
+        Iterate over the factors of this PET in chunks of at most
+        ``chunk_size`` factors, so a very large factor set can be processed
+        without copying all of it. The factors are only available if the
+        ``Regrid`` object was initialized with ``factors=True``.
+
+        >>> for factors, factors_index in regrid.iter_factors():
+        ...     process(factors, factors_index)
+
+        Each chunk is a tuple of arrays with the layout returned by
+        :meth:`~ESMF.api.regrid.get_factors`.
+
+        :param int chunk_size: the maximum number of factors in a chunk.
+        :param bool deep_copy: If ``True``, every chunk is a copy. If
+            ``False`` (the default), the chunks reference the underlying
+            ``ESMF`` memory and must not be used after
+            :meth:`~ESMF.api.regrid.destroy`.
+        :return: generator of tuples of NumPy array objects
+        """
+
+        if self._factor_list is None:
+            raise ValueError("factors are not available, the Regrid must "
+                             "be created with factors=True")
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be a positive integer")
+
+        for start in range(0, self._factor_list.size, chunk_size):
+            factor_list = self._factor_list[start:start + chunk_size]
+            factor_index_list = self._factor_index_list[start:start + chunk_size]
+            if deep_copy:
+                factor_list = factor_list.copy()
+                factor_index_list = factor_index_list.copy()
+            yield factor_list, factor_index_list
+
+    def get_weights_dict(self, deep_copy=False, csr=False):
         """
         Return a dictionary mapping that is more user-friendly for weight/factor
         retrieval. Please read the documentation for :meth:`~ESMF.api.regrid.get_factors`
@@ -476,19 +698,48 @@ class Regrid(object):
         ``col_src`` Source/col indices
         =========== =======================
 
+        With ``csr=True`` the factors are returned in compressed sparse row
+        order instead: sorted by destination index, and by source index
+        within a destination, with the row pointers replacing ``row_dst``.
+
+        =========== =========================================================
+        Key         Value
+        =========== =========================================================
+        ``weights`` Weight value array
+        ``indptr``  Row pointers, the factors of destination index ``i + 1``
+                    are ``indptr[i]`` to ``indptr[i + 1]``
+        ``col_src`` Source/col indices
+        =========== =========================================================
+
+        ``indptr`` has an entry for every destination index up to the
+        largest one of the factors of this PET, and for the whole destination
+        in serial. The sort is done once and cached on the
+        :class:`~ESMF.api.regrid.Regrid` object, the cached arrays are
+        read-only.
+
         .. note:: If ``deep_copy=True``, array memory is C contiguous according
             to NumPy array flags (``<array>.flags``).
 
         :param bool deep_copy: If ``True``, make deep copies of the returned
             arrays. If ``False`` (the default), the returned arrays will reference
-            the underlying ``ESMF`` memory.
+            the underlying ``ESMF`` memory, or the cached arrays with
+            ``csr=True``.
+        :param bool csr: If ``True``, return the factors in compressed sparse
+            row order. Defaults to ``False``.
         :return: dict
         """
 
+        if csr:
+            ret = dict(self._get_csr_())
+            if deep_copy:
+                ret = dict((key, value.copy()) for key, value in ret.items())
+            return ret
+
         fl, fil = self.get_factors()
 
-        col = fil[:, 0].flatten()  # Source indices
-        row = fil[:, 1].flatten()  # Destination indices
+        # views of the index columns, copied only if requested
+        col = fil[:, 0]  # Source indices
+        row = fil[:, 1]  # Destination indices
 
         if deep_copy:
             row = row.copy()
@@ -499,6 +750,194 @@ class Regrid(object):
 
         return ret
 
+    @synchronized
+    def submit(self, srcfield, dstfield, zero_region=None):
+        """
+        Schedule a regridding operation from srcfield to dstfield, see
+        :meth:`~ESMF.api.regrid.Regrid.__call__`, and return immediately. The
+        operation runs on a worker thread and the Python interpreter lock is
+        released while ``ESMF`` regrids, so the calling thread can e.g. read
+        the data of the next time step meanwhile. All submitted operations
+        run one at a time on the same worker thread, in the order in which
+        they were submitted.
+
+        >>> future = regrid.submit(srcfield, dstfield)
+        >>> data = read_next_time_step()
+        >>> dstfield = future.result()
+
+        .. warning:: ``srcfield`` and ``dstfield`` must not be changed, and
+            ``ESMPy`` must not be called from other threads, until the
+            operation is done. In parallel the submission order must be the
+            same on all PETs and the MPI library has to support calls from
+            more than one thread.
+
+        .. note:: This method requires the ``concurrent.futures`` module.
+
+        *REQUIRED:*
+
+        :param Field srcfield: the :class:`~ESMF.api.field.Field` of source data to regrid.
+        :param Field dstfield: the :class:`~ESMF.api.field.Field` to hold the regridded data.
+
+        *OPTIONAL:*
+
+        :param Region zero_region: specify which region of the field indices
+            will be zeroed out before adding the values resulting from the
+            interpolation.  If ``None``, defaults to
+            :attr:`~ESMF.api.constants.Region.TOTAL`.
+
+        :return: ``concurrent.futures.Future`` whose result is dstfield
+        """
+
+        future = _get_executor_().submit(self.__call__, srcfield, dstfield,
+                                         zero_region=zero_region)
+        self._futures = [f for f in self._futures if not f.done()] + [future]
+        return future
+
+    def to_file(self, filename, chunk_size=1048576):
+        """
+        Stream the factors to a netCDF weight file that can be read by
+        :class:`~ESMF.api.regrid.RegridFromFile` and ``ESMF``. Every PET
+        writes its own factors in chunks of at most ``chunk_size`` factors,
+        so the factors are neither gathered nor copied as a whole, unlike
+        :meth:`~ESMF.api.regrid.Regrid.write_weights`. The file holds the
+        ``n_a``, ``n_b`` and ``n_s`` dimensions and the ``S``, ``row`` and
+        ``col`` variables. This is only available if the ``Regrid`` object was
+        initialized with ``factors=True``. This is a collective call.
+
+        *REQUIRED:*
+
+        :param str filename: the path of the file to write.
+
+        *OPTIONAL:*
+
+        :param int chunk_size: the maximum number of factors converted and
+            written at once.
+        """
+
+        if self._factor_list is None:
+            raise ValueError("factors are not available, the Regrid must "
+                             "be created with factors=True")
+
+        mg = Manager()
+        offsets = _factor_offsets_(self._factor_list.size)
+        n_a, n_b = _file_sizes_(self.srcfield, self.dstfield,
+                                self._factor_index_list)
+
+        if mg.local_pet == 0:
+            weight_file.create_netcdf(filename, n_a, n_b, int(offsets[-1]))
+        mg.barrier()
+
+        # the PETs write their disjoint parts of the file one after another
+        chunks = ((factor_list, factor_index_list[:, 1], factor_index_list[:, 0])
+                  for factor_list, factor_index_list in
+                  self.iter_factors(chunk_size=chunk_size))
+        for pet in range(mg.pet_count):
+            if pet == mg.local_pet:
+                weight_file.write_netcdf_factors(filename, chunks,
+                                                 start=int(offsets[pet]))
+            mg.barrier()
+
+    def transpose(self):
+        """
+        Return the transposed operator of this :class:`~ESMF.api.regrid.Regrid`,
+        regridding from its destination :class:`~ESMF.api.field.Field` to its
+        source :class:`~ESMF.api.field.Field` with the same weights. This is
+        the adjoint needed by e.g. data assimilation and is not the same as a
+        new :class:`~ESMF.api.regrid.Regrid` created in the reverse
+        direction, which computes different weights. The transposed operator
+        is built from the factors of each PET without another regrid store.
+        This is only available if the ``Regrid`` object was initialized with
+        ``factors=True``.
+
+        >>> adjoint = regrid.transpose()
+        >>> adjoint(dstfield, srcfield)
+
+        The returned object holds its factors in memory and supports the same
+        methods as the result of :meth:`~ESMF.api.regrid.Regrid.compose`.
+        This is a collective call.
+
+        :return: :class:`~ESMF.api.regrid.Regrid`
+        """
+
+        if self._factor_list is None:
+            raise ValueError("factors are not available, the Regrid must "
+                             "be created with factors=True")
+
+        # swap the source/col and destination/row indices
+        factor_index_list = self._factor_index_list[:, ::-1]
+
+        ret = Regrid._from_factors_(self.dstfield, self.srcfield,
+                                    self._factor_list.copy(),
+                                    factor_index_list)
+        if self._sparse_matrix is not None:
+            ret._sparse_matrix = self._sparse_matrix.transpose().tocsr()
+
+        return ret
+
+    def write_weights(self, filename, weight_dtype=np.float64,
+                      chunk_size=1048576):
+        """
+        Write the factors to a compact weight file that can be read by
+        :class:`~ESMF.api.regrid.RegridFromFile`. The factors are stored as
+        sorted CSR rows with delta encoded source indices, and the file is
+        loaded with a single memory map or read. The header holds digests of
+        the source and destination geometry, see
+        :attr:`~ESMF.util.weight_file.CompactWeights.src_fingerprint`.
+        This is only available if the ``Regrid`` object was initialized with
+        ``factors=True``. This is a collective call, the file is written by
+        PET 0, which receives the factors of the other PETs in PET order in
+        chunks of at most ``chunk_size`` factors.
+
+        *REQUIRED:*
+
+        :param str filename: the path of the file to write.
+
+        *OPTIONAL:*
+
+        :param dtype weight_dtype: ``numpy.float64`` (the default) or
+            ``numpy.float32`` to store the weights in single precision.
+        :param int chunk_size: the maximum number of factors sent, sorted and
+            converted at once.
+        """
+
+        if self._factor_list is None:
+            raise ValueError("factors are not available, the Regrid must "
+                             "be created with factors=True")
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be a positive integer")
+
+        mg = Manager()
+        src_fingerprint = _field_digest_(self.srcfield)
+        dst_fingerprint = _field_digest_(self.dstfield)
+        n_a, n_b = _file_sizes_(self.srcfield, self.dstfield,
+                                self._factor_index_list)
+
+        # the number of factors of every destination row over all PETs
+        counts = np.bincount(self._factor_index_list[:, 1] - 1,
+                             minlength=n_b).astype(np.float64)
+        if mg.pet_count > 1:
+            total_counts = np.zeros(n_b, dtype=np.float64)
+            if n_b > 0:
+                mg._reduce_(counts, total_counts, n_b, reduceflag=Reduce.SUM)
+            counts = total_counts
+
+        chunks = ((factor_list, factor_index_list[:, 1], factor_index_list[:, 0])
+                  for factor_list, factor_index_list in
+                  _iter_gathered_factors_(self._factor_list,
+                                          self._factor_index_list,
+                                          chunk_size))
+        if mg.local_pet == 0:
+            weight_file.write_compact_chunks(filename, chunks, counts, n_a,
+                                             n_b, weight_dtype=weight_dtype,
+                                             src_fingerprint=src_fingerprint,
+                                             dst_fingerprint=dst_fingerprint,
+                                             chunk_size=chunk_size)
+        else:
+            # take part in sending the factors to PET 0
+            for _ in chunks:
+                pass
+        mg.barrier()
+
     def _handle_factors_(self, fil, fl, num_factors):
         """Handle factor array creation and referencing."""
 
@@ -507,21 +946,27 @@ class Regrid(object):
         # Only create arrays if we have any factors. There are no factors when
         # grids don't overlap and we are ignoring unmapped.
         if self._num_factors > 0:
-            # Pointer to factor list memory. We need to hold on to this for
-            # deallocation.
-            self._ptr_fl = fl
+            # The handle holds the pointers for deallocation. The buffers
+            # keep it alive while the arrays are referenced, so the factors
+            # are not released under them.
+            self._factor_allocation = ESMFAllocation(
+                (fl, fil, self._num_factors), _release_factors_)
+            Manager()._register_(self._factor_allocation)
             # Cast the pointer to the appropriate size.
             cptr_fl = ct.cast(fl, ct.POINTER(ct.c_double * self._num_factors))
-            self._factor_list = np.frombuffer(cptr_fl.contents,
+            buffer_fl = cptr_fl.contents
+            buffer_fl._owner = self._factor_allocation
+            self._factor_list = np.frombuffer(buffer_fl,
                                               count=self._num_factors,
                                               dtype=np.float64)
 
             # The factor index list is (m, 2) hence the multiplication
             # of the factor count by 2.
-            self._ptr_fil = fil  # Hold onto the pointer for deallocation
             cptr_fil = ct.cast(fil,
                                ct.POINTER(ct.c_int * self._num_factors * 2))
-            self._factor_index_list = np.frombuffer(cptr_fil.contents,
+            buffer_fil = cptr_fil.contents
+            buffer_fil._owner = self._factor_allocation
+            self._factor_index_list = np.frombuffer(buffer_fil,
                                                     count=self._num_factors * 2,
                                                     dtype=np.int32)
             self._factor_index_list = self._factor_index_list.reshape(
@@ -530,6 +975,449 @@ class Regrid(object):
             self._factor_list = np.zeros((0,), dtype=np.float64)
             self._factor_index_list = np.zeros((0, 2), dtype=np.int32)
 
+    @classmethod
+    @initialize
+    def _from_factors_(cls, srcfield, dstfield, factor_list, factor_index_list):
+        """Create a Regrid from factors held in NumPy arrays. The factors
+        may be distributed over the PETs in any way."""
+
+        routehandle = ESMP_FieldSMMStoreFactors(srcfield, dstfield,
+                                                factor_list, factor_index_list)
+        ret = cls._from_routehandle_(srcfield, dstfield, routehandle)
+
+        # NumPy owns the factors, there is no ESMF allocation to release
+        ret._factor_list = np.ascontiguousarray(factor_list, dtype=np.float64)
+        ret._factor_index_list = np.ascontiguousarray(factor_index_list,
+                                                      dtype=np.int32)
+        ret._num_factors = ret._factor_list.size
+
+        return ret
+
+    @classmethod
+    @initialize
+    def _from_routehandle_file_(cls, srcfield, dstfield, rh_filename,
+                                options=None):
+        """Create a Regrid from a routehandle file written with
+        ``rh_filename``. The factors are not available, as with
+        ``factors=False``. ``options`` are the keyword arguments the
+        routehandle was created with."""
+
+        routehandle = ESMP_RouteHandleCreateFromFile(rh_filename)
+        return cls._from_routehandle_(srcfield, dstfield, routehandle,
+                                      options)
+
+    @classmethod
+    def _from_routehandle_(cls, srcfield, dstfield, routehandle,
+                           options=None):
+        """Create a Regrid holding an existing routehandle, without
+        factors."""
+
+        options = dict(options or {})
+        for name in ['src_mask_values', 'dst_mask_values']:
+            if options.get(name) is not None:
+                options[name] = np.array(options[name], dtype=np.int32)
+
+        ret = cls.__new__(cls)
+        ret._routehandle = routehandle
+        ret._factor_list = None
+        ret._factor_index_list = None
+        ret._num_factors = None
+        ret._factor_allocation = None
+        ret._allocation = ESMFAllocation(ret._routehandle,
+                                         _release_routehandle_)
+        Manager()._register_(ret._allocation)
+        ret._sparse_matrix = None
+        ret._csr = None
+        ret._batch_fields = {}
+        ret._futures = []
+
+        ret._srcfield = srcfield
+        ret._dstfield = dstfield
+        for name in ['src_mask_values', 'dst_mask_values', 'regrid_method',
+                     'pole_method', 'regrid_pole_npoints', 'norm_type',
+                     'extrap_method', 'extrap_num_src_pnts',
+                     'extrap_dist_exponent', 'unmapped_action',
+                     'ignore_degenerate', 'Print', 'src_file', 'dst_file',
+                     'src_file_type', 'dst_file_type', 'src_frac_field',
+                     'dst_frac_field']:
+            setattr(ret, '_' + name, options.get(name))
+        ret._meta = {}
+
+        # destroyed by the Manager at exit, after pending applications
+        Manager()._register_(ret)
+        ret._finalized = False
+
+        return ret
+
+    @synchronized
+    def _get_batch_fields_(self, ndbounds):
+        """Create or return the cached source and destination Fields with
+        extra dimensions ``ndbounds`` used by batched regridding."""
+
+        ndbounds = tuple(int(n) for n in ndbounds)
+        if ndbounds not in self._batch_fields:
+            self._batch_fields[ndbounds] = (_create_batch_field_(self.srcfield, ndbounds),
+                                            _create_batch_field_(self.dstfield, ndbounds))
+
+        return self._batch_fields[ndbounds]
+
+    @synchronized
+    def _get_csr_(self):
+        """Create or return the cached factors in compressed sparse row
+        order."""
+
+        if self._csr is None:
+            if self._factor_list is None:
+                raise ValueError("factors are not available, the Regrid must "
+                                 "be created with factors=True")
+
+            cols = self._factor_index_list[:, 0]
+            rows = self._factor_index_list[:, 1]
+            n_rows = int(rows.max()) if rows.size > 0 else 0
+            if pet_count() == 1:
+                n_rows = max(n_rows, int(np.prod(_gridded_shape_(self.dstfield))))
+
+            # a single sort of the combined destination and source index
+            n_cols = int(cols.max()) + 1 if cols.size > 0 else 1
+            order = np.argsort(rows.astype(np.int64) * n_cols + cols)
+
+            indptr = np.zeros(n_rows + 1, dtype=np.int64)
+            np.cumsum(np.bincount(rows, minlength=n_rows + 1)[1:], out=indptr[1:])
+
+            self._csr = {'indptr': indptr,
+                         'col_src': cols[order],
+                         'weights': self._factor_list[order]}
+            for value in self._csr.values():
+                value.flags.writeable = False
+
+        return self._csr
+
+    @synchronized
+    def _get_sparse_matrix_(self):
+        """Create or return the cached CSR matrix holding the factors."""
+
+        if self._sparse_matrix is None:
+            try:
+                from scipy.sparse import csr_matrix
+            except ImportError:
+                raise ImportError("Regrid.apply_sparse() requires SciPy")
+
+            if self._factor_list is None:
+                raise ValueError("factors are not available, the Regrid must "
+                                 "be created with factors=True")
+
+            wd = self.get_weights_dict(csr=True)
+            shape = (int(np.prod(_gridded_shape_(self.dstfield))),
+                     int(np.prod(_gridded_shape_(self.srcfield))))
+
+            # sequence indices of Meshes are ids, which may exceed the number
+            # of locations, and cannot be taken as positions in the data
+            n_rows = wd['indptr'].size - 1
+            n_cols = int(wd['col_src'].max()) if wd['col_src'].size > 0 else 0
+            if n_rows > shape[0] or n_cols > shape[1]:
+                raise ValueError("the factor indices exceed the size of the "
+                                 "source ({0}) or destination ({1}) Field, the "
+                                 "sequence indices are not the positions of "
+                                 "the data, e.g. Mesh ids that are not "
+                                 "numbered from 1".format(shape[1], shape[0]))
+
+            # ESMF sequence indices are one-based
+            self._sparse_matrix = csr_matrix(
+                (wd['weights'], wd['col_src'] - 1, wd['indptr']),
+                shape=shape)
+
+        return self._sparse_matrix
+
+    @synchronized
+    def _release_(self):
+        """Release the ESMF allocations of a Regrid that is not finalized."""
+
+        if not self._finalized:
+            self._futures = []
+
+            self._allocation.destroy()
+
+            # Destroy the Fields used for batched regridding
+            for batch_fields in self._batch_fields.values():
+                for batch_field in batch_fields:
+                    batch_field.destroy()
+            self._batch_fields = {}
+
+            # Also destroy factor allocations in Fortran
+            if self._factor_allocation is not None:
+                self._factor_list = None
+                self._factor_index_list = None
+                self._num_factors = None
+                self._sparse_matrix = None
+                self._csr = None
+                self._factor_allocation.destroy()
+                self._factor_allocation = None
+
+            self._finalized = True
+
+
+def _release_routehandle_(allocation):
+    """Release the routehandle held by an ESMFAllocation."""
+
+    ESMP_FieldRegridRelease(allocation.struct)
+
+
+def _release_factors_(allocation):
+    """Release the factor arrays allocated by ESMF, held by an
+    ESMFAllocation as a tuple of the two pointers and the factor count."""
+
+    fl, fil, num_factors = allocation.struct
+    ESMP_FieldRegridReleaseFactors(fl, fil, ct.c_int(num_factors))
+
+
+# The worker thread running the submitted regridding operations, a single
+# thread keeps the calls into ESMF serialized and in submission order
+_executor = None
+
+
+@synchronized
+def _get_executor_():
+    """Create or return the executor used by ``Regrid.submit``."""
+
+    global _executor
+    if _executor is None:
+        try:
+            from concurrent.futures import ThreadPoolExecutor
+        except ImportError:
+            raise ImportError("Regrid.submit() requires the concurrent.futures module")
+        _executor = ThreadPoolExecutor(max_workers=1)
+
+    return _executor
+
+
+def _wait_futures_(futures):
+    """Wait until all futures are done, ignoring their results."""
+
+    if futures:
+        from concurrent.futures import wait
+        wait(futures)
+
+
+def _apply_sparse_matrix_(matrix, srcfield, dstfield, src_array, out):
+    """Multiply ``src_array``, shaped like the gridded dimensions of
+    ``srcfield`` followed by any extra dimensions, with a sparse matrix of
+    factors between ``srcfield`` and ``dstfield``."""
+
+    src_shape = _gridded_shape_(srcfield)
+    dst_shape = _gridded_shape_(dstfield)
+
+    src_array = np.asarray(src_array)
+    if src_array.shape[0:len(src_shape)] != src_shape:
+        raise ValueError("src_array shape {0} does not match the source "
+                         "Field shape {1}".format(src_array.shape, src_shape))
+    extra_shape = src_array.shape[len(src_shape):]
+
+    # ESMF sequence indices run over the gridded dimensions in Fortran
+    # order, extra dimensions become columns of the dense operand.
+    src_flat = src_array.reshape((matrix.shape[1], -1), order='F')
+    dst_flat = matrix.dot(src_flat)
+    result = dst_flat.reshape(dst_shape + extra_shape, order='F')
+
+    if out is None:
+        out = result
+    else:
+        out[...] = result
+
+    return out
+
+
+def _compose_factors_(first, second):
+    """Return the factors of the product of two weight matrices, ``second``
+    applied after ``first``, each given as a tuple of a factor list and a
+    factor index list. Duplicate entries of the product are summed."""
+
+    fl1, fil1 = first
+    fl2, fil2 = second
+    cols1 = fil1[:, 0]
+    rows1 = fil1[:, 1]
+    cols2 = fil2[:, 0]
+    rows2 = fil2[:, 1]
+
+    # the factors of the first matrix sorted by their row, the rows matching
+    # the column of every factor of the second matrix are then a range
+    order = np.argsort(rows1, kind='mergesort')
+    rows1 = rows1[order]
+    start = np.searchsorted(rows1, cols2, side='left')
+    counts = np.searchsorted(rows1, cols2, side='right') - start
+
+    # expand every factor of the second matrix over its range with cumulative
+    # offsets instead of a loop
+    total = int(counts.sum())
+    select2 = np.repeat(np.arange(fl2.size), counts)
+    offsets = np.repeat(np.cumsum(counts) - counts, counts)
+    select1 = order[np.repeat(start, counts) + np.arange(total) - offsets]
+
+    rows = rows2[select2].astype(np.int64)
+    cols = cols1[select1].astype(np.int64)
+    products = fl2[select2] * fl1[select1]
+
+    # sum the products with the same row and column
+    order = np.lexsort((cols, rows))
+    rows = rows[order]
+    cols = cols[order]
+    products = products[order]
+    first_entry = np.ones(total, dtype=bool)
+    first_entry[1:] = (rows[1:] != rows[:-1]) | (cols[1:] != cols[:-1])
+    starts = np.flatnonzero(first_entry)
+
+    factor_list = np.add.reduceat(products, starts) if total > 0 else products
+    factor_index_list = np.column_stack([cols[starts], rows[starts]]).astype(np.int32)
+
+    return factor_list, factor_index_list
+
+
+def _field_digest_(field):
+    """Return the digest of the geometry and location of a Field, identical
+    on all PETs.  This is a collective call."""
+
+    hasher = fingerprint.new_hasher()
+    fingerprint.update_value(hasher, (field.staggerloc, field.rank - field.xd))
+    fingerprint.update_geometry(hasher, field.grid)
+    return fingerprint.reduce_digest(hasher)
+
+
+def _gather_factors_(factor_list, factor_index_list, chunk_size=1048576):
+    """Collect the factors of all PETs on PET 0, in PET order.  Other PETs
+    return empty arrays.  This is a collective call."""
+
+    mg = Manager()
+    if mg.pet_count == 1:
+        return factor_list, factor_index_list
+
+    total = int(_factor_offsets_(factor_list.size)[-1])
+    if mg.local_pet != 0:
+        total = 0
+    factors = np.zeros(total, dtype=np.float64)
+    factor_indices = np.zeros((total, 2), dtype=np.int32)
+
+    start = 0
+    for chunk_factors, chunk_indices in \
+            _iter_gathered_factors_(factor_list, factor_index_list, chunk_size):
+        factors[start:start + chunk_factors.size] = chunk_factors
+        factor_indices[start:start + chunk_factors.size] = chunk_indices
+        start += chunk_factors.size
+
+    return factors, factor_indices
+
+
+def _iter_gathered_factors_(factor_list, factor_index_list, chunk_size):
+    """Iterate on PET 0 over the factors of all PETs in PET order, in chunks
+    of at most ``chunk_size`` factors.  Every PET sends its factors in turn,
+    so only a chunk is held at once.  Other PETs yield nothing but have to
+    exhaust the generator.  This is a collective call."""
+
+    mg = Manager()
+    offsets = _factor_offsets_(factor_list.size)
+
+    for pet in range(mg.pet_count):
+        num_factors = int(offsets[pet + 1] - offsets[pet])
+        for start in range(0, num_factors, chunk_size):
+            stop = min(start + chunk_size, num_factors)
+            if pet == 0:
+                # the factors of PET 0 are already in place
+                if mg.local_pet == 0:
+                    yield (factor_list[start:stop],
+                           factor_index_list[start:stop])
+                continue
+
+            # indices are exact in double precision
+            buf = np.zeros((3, stop - start), dtype=np.float64)
+            if pet == mg.local_pet:
+                buf[0] = factor_list[start:stop]
+                buf[1:] = factor_index_list[start:stop].T
+            mg._broadcast_(buf.ravel(), buf.size, rootPet=pet)
+            if mg.local_pet == 0:
+                yield buf[0], buf[1:].T.astype(np.int32)
+
+
+def _file_sizes_(srcfield, dstfield, factor_index_list):
+    """Return the source and destination sizes of a weight file holding the
+    factors of all PETs.  This is a collective call."""
+
+    n_a = _global_size_(srcfield)
+    n_b = _global_size_(dstfield)
+    # sequence indices of Meshes are ids which may exceed the size
+    if factor_index_list.shape[0] > 0:
+        n_a = max(n_a, int(factor_index_list[:, 0].max()))
+        n_b = max(n_b, int(factor_index_list[:, 1].max()))
+    return _global_max_(n_a), _global_max_(n_b)
+
+
+def _factor_offsets_(num_factors):
+    """Return the position of the first factor of every PET when the factors
+    are concatenated in PET order, followed by the total number of factors.
+    This is a collective call."""
+
+    mg = Manager()
+    counts = np.zeros(mg.pet_count, dtype=np.float64)
+    counts[mg.local_pet] = num_factors
+    total_counts = np.zeros(mg.pet_count, dtype=np.float64)
+    mg._reduce_(counts, total_counts, mg.pet_count, reduceflag=Reduce.SUM)
+    mg._broadcast_(total_counts, mg.pet_count)
+    return np.concatenate([[0], np.cumsum(total_counts)]).astype(np.int64)
+
+
+def _global_max_(value):
+    """Return the maximum of an integer over all PETs."""
+
+    mg = Manager()
+    send_buf = np.array([value], dtype=np.float64)
+    recv_buf = np.zeros(1, dtype=np.float64)
+    mg._reduce_(send_buf, recv_buf, 1, reduceflag=Reduce.MAX)
+    mg._broadcast_(recv_buf, 1)
+    return int(recv_buf[0])
+
+
+def _global_size_(field):
+    """Return the number of gridded locations of a Field over all PETs."""
+
+    mg = Manager()
+    gridded = field.rank - field.xd
+    local_size = sum(np.prod(field.get_data(localde).shape[0:gridded])
+                     for localde in range(max(field.local_decount, 1)))
+    send_buf = np.array([local_size], dtype=np.float64)
+    recv_buf = np.zeros(1, dtype=np.float64)
+    mg._reduce_(send_buf, recv_buf, 1, reduceflag=Reduce.SUM)
+    mg._broadcast_(recv_buf, 1)
+    return int(recv_buf[0])
+
+
+def _gridded_shape_(field):
+    """Return the local shape of the gridded dimensions of a Field, which must
+    have at most one DE on this PET."""
+
+    if field.local_decount > 1:
+        raise ValueError("the factors can only be applied in Python to Fields "
+                         "with at most one DE on each PET")
+
+    return tuple(field.data.shape[0:field.rank - field.xd])
+
+
+def _create_batch_field_(field, ndbounds):
+    """Create a Field on the same location as ``field`` with extra dimensions
+    ``ndbounds`` placed before the gridded dimensions."""
+
+    if isinstance(field.grid, Mesh):
+        location = dict(meshloc=field.staggerloc)
+    else:
+        location = dict(staggerloc=field.staggerloc)
+
+    return Field(field.grid, name=field.name, typekind=field.type,
+                 ndbounds=list(ndbounds), ungridded_first=True, **location)
+
+
+def _gridded_first_view_(field):
+    """Return a view of the data of a Field created with ``ungridded_first``
+    with the gridded dimensions moved to the front."""
+
+    xd = field.xd
+    return np.moveaxis(field.data, list(range(xd)), list(range(-xd, 0)))
+
 
 class RegridFromFile(object):
     """
@@ -559,30 +1447,54 @@ class RegridFromFile(object):
         or :class:`~ESMF.api.locstream.LocStream`.  The data in this :class:`~ESMF.api.field.Field`
         may be overwritten by this call.
     :param string filename: the name of the file from which to retrieve the
-        weights.
+        weights, either a netCDF weight file or a compact weight file written
+        by :meth:`~ESMF.api.regrid.Regrid.write_weights`. Compact weight files
+        are always memory-mapped, each PET reads only the factors of its
+        share of the destination rows.
     :param string rh_filename: the name of the file from which to retrieve the
         routehandle information.
+    :param bool mmap: if ``True``, the weight file given by ``filename`` must
+        be an uncompressed netCDF classic (CDF-1, CDF-2 or CDF-5) file. It is
+        memory-mapped and each PET reads only its own contiguous share of the
+        factors, instead of every PET reading the whole file. Defaults to
+        ``False``.
     """
 
     @initialize
-    def __init__(self, srcfield, dstfield, filename=None, rh_filename=None):
+    def __init__(self, srcfield, dstfield, filename=None, rh_filename=None,
+                 mmap=False):
 
         if (filename is not None) and (rh_filename is not None):
             raise ValueError('only a regrid file or a routehandle file can be specified')
         elif (filename is None) and (rh_filename is None):
             raise ValueError('either a regrid file or a routehandle file must be specified')
-
-        if filename is not None:
+        if mmap and filename is None:
+            raise ValueError('mmap requires a regrid file')
+
+        if filename is not None and (mmap or weight_file.is_compact(filename)):
+            with weight_file.open_weights(filename) as weights:
+                factors, rows, cols = weights.read_local(local_pet(), pet_count())
+            self._routehandle = ESMP_FieldSMMStoreFactors(
+                srcfield, dstfield, factors, np.column_stack([cols, rows]))
+        elif filename is not None:
             self._routehandle = ESMP_FieldSMMStore(srcfield, dstfield, filename)
         elif rh_filename is not None:
             self._routehandle = ESMP_RouteHandleCreateFromFile(rh_filename)
 
+        # the routehandle, released when the RegridFromFile is not referenced
+        # any more, or by the Manager at exit
+        self._allocation = ESMFAllocation(self._routehandle,
+                                          _release_routehandle_)
+        Manager()._register_(self._allocation)
+
+        self._srcfield = srcfield
+        self._dstfield = dstfield
+        self._filename = filename
+        self._sparse_matrix = None
+
         # Holds arbitrary metadata if needed by the client.
         self._meta = {}
 
-        # Register with "atexit" to attempt and ensure __del__ is called by
-        # the Python garbage collector.
-        import atexit; atexit.register(self.__del__)
         self._finalized = False
 
     def __call__(self, srcfield, dstfield, zero_region=None):
@@ -609,9 +1521,6 @@ class RegridFromFile(object):
                          self._routehandle, zeroregion=zero_region)
         return dstfield
 
-    def __del__(self):
-        self.destroy()
-
     def __repr__(self):
         string = "RegridFromFile:\n    routehandle = {}\n".format(self._routehandle)
         return string
@@ -620,6 +1529,16 @@ class RegridFromFile(object):
     def dstfield(self):
         return self._dstfield
 
+    @property
+    def filename(self):
+        """
+        :rtype: str
+        :return: The weight file this :class:`~ESMF.api.regrid.RegridFromFile`
+            was created from, ``None`` if it was created from a routehandle file.
+        """
+
+        return self._filename
+
     @property
     def finalized(self):
         """
@@ -643,6 +1562,10 @@ class RegridFromFile(object):
     def routehandle(self):
         return self._routehandle
 
+    @property
+    def srcfield(self):
+        return self._srcfield
+
     @property
     def struct(self):
         """
@@ -653,6 +1576,45 @@ class RegridFromFile(object):
 
         return self.struct
 
+    def apply_sparse(self, src_array, out=None):
+        """
+        Apply the weights of the weight file to a NumPy array without calling
+        into ``ESMF``, see :meth:`~ESMF.api.regrid.Regrid.apply_sparse`. The
+        weight file is memory-mapped and converted once to a SciPy CSR matrix
+        which is cached on this object. This is only available if the
+        :class:`~ESMF.api.regrid.RegridFromFile` was created from an
+        uncompressed netCDF classic or compact weight file given by
+        ``filename``.
+
+        .. note:: This method requires SciPy and is only supported in serial.
+
+        *REQUIRED:*
+
+        :param ndarray src_array: the source data to regrid.
+
+        *OPTIONAL:*
+
+        :param ndarray out: an array with the gridded shape of the destination
+            :class:`~ESMF.api.field.Field` followed by the extra dimensions of
+            ``src_array`` to hold the result. If ``None``, a new array is
+            allocated.
+
+        :return: ndarray of regridded values
+        """
+
+        if pet_count() > 1:
+            raise SerialMethod
+
+        if self._sparse_matrix is None:
+            if self._filename is None:
+                raise ValueError("apply_sparse requires a RegridFromFile "
+                                 "created from a weight file")
+            with weight_file.open_weights(self._filename) as weights:
+                self._sparse_matrix = weights.sparse_matrix()
+
+        return _apply_sparse_matrix_(self._sparse_matrix, self.srcfield,
+                                     self.dstfield, src_array, out)
+
     def copy(self):
         """
         Copy a :class:`~ESMF.api.regrid.Regrid` in an ESMF-safe manner.
@@ -667,6 +1629,7 @@ class RegridFromFile(object):
 
         return ret
 
+    @synchronized
     def destroy(self):
         """
         Release the memory associated with the :class:`~ESMF.api.regrid.RegridFromFile`
@@ -675,5 +1638,5 @@ class RegridFromFile(object):
 
         if hasattr(self, '_finalized'):
             if not self._finalized:
-                ESMP_FieldRegridRelease(self.routehandle)
+                self._allocation.destroy()
                 self._finalized = True
@@ -0,0 +1,506 @@
+# $Id$
+
+"""
+The Regrid cache API
+"""
+
+import os
+from collections import OrderedDict
+
+from ESMF.api import constants
+from ESMF.api.regrid import *
+import ESMF.util.fingerprint as fingerprint
+from ESMF.util.helpers import broadcast_val, reduce_val
+
+
+# Regrid arguments that affect the weights, in the order they are hashed
+_REGRID_OPTIONS = ('src_mask_values', 'dst_mask_values', 'regrid_method',
+                   'pole_method', 'regrid_pole_npoints', 'line_type',
+                   'norm_type', 'extrap_method', 'extrap_num_src_pnts',
+                   'extrap_dist_exponent', 'unmapped_action',
+                   'ignore_degenerate')
+
+
+class RegridFileCache(object):
+    """
+    The :class:`~ESMF.api.regridcache.RegridFileCache` is an opt-in, on-disk
+    cache of regridding operators.  Each operator is identified by a key
+    computed from the geometry of the source and destination
+    :class:`Fields <ESMF.api.field.Field>` (coordinates, masks, areas and
+    stagger location), the regridding options (method, pole, line, norm,
+    extrapolation, unmapped action and mask values), the number of PETs and
+    the ESMF version.  On a cache miss a new :class:`~ESMF.api.regrid.Regrid`
+    is created and its RouteHandle is written to the cache directory, on a
+    hit the stored RouteHandle is read back into a
+    :class:`~ESMF.api.regrid.Regrid`.  Both behave like a
+    :class:`~ESMF.api.regrid.Regrid` created with ``factors=False``.
+
+    Computing the key requires hashing the local coordinates and is a
+    collective call, as are all calls that create a regridding operator.
+
+    *REQUIRED:*
+
+    :param string directory: path to the directory holding the cached
+        RouteHandle files.  It is created if it does not exist.
+    """
+
+    _SUFFIX = '.rh'
+
+    @initialize
+    def __init__(self, directory):
+        self._directory = os.path.abspath(directory)
+        if local_pet() == 0 and not os.path.isdir(self._directory):
+            os.makedirs(self._directory)
+        Manager().barrier()
+
+        # Hit and miss counters for this process
+        self._hits = 0
+        self._misses = 0
+
+    def __call__(self, srcfield, dstfield, src_mask_values=None,
+                 dst_mask_values=None, regrid_method=None, pole_method=None,
+                 regrid_pole_npoints=None, line_type=None, norm_type=None,
+                 extrap_method=None, extrap_num_src_pnts=None,
+                 extrap_dist_exponent=None, unmapped_action=None,
+                 ignore_degenerate=None):
+        """
+        Return a regridding operator from srcfield to dstfield, reading it
+        from the cache if one was stored for the same geometry and options.
+        The optional arguments are the same as for
+        :class:`~ESMF.api.regrid.Regrid`.
+
+        *REQUIRED:*
+
+        :param Field srcfield: source :class:`~ESMF.api.field.Field`.
+        :param Field dstfield: destination :class:`~ESMF.api.field.Field`.
+
+        :return: :class:`~ESMF.api.regrid.Regrid`
+        """
+
+        options = dict(src_mask_values=src_mask_values,
+                       dst_mask_values=dst_mask_values,
+                       regrid_method=regrid_method,
+                       pole_method=pole_method,
+                       regrid_pole_npoints=regrid_pole_npoints,
+                       line_type=line_type,
+                       norm_type=norm_type,
+                       extrap_method=extrap_method,
+                       extrap_num_src_pnts=extrap_num_src_pnts,
+                       extrap_dist_exponent=extrap_dist_exponent,
+                       unmapped_action=unmapped_action,
+                       ignore_degenerate=ignore_degenerate)
+
+        key = self.key(srcfield, dstfield, **options)
+        path = self.path(key)
+
+        # all PETs must agree on a hit or a miss
+        exists = os.path.isfile(path) if local_pet() == 0 else False
+        if broadcast_val(exists):
+            self._hits += 1
+            regrid = Regrid._from_routehandle_file_(srcfield, dstfield, path,
+                                                    options)
+        else:
+            self._misses += 1
+            # write to a temporary file and move it into place once complete
+            # so that concurrent jobs never read a partial RouteHandle
+            pid = int(broadcast_val(os.getpid()))
+            tmppath = '{}.{}.tmp'.format(path, pid)
+            regrid = Regrid(srcfield, dstfield, rh_filename=tmppath,
+                            **options)
+            Manager().barrier()
+            if local_pet() == 0:
+                os.rename(tmppath, path)
+            Manager().barrier()
+
+        regrid.meta['cache_key'] = key
+        return regrid
+
+    def __repr__(self):
+        string = ("RegridFileCache:\n"
+                  "    directory = %r\n"
+                  "    hits = %r\n"
+                  "    misses = %r\n"
+                  %
+                  (self.directory,
+                   self.hits,
+                   self.misses))
+
+        return string
+
+    @property
+    def directory(self):
+        """
+        :rtype: str
+        :return: The directory holding the cached RouteHandle files.
+        """
+
+        return self._directory
+
+    @property
+    def hits(self):
+        """
+        :rtype: int
+        :return: The number of operators read from the cache by this process.
+        """
+
+        return self._hits
+
+    @property
+    def misses(self):
+        """
+        :rtype: int
+        :return: The number of operators computed and written to the cache
+            by this process.
+        """
+
+        return self._misses
+
+    def clear(self):
+        """
+        Remove all cached RouteHandle files from the cache directory.  This
+        is a collective call.
+        """
+
+        if local_pet() == 0:
+            for filename in os.listdir(self.directory):
+                if filename.endswith(self._SUFFIX):
+                    os.remove(os.path.join(self.directory, filename))
+        Manager().barrier()
+
+    def key(self, srcfield, dstfield, **options):
+        """
+        Compute the cache key for a regridding operation.  This is a
+        collective call.
+
+        *REQUIRED:*
+
+        :param Field srcfield: source :class:`~ESMF.api.field.Field`.
+        :param Field dstfield: destination :class:`~ESMF.api.field.Field`.
+
+        *OPTIONAL:*
+
+        :param options: the optional arguments of
+            :class:`~ESMF.api.regrid.Regrid` that affect the weights.
+
+        :return: A hexadecimal string that is identical on all PETs.
+        """
+
+        return _regrid_key_(srcfield, dstfield, options)
+
+    def path(self, key):
+        """
+        Return the path of the RouteHandle file stored for a cache key.
+
+        *REQUIRED:*
+
+        :param str key: a key returned by
+            :meth:`~ESMF.api.regridcache.RegridFileCache.key`.
+
+        :return: str
+        """
+
+        return os.path.join(self.directory, key + self._SUFFIX)
+
+
+
+class RegridCache(object):
+    """
+    The :class:`~ESMF.api.regridcache.RegridCache` keeps recently used
+    :class:`~ESMF.api.regrid.Regrid` objects alive in memory so that
+    repeated requests for the same pair of
+    :class:`Fields <ESMF.api.field.Field>` reuse the existing RouteHandle.
+    Entries are identified by the same key as a
+    :class:`~ESMF.api.regridcache.RegridFileCache`.  When the cache grows past
+    its budget the least recently used entry is evicted and
+    :meth:`~ESMF.api.regrid.Regrid.destroy` is called on it, which releases the
+    RouteHandle and any factor arrays.
+
+    The byte budget counts the factor arrays retrieved with ``factors=True``,
+    the matrix cached by :meth:`~ESMF.api.regrid.Regrid.apply_sparse`, the
+    Fields cached by :meth:`~ESMF.api.regrid.Regrid.apply_batch` and an
+    estimate of the RouteHandle of 16 bytes per factor, a weight and two
+    indices.  The factor count is only known with ``factors=True``, which is
+    required when ``max_bytes`` is set.  The largest total over all PETs is
+    used so that every PET evicts the same entries.
+
+    .. warning:: A :class:`~ESMF.api.regrid.Regrid` returned by the cache must
+        not be used after it has been evicted or after
+        :meth:`~ESMF.api.regridcache.RegridCache.clear` has been called.
+
+    *OPTIONAL:*
+
+    :param int max_entries: the maximum number of
+        :class:`~ESMF.api.regrid.Regrid` objects kept alive.  If ``None``, the
+        number of entries is not limited.
+    :param int max_bytes: the maximum number of bytes held by the cached
+        :class:`~ESMF.api.regrid.Regrid` objects, which must then be requested
+        with ``factors=True``.  If ``None``, the size of the cache is not
+        limited.
+    """
+
+    @initialize
+    def __init__(self, max_entries=None, max_bytes=None):
+        if max_entries is not None and max_entries < 1:
+            raise ValueError("max_entries must be at least 1")
+        if max_bytes is not None and max_bytes < 0:
+            raise ValueError("max_bytes must not be negative")
+
+        self._max_entries = max_entries
+        self._max_bytes = max_bytes
+
+        # Ordered from the least to the most recently used entry
+        self._entries = OrderedDict()
+
+        # Hit and miss counters for this process
+        self._hits = 0
+        self._misses = 0
+
+    def __call__(self, srcfield, dstfield, src_mask_values=None,
+                 dst_mask_values=None, regrid_method=None, pole_method=None,
+                 regrid_pole_npoints=None, line_type=None, norm_type=None,
+                 extrap_method=None, extrap_num_src_pnts=None,
+                 extrap_dist_exponent=None, unmapped_action=None,
+                 ignore_degenerate=None, factors=False):
+        """
+        Return a regridding operator from srcfield to dstfield, reusing the
+        cached one if it was created for the same geometry and options.  The
+        optional arguments are the same as for
+        :class:`~ESMF.api.regrid.Regrid`.  This is a collective call.
+
+        *REQUIRED:*
+
+        :param Field srcfield: source :class:`~ESMF.api.field.Field`.
+        :param Field dstfield: destination :class:`~ESMF.api.field.Field`.
+
+        :return: :class:`~ESMF.api.regrid.Regrid`
+        """
+
+        if self.max_bytes is not None and not factors:
+            raise ValueError("a cache with max_bytes requires factors=True, "
+                             "the size of a RouteHandle is estimated from "
+                             "its factor count")
+
+        options = dict(src_mask_values=src_mask_values,
+                       dst_mask_values=dst_mask_values,
+                       regrid_method=regrid_method,
+                       pole_method=pole_method,
+                       regrid_pole_npoints=regrid_pole_npoints,
+                       line_type=line_type,
+                       norm_type=norm_type,
+                       extrap_method=extrap_method,
+                       extrap_num_src_pnts=extrap_num_src_pnts,
+                       extrap_dist_exponent=extrap_dist_exponent,
+                       unmapped_action=unmapped_action,
+                       ignore_degenerate=ignore_degenerate)
+
+        regrid, evicted = self._get_(srcfield, dstfield, factors, options)
+
+        # destroy outside of the lock, a Regrid waits for its submitted
+        # applications and the worker thread may need the lock to finish them
+        for old_regrid in evicted:
+            old_regrid.destroy()
+
+        return regrid
+
+    def __contains__(self, key):
+        return any(k[0] == key for k in self._entries)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __repr__(self):
+        string = ("RegridCache:\n"
+                  "    entries = %r\n"
+                  "    max_entries = %r\n"
+                  "    max_bytes = %r\n"
+                  "    hits = %r\n"
+                  "    misses = %r\n"
+                  %
+                  (len(self),
+                   self.max_entries,
+                   self.max_bytes,
+                   self.hits,
+                   self.misses))
+
+        return string
+
+    @property
+    def hits(self):
+        """
+        :rtype: int
+        :return: The number of requests served from the cache.
+        """
+
+        return self._hits
+
+    @property
+    def max_bytes(self):
+        """
+        :rtype: int
+        :return: The maximum number of bytes held by the cache.
+        """
+
+        return self._max_bytes
+
+    @property
+    def max_entries(self):
+        """
+        :rtype: int
+        :return: The maximum number of entries held by the cache.
+        """
+
+        return self._max_entries
+
+    @property
+    def misses(self):
+        """
+        :rtype: int
+        :return: The number of requests that created a new
+            :class:`~ESMF.api.regrid.Regrid`.
+        """
+
+        return self._misses
+
+    @property
+    def nbytes(self):
+        """
+        :rtype: int
+        :return: The number of bytes held by the cached
+            :class:`~ESMF.api.regrid.Regrid` objects on this PET.
+        """
+
+        return sum(_regrid_nbytes_(regrid)
+                   for regrid in self._entries.values())
+
+    def clear(self):
+        """
+        Destroy all cached :class:`~ESMF.api.regrid.Regrid` objects.  This is
+        a collective call.
+        """
+
+        for regrid in self._pop_all_():
+            regrid.destroy()
+
+    def key(self, srcfield, dstfield, **options):
+        """
+        Compute the cache key for a regridding operation.  This is a
+        collective call.
+
+        *REQUIRED:*
+
+        :param Field srcfield: source :class:`~ESMF.api.field.Field`.
+        :param Field dstfield: destination :class:`~ESMF.api.field.Field`.
+
+        *OPTIONAL:*
+
+        :param options: the optional arguments of
+            :class:`~ESMF.api.regrid.Regrid` that affect the weights.
+
+        :return: A hexadecimal string that is identical on all PETs.
+        """
+
+        return _regrid_key_(srcfield, dstfield, options)
+
+    def _evict_(self, keep=0):
+        """Remove least recently used entries until the cache is within its
+        budget, always keeping the ``keep`` most recently used entries, and
+        return the removed :class:`~ESMF.api.regrid.Regrid` objects.  The
+        caller destroys them once it no longer holds the lock."""
+
+        evicted = []
+
+        if self.max_entries is not None:
+            while len(self._entries) > max(self.max_entries, keep):
+                _, regrid = self._entries.popitem(last=False)
+                evicted.append(regrid)
+
+        if self.max_bytes is not None:
+            while len(self._entries) > keep:
+                nbytes = self.nbytes
+                if pet_count() > 1:
+                    nbytes = broadcast_val(reduce_val(nbytes, op=Reduce.MAX))
+                if nbytes <= self.max_bytes:
+                    break
+                _, regrid = self._entries.popitem(last=False)
+                evicted.append(regrid)
+
+        return evicted
+
+    @synchronized
+    def _get_(self, srcfield, dstfield, factors, options):
+        """Return the cached or a new regridding operator and the entries
+        evicted to make room for it."""
+
+        key = (self.key(srcfield, dstfield, **options), bool(factors))
+
+        regrid = self._entries.pop(key, None)
+        if regrid is None or regrid.finalized:
+            self._misses += 1
+            regrid = Regrid(srcfield, dstfield, factors=factors, **options)
+            regrid.meta['cache_key'] = key[0]
+        else:
+            self._hits += 1
+        self._entries[key] = regrid
+
+        # never evict the entry that is about to be returned
+        return regrid, self._evict_(keep=1)
+
+    @synchronized
+    def _pop_all_(self):
+        """Remove all entries and return their
+        :class:`~ESMF.api.regrid.Regrid` objects, oldest first."""
+
+        regrids = list(self._entries.values())
+        self._entries.clear()
+        return regrids
+
+
+def _regrid_key_(srcfield, dstfield, options):
+    """Compute the digest of the geometry of two Fields and the regrid
+    options, identical on all PETs.  This is a collective call."""
+
+    unknown = set(options) - set(_REGRID_OPTIONS)
+    if unknown:
+        raise TypeError("unexpected regrid options: {}".format(
+            ", ".join(sorted(unknown))))
+
+    hasher = fingerprint.new_hasher()
+    fingerprint.update_value(hasher, (constants._ESMF_VERSION,
+                                      pet_count()))
+    for field in [srcfield, dstfield]:
+        fingerprint.update_value(hasher, (field.staggerloc, field.type,
+                                          field.rank, field.xd))
+        fingerprint.update_geometry(hasher, field.grid)
+    for name in _REGRID_OPTIONS:
+        value = options.get(name)
+        fingerprint.update_value(hasher, name)
+        if name.endswith('mask_values') and value is not None:
+            fingerprint.update_array(hasher,
+                                     np.array(value, dtype=np.int32))
+        else:
+            fingerprint.update_value(hasher, value)
+
+    return fingerprint.reduce_digest(hasher)
+
+
+def _regrid_nbytes_(regrid):
+    """Return the number of bytes of the arrays held by a Regrid and an
+    estimate of the size of its RouteHandle."""
+
+    nbytes = 0
+    # the sparse matrix in the RouteHandle holds a weight and a source and
+    # destination index for each factor
+    if regrid._num_factors is not None:
+        nbytes += regrid._num_factors * (8 + 2 * 4)
+    for array in [regrid._factor_list, regrid._factor_index_list]:
+        if array is not None:
+            nbytes += array.nbytes
+    if regrid._sparse_matrix is not None:
+        matrix = regrid._sparse_matrix
+        nbytes += (matrix.data.nbytes + matrix.indices.nbytes +
+                   matrix.indptr.nbytes)
+    for batch_fields in regrid._batch_fields.values():
+        for batch_field in batch_fields:
+            nbytes += batch_field.data.nbytes
+
+    return nbytes
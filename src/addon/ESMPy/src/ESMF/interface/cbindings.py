@@ -942,6 +942,30 @@ def ESMP_GridGetCoordBounds(grid, staggerloc=constants.StaggerLoc.CENTER,
 
     return exclusiveLBound, exclusiveUBound
 
+_ESMF.ESMC_GridGetLocalDECount.restype = ct.c_int
+_ESMF.ESMC_GridGetLocalDECount.argtypes = [ct.c_void_p, ct.POINTER(ct.c_int),
+                                          ct.POINTER(ct.c_int)]
+
+def ESMP_GridGetLocalDECount(grid):
+    """
+    Preconditions: An ESMP_Grid has been created.\n
+    Postconditions: The number of DEs of 'grid' that are local to this
+                    PET has been returned.\n
+    Arguments:\n
+        :RETURN: integer :: localDECount\n
+        ESMP_Grid        :: grid\n
+    """
+    lrc = ct.c_int(0)
+    ldc = ct.c_int(0)
+    rc = _ESMF.ESMC_GridGetLocalDECount(grid.struct.ptr, ct.byref(ldc),
+                                        ct.byref(lrc))
+    rc = lrc.value
+    if rc != constants._ESMP_SUCCESS:
+        raise ValueError('ESMC_GridGetLocalDECount() failed with rc = '+
+                        str(rc)+'.    '+constants._errmsg)
+    localDECount = ldc.value
+    return localDECount
+
 _ESMF.ESMC_GridGetItem.restype = ct.POINTER(ct.c_void_p)
 _ESMF.ESMC_GridGetItem.argtypes = [ct.c_void_p, ct.c_uint, ct.c_uint, ct.c_int,
                                    ct.POINTER(ct.c_int)]
@@ -1325,6 +1349,52 @@ def ESMP_MeshGetConnectivityPtr(mesh):
                         constants._errmsg)
     return connCoord, nodesPerElem
 
+_ESMF.ESMC_MeshGetConnectivityCount.restype = None
+_ESMF.ESMC_MeshGetConnectivityCount.argtypes = [ct.c_void_p,
+                                                ct.POINTER(ct.c_int),
+                                                ct.POINTER(ct.c_int),
+                                                ct.POINTER(ct.c_int)]
+
+_ESMF.ESMC_MeshGetConnectivityIndices.restype = None
+_ESMF.ESMC_MeshGetConnectivityIndices.argtypes = [ct.c_void_p,
+                                    np.ctypeslib.ndpointer(dtype=np.int32),
+                                    np.ctypeslib.ndpointer(dtype=np.int32),
+                                    ct.POINTER(ct.c_int)]
+
+def ESMP_MeshGetConnectivity(mesh):
+    """
+    Preconditions: An ESMP_Mesh has been created.\n
+    Postconditions: Arrays containing the node indices of each locally
+                    owned element and the number of nodes per element are
+                    returned into 'elemConn' and 'nodesPerElem'.  The node
+                    indices are 0-based positions among the local nodes in
+                    the order they were added to the Mesh.\n
+    Arguments:\n
+        :RETURN: Numpy.array(dtype=int32) :: elemConn\n
+        :RETURN: Numpy.array(dtype=int32) :: nodesPerElem\n
+        ESMP_Mesh                         :: mesh\n
+    """
+    lrc = ct.c_int(0)
+    lnum_elems = ct.c_int(0)
+    lnum_conn = ct.c_int(0)
+    _ESMF.ESMC_MeshGetConnectivityCount(mesh.struct.ptr, ct.byref(lnum_elems),
+                                        ct.byref(lnum_conn), ct.byref(lrc))
+    rc = lrc.value
+    if rc != constants._ESMP_SUCCESS:
+        raise ValueError('ESMC_MeshGetConnectivityCount() failed with rc = '+str(rc)+'.    '+
+                        constants._errmsg)
+
+    # allocate the exact sizes reported by ESMF
+    elemConn = np.zeros(lnum_conn.value, dtype=np.int32)
+    nodesPerElem = np.zeros(lnum_elems.value, dtype=np.int32)
+    _ESMF.ESMC_MeshGetConnectivityIndices(mesh.struct.ptr, elemConn,
+                                          nodesPerElem, ct.byref(lrc))
+    rc = lrc.value
+    if rc != constants._ESMP_SUCCESS:
+        raise ValueError('ESMC_MeshGetConnectivityIndices() failed with rc = '+str(rc)+'.    '+
+                        constants._errmsg)
+    return elemConn, nodesPerElem
+
 _ESMF.ESMC_MeshGetLocalElementCount.restype = ct.c_int
 _ESMF.ESMC_MeshGetLocalElementCount.argtypes = [ct.c_void_p,
                                                 ct.POINTER(ct.c_int)]
@@ -2292,6 +2362,52 @@ def ESMP_FieldSMMStore(srcField, dstField, filename,
 
     return routehandle
 
+_ESMF.ESMC_FieldSMMStoreFactors.restype = ct.c_int
+_ESMF.ESMC_FieldSMMStoreFactors.argtypes = [ct.c_void_p, ct.c_void_p,
+                                            np.ctypeslib.ndpointer(dtype=np.float64, flags='C_CONTIGUOUS'),
+                                            np.ctypeslib.ndpointer(dtype=np.int32, flags='C_CONTIGUOUS'),
+                                            ct.c_int,
+                                            ct.POINTER(ESMP_RouteHandle),
+                                            OptionalBool,
+                                            ct.POINTER(ct.c_int), ct.POINTER(ct.c_int)]
+def ESMP_FieldSMMStoreFactors(srcField, dstField, factorList, factorIndexList,
+                              ignoreUnmatchedIndices=None):
+    """
+    Preconditions: Two ESMP_Fields have been created and initialized
+                   sufficiently for a regridding operation to take
+                   place.  Each PET holds any subset of the factors.
+    Postconditions: A handle to the sparse matrix multiplication has been
+                    returned into 'routehandle'.\n
+    Arguments:\n
+        :RETURN: ESMP_RouteHandle           :: routehandle\n
+        ESMP_Field                          :: srcField\n
+        ESMP_Field                          :: dstField\n
+        Numpy.array(dtype=float64)          :: factorList\n
+        Numpy.array(dtype=int32)            :: factorIndexList\n
+            (numFactors, 2) pairs of 1-based source and destination
+            sequence indices\n
+        bool (optional)                     :: ignoreUnmatchedIndices\n
+    """
+    routehandle = ESMP_RouteHandle()
+    factorList = np.ascontiguousarray(factorList, dtype=np.float64)
+    factorIndexList = np.ascontiguousarray(factorIndexList, dtype=np.int32)
+    if factorIndexList.shape != (factorList.size, 2):
+        raise ValueError('factorIndexList must have shape (numFactors, 2)')
+
+    rc = _ESMF.ESMC_FieldSMMStoreFactors(srcField.struct.ptr,
+                                         dstField.struct.ptr,
+                                         factorList,
+                                         factorIndexList,
+                                         factorList.size,
+                                         ct.byref(routehandle),
+                                         ignoreUnmatchedIndices,
+                                         None, None)
+    if rc != constants._ESMP_SUCCESS:
+        raise ValueError('ESMC_FieldSMMStoreFactors() failed with rc = '+str(rc)+
+                        '.    '+constants._errmsg)
+
+    return routehandle
+
 #### File Inquiry Utilities ##############################################
 _ESMF.ESMC_ScripInq.restype = None
 _ESMF.ESMC_ScripInq.argtypes = [Py3Char,
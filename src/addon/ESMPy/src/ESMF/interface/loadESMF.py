@@ -2,8 +2,11 @@
 
 #### IMPORT LIBRARIES #########################################################
 
+import hashlib
+import json
 import os
 import sys
+import threading
 import traceback
 
 import ESMF.api.constants as constants
@@ -33,36 +36,111 @@ except:
 #       use this information to set variables that can be checked at beginning
 #       of the routines that require an ESMF build with these dependencies
 
-with open(esmfmk, 'r') as MKFILE:
-    
-    # investigate esmf.mk
-    libsdir = None
-    esmfos = None
-    esmfabi = None
-    esmfcomm = None
-    esmfversion = None
-    netcdf = [False, False]
-    use_inmem_factors = False
-    
-    for line in MKFILE:
-        if 'ESMF_LIBSDIR' in line:
-            libsdir = line.split("=")[1]
-        elif 'ESMF_OS:' in line:
-            esmfos = line.split(":")[1]
-        elif 'ESMF_ABI:' in line:
-            esmfabi = line.split(":")[1]
-        elif 'ESMF_NETCDF:' in line:
-            netcdf[0] = True
-        elif 'ESMF_PIO:' in line:
-            netcdf[1] = True
-        elif 'ESMF_COMM:' in line:
-            esmfcomm = line.split(":")[1]
-        elif 'ESMF_VERSION_STRING=' in line:
-            esmfversion = line.split("=")[1]
-            esmfversion = esmfversion.rstrip('\n')
-        elif 'ESMF_COMPILER' in line:
-            if "gfortran" in line:
-                use_inmem_factors = True
+def _env_flag_(name):
+    return os.environ.get(name, '').lower() in ['1', 'true', 'yes', 'on']
+
+
+def _parse_esmfmk_(path):
+    """
+    Read the settings needed by ESMPy from the esmf.mk file at path.
+    """
+    with open(path, 'r') as MKFILE:
+
+        # investigate esmf.mk
+        libsdir = None
+        esmfos = None
+        esmfabi = None
+        esmfcomm = None
+        esmfversion = None
+        netcdf = [False, False]
+        use_inmem_factors = False
+
+        for line in MKFILE:
+            if 'ESMF_LIBSDIR' in line:
+                libsdir = line.split("=")[1]
+            elif 'ESMF_OS:' in line:
+                esmfos = line.split(":")[1]
+            elif 'ESMF_ABI:' in line:
+                esmfabi = line.split(":")[1]
+            elif 'ESMF_NETCDF:' in line:
+                netcdf[0] = True
+            elif 'ESMF_PIO:' in line:
+                netcdf[1] = True
+            elif 'ESMF_COMM:' in line:
+                esmfcomm = line.split(":")[1]
+            elif 'ESMF_VERSION_STRING=' in line:
+                esmfversion = line.split("=")[1]
+                esmfversion = esmfversion.rstrip('\n')
+            elif 'ESMF_COMPILER' in line:
+                if "gfortran" in line:
+                    use_inmem_factors = True
+
+    return {'libsdir': libsdir,
+            'esmfos': esmfos,
+            'esmfabi': esmfabi,
+            'esmfcomm': esmfcomm,
+            'esmfversion': esmfversion,
+            'netcdf': netcdf,
+            'use_inmem_factors': use_inmem_factors}
+
+
+def _esmfmk_cache_file_(path):
+    """
+    Return the file caching the parsed settings of the esmf.mk file at path.
+    The cache lives in ESMPY_CACHE_DIR, or ~/.cache/esmpy if that is not set.
+    """
+    cachedir = os.environ.get('ESMPY_CACHE_DIR',
+                              os.path.join(os.path.expanduser('~'), '.cache',
+                                           'esmpy'))
+    key = hashlib.sha1(os.path.abspath(path).encode('utf-8')).hexdigest()
+    return os.path.join(cachedir, 'esmfmk_{0}.json'.format(key[:16]))
+
+
+def _read_esmfmk_(path):
+    """
+    Return the settings of the esmf.mk file at path, parsing the file only if
+    the cached settings are missing or older than the file.  The cache is an
+    optimization only, it is ignored if it cannot be read or written.
+    """
+    stat = os.stat(path)
+    stamp = [os.path.abspath(path), stat.st_mtime, stat.st_size]
+    cachefile = _esmfmk_cache_file_(path)
+    try:
+        with open(cachefile, 'r') as f:
+            cached = json.load(f)
+        if cached['stamp'] == stamp:
+            return cached['settings']
+    except (IOError, OSError, ValueError, KeyError, TypeError):
+        pass
+
+    settings = _parse_esmfmk_(path)
+    try:
+        cachedir = os.path.dirname(cachefile)
+        if not os.path.isdir(cachedir):
+            os.makedirs(cachedir)
+        # write to a private file and rename so readers never see a partial file
+        tmpfile = '{0}.{1}.tmp'.format(cachefile, os.getpid())
+        with open(tmpfile, 'w') as f:
+            json.dump({'stamp': stamp, 'settings': settings}, f)
+        os.rename(tmpfile, cachefile)
+    except (IOError, OSError):
+        pass
+    return settings
+
+
+# the parsed settings are only cached with ESMPY_LAZY_LOAD, a default import
+# does not touch the cache directory
+if _env_flag_('ESMPY_LAZY_LOAD'):
+    _settings = _read_esmfmk_(esmfmk)
+else:
+    _settings = _parse_esmfmk_(esmfmk)
+libsdir = _settings['libsdir']
+esmfos = _settings['esmfos']
+esmfabi = _settings['esmfabi']
+esmfcomm = _settings['esmfcomm']
+esmfversion = _settings['esmfversion']
+netcdf = _settings['netcdf']
+use_inmem_factors = _settings['use_inmem_factors']
 
 if not libsdir:
     raise ValueError("ESMF_LIBSDIR not found!")
@@ -125,13 +203,130 @@ constants._ESMF_USE_INMEM_FACTORS = use_inmem_factors
 
 #### SHARED LIBRARY ###########################################################
 
-# load the shared library for esmf
-try:
-    if constants._ESMF_OS == constants._ESMF_OS_DARWIN:
-        _ESMF = np.ctypeslib.load_library('libesmf_fullylinked',libsdir)
-    else:
-        _ESMF = ct.CDLL(os.path.join(libsdir,'libesmf_fullylinked.so'),
-                        mode=ct.RTLD_GLOBAL)
-except:
-    traceback.print_exc(file=sys.stdout)
-    raise ImportError('The ESMF shared library did not load properly.')
\ No newline at end of file
+def _load_library_():
+    """
+    Load the shared library for esmf.
+    """
+    try:
+        if constants._ESMF_OS == constants._ESMF_OS_DARWIN:
+            return np.ctypeslib.load_library('libesmf_fullylinked',libsdir)
+        else:
+            return ct.CDLL(os.path.join(libsdir,'libesmf_fullylinked.so'),
+                           mode=ct.RTLD_GLOBAL)
+    except:
+        traceback.print_exc(file=sys.stdout)
+        raise ImportError('The ESMF shared library did not load properly.')
+
+
+class _LazyFunction(object):
+    """
+    Stand-in for a function of the shared library that is not loaded yet.  The
+    restype and argtypes set on it are recorded and bound to the real function
+    when the library is loaded by the first call of any of its functions.
+    """
+
+    def __init__(self, library, name):
+        self._library = library
+        self._name = name
+
+    def __call__(self, *args):
+        return self._library._load_function_(self._name)(*args)
+
+    def _bind_(self, function):
+        for attr in ['restype', 'argtypes']:
+            if attr in self.__dict__:
+                setattr(function, attr, self.__dict__[attr])
+        return function
+
+
+class _LazyLibrary(object):
+    """
+    Stand-in for the shared library for esmf, loaded by the first function
+    call.  Afterwards all functions are replaced with the ctypes functions of
+    the library, so calls do not go through this object anymore.
+    """
+
+    def __init__(self, loader):
+        self._loader = loader
+        self._library = None
+        self._lock = threading.Lock()
+
+    def __getattr__(self, name):
+        if name.startswith('__'):
+            raise AttributeError(name)
+        if self._library is not None:
+            function = getattr(self._library, name)
+        else:
+            function = _LazyFunction(self, name)
+        self.__dict__[name] = function
+        return function
+
+    def _load_(self):
+        with self._lock:
+            if self._library is None:
+                library = self._loader()
+                for name, function in list(self.__dict__.items()):
+                    if isinstance(function, _LazyFunction):
+                        self.__dict__[name] = function._bind_(getattr(library, name))
+                self._library = library
+        return self._library
+
+    def _load_function_(self, name):
+        self._load_()
+        return self.__dict__[name]
+
+
+class _LockedFunction(object):
+    """
+    Function of the shared library that is called while holding a lock.  The
+    function is looked up in the library on every call, so once a
+    _LazyLibrary is loaded its ctypes function is called directly instead of
+    the stand-in.  The restype and argtypes are those of that function.
+    """
+
+    def __init__(self, library, name, lock):
+        self.__dict__['_library'] = library
+        self.__dict__['_name'] = name
+        self.__dict__['_lock'] = lock
+
+    def __call__(self, *args):
+        with self._lock:
+            return getattr(self._library, self._name)(*args)
+
+    def __getattr__(self, name):
+        return getattr(getattr(self._library, self._name), name)
+
+    def __setattr__(self, name, value):
+        setattr(getattr(self._library, self._name), name, value)
+
+
+class _LockedLibrary(object):
+    """
+    Wrapper of the shared library for esmf whose functions are called while
+    holding a lock, so calls from different threads never run at the same
+    time.  ESMF itself is not thread-safe.
+    """
+
+    def __init__(self, library, lock):
+        self._library = library
+        self._lock = lock
+
+    def __getattr__(self, name):
+        if name.startswith('__'):
+            raise AttributeError(name)
+        function = _LockedFunction(self._library, name, self._lock)
+        self.__dict__[name] = function
+        return function
+
+
+# set ESMPY_LAZY_LOAD to defer loading the shared library, and binding the
+# argument types of its functions, until the first call into ESMF
+if _env_flag_('ESMPY_LAZY_LOAD'):
+    _ESMF = _LazyLibrary(_load_library_)
+else:
+    _ESMF = _load_library_()
+
+# set ESMPY_THREAD_SAFE to serialize the calls into ESMF from several threads
+constants._ESMPY_THREAD_SAFE = _env_flag_('ESMPY_THREAD_SAFE')
+if constants._ESMPY_THREAD_SAFE:
+    _ESMF = _LockedLibrary(_ESMF, threading.Lock())
@@ -0,0 +1,238 @@
+# $Id$
+
+"""
+Times Manager initialization, the creation of Grids, Meshes, LocStreams and
+Fields, the overhead of single calls into the ESMF library, and Regrid store
+versus apply for a range of grid sizes.  Run it directly or with mpirun to
+time a given PET count, run_benchmark.py runs it for several PET counts.
+
+Every timing is bracketed by barriers, so it is the wall time of the
+slowest PET.  PET 0 writes the results as JSON to the file given by
+``--results``.
+"""
+
+import argparse
+import json
+import sys
+import time
+
+import numpy as np
+
+# Manager initialization is timed from the first call into ESMF, the import
+# itself is timed by run_benchmark.py in separate processes
+import ESMF
+import ESMF.api.constants as constants
+from ESMF.interface.cbindings import ESMP_VMGet
+
+# number of calls per repetition when timing the overhead of a single call
+CALLS = 1000
+
+
+def grid_create(size):
+    """
+    Create a size x size regional Grid on the sphere with center and corner
+    coordinates.
+    """
+    grid = ESMF.Grid(np.array([size, size]), coord_sys=ESMF.CoordSys.SPH_DEG,
+                     staggerloc=[ESMF.StaggerLoc.CENTER, ESMF.StaggerLoc.CORNER])
+
+    lon_edges = np.linspace(0., 360., size + 1)
+    lat_edges = np.linspace(-80., 80., size + 1)
+    lon_centers = (lon_edges[:-1] + lon_edges[1:]) / 2.
+    lat_centers = (lat_edges[:-1] + lat_edges[1:]) / 2.
+
+    for staggerloc, lons, lats in [(ESMF.StaggerLoc.CENTER, lon_centers, lat_centers),
+                                   (ESMF.StaggerLoc.CORNER, lon_edges, lat_edges)]:
+        lb = grid.lower_bounds[staggerloc]
+        ub = grid.upper_bounds[staggerloc]
+        grid.get_coords(0, staggerloc=staggerloc)[...] = \
+            lons[lb[0]:ub[0]].reshape(-1, 1)
+        grid.get_coords(1, staggerloc=staggerloc)[...] = \
+            lats[lb[1]:ub[1]].reshape(1, -1)
+
+    return grid
+
+
+def mesh_create(size):
+    """
+    Create a Mesh of size x size quadrilaterals covering the same domain as
+    grid_create().  The rows of elements are distributed over the PETs, the
+    nodes on the boundary between two PETs are owned by the upper PET.
+    """
+    pet_count = ESMF.pet_count()
+    if size < pet_count:
+        raise ValueError("size must be at least the number of PETs")
+    rows = np.array_split(np.arange(size), pet_count)
+    starts = [r[0] for r in rows] + [size]
+    row0 = starts[ESMF.local_pet()]
+    row1 = starts[ESMF.local_pet() + 1]
+
+    lon_edges = np.linspace(0., 360., size + 1)
+    lat_edges = np.linspace(-80., 80., size + 1)
+
+    # nodes of the rows row0 to row1
+    node_rows = np.arange(row0, row1 + 1)
+    node_cols = np.arange(size + 1)
+    jj, ii = np.meshgrid(node_rows, node_cols, indexing='ij')
+    node_ids = (jj * (size + 1) + ii + 1).ravel().astype(np.int32)
+    node_coords = np.empty((node_ids.size, 2))
+    node_coords[:, 0] = lon_edges[ii.ravel()]
+    node_coords[:, 1] = lat_edges[jj.ravel()]
+    owner_of_row = np.searchsorted(starts, np.arange(size + 1), side='right') - 1
+    owner_of_row[size] = pet_count - 1
+    node_owners = owner_of_row[jj.ravel()].astype(np.int32)
+
+    # elements of the rows row0 to row1 - 1, counterclockwise corners
+    elem_rows = np.arange(row0, row1)
+    elem_cols = np.arange(size)
+    jj, ii = np.meshgrid(elem_rows, elem_cols, indexing='ij')
+    element_ids = (jj * size + ii + 1).ravel().astype(np.int32)
+    lower_left = ((jj - row0) * (size + 1) + ii).ravel()
+    element_conn = np.column_stack([lower_left, lower_left + 1,
+                                    lower_left + size + 2,
+                                    lower_left + size + 1]).ravel().astype(np.int32)
+    element_types = np.full(element_ids.size, ESMF.MeshElemType.QUAD, dtype=np.int32)
+
+    mesh = ESMF.Mesh(parametric_dim=2, spatial_dim=2, coord_sys=ESMF.CoordSys.SPH_DEG)
+    mesh.add_nodes(node_ids.size, node_ids, node_coords.ravel(), node_owners)
+    mesh.add_elements(element_ids.size, element_ids, element_types, element_conn)
+
+    return mesh
+
+
+def locstream_create(size):
+    """
+    Create a LocStream with size x size points distributed over the PETs.
+    """
+    count = len(np.array_split(np.arange(size * size), ESMF.pet_count())[ESMF.local_pet()])
+    locstream = ESMF.LocStream(count, coord_sys=ESMF.CoordSys.SPH_DEG)
+    locstream["ESMF:Lon"] = np.random.uniform(0., 360., count)
+    locstream["ESMF:Lat"] = np.random.uniform(-80., 80., count)
+
+    return locstream
+
+
+def timeit(mg, func, repeat, number=1):
+    """
+    Call func repeat times and return the minimum, mean and maximum time per
+    call in seconds.  If func returns an object with a destroy() method, it is
+    destroyed outside of the timing.  If number is greater than one, func is
+    expected to make number calls itself and the times are divided by it.
+    """
+    times = []
+    for _ in range(repeat):
+        mg.barrier()
+        start = time.time()
+        ret = func()
+        mg.barrier()
+        times.append((time.time() - start) / number)
+        if hasattr(ret, 'destroy'):
+            ret.destroy()
+    return min(times), float(np.mean(times)), max(times)
+
+
+def record(name, size, repeat, number, times):
+    ret = {'name': name,
+           'size': size,
+           'pet_count': ESMF.pet_count(),
+           'repeat': repeat,
+           'number': number}
+    ret['min'], ret['mean'], ret['max'] = times
+    if ESMF.local_pet() == 0:
+        print('{0:<28} size={1!s:<6} pets={2:<4} min={3:.6f}s mean={4:.6f}s'.format(
+              name, size, ret['pet_count'], ret['min'], ret['mean']))
+    return ret
+
+
+def run_benchmarks(mg, sizes, repeat):
+    """
+    Run all benchmarks for the given grid sizes and return the result records.
+    """
+    results = []
+
+    def vm_get():
+        for _ in range(CALLS):
+            ESMP_VMGet(mg.vm)
+    results.append(record('cbindings_call', None, repeat, CALLS,
+                          timeit(mg, vm_get, repeat, CALLS)))
+
+    for size in sizes:
+        results.append(record('grid_create', size, repeat, 1,
+                              timeit(mg, lambda: grid_create(size), repeat)))
+        results.append(record('mesh_create', size, repeat, 1,
+                              timeit(mg, lambda: mesh_create(size), repeat)))
+        results.append(record('locstream_create', size, repeat, 1,
+                              timeit(mg, lambda: locstream_create(size), repeat)))
+
+        srcgrid = grid_create(size)
+        # a coarser destination, so the source and destination points differ
+        dstgrid = grid_create(max(size // 2, ESMF.pet_count()))
+
+        results.append(record('field_create', size, repeat, 1,
+                              timeit(mg, lambda: ESMF.Field(srcgrid), repeat)))
+
+        def get_coords():
+            for _ in range(CALLS):
+                srcgrid.get_coords(0)
+        results.append(record('grid_get_coords', size, repeat, CALLS,
+                              timeit(mg, get_coords, repeat, CALLS)))
+
+        srcfield = ESMF.Field(srcgrid, name='srcfield')
+        dstfield = ESMF.Field(dstgrid, name='dstfield')
+        srcfield.data[...] = 1.
+
+        for name, method in [('bilinear', ESMF.RegridMethod.BILINEAR),
+                             ('conserve', ESMF.RegridMethod.CONSERVE)]:
+            def store():
+                return ESMF.Regrid(srcfield, dstfield, regrid_method=method,
+                                   unmapped_action=ESMF.UnmappedAction.IGNORE)
+            results.append(record('regrid_store_' + name, size, repeat, 1,
+                                  timeit(mg, store, repeat)))
+
+            regrid = store()
+
+            def apply():
+                # do not return the destination field, timeit would destroy it
+                regrid(srcfield, dstfield)
+            results.append(record('regrid_apply_' + name, size, repeat, 1,
+                                  timeit(mg, apply, repeat)))
+            regrid.destroy()
+
+        srcfield.destroy()
+        dstfield.destroy()
+        srcgrid.destroy()
+        dstgrid.destroy()
+
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Time ESMPy object creation and regridding.')
+    parser.add_argument('--sizes', default='32,64,128',
+                        help='comma separated list of grid sizes, a size of n is an n x n grid')
+    parser.add_argument('--repeat', type=int, default=5,
+                        help='number of times every benchmark is repeated')
+    parser.add_argument('--results', default=None,
+                        help='path of the JSON file receiving the results')
+    args = parser.parse_args(argv)
+    sizes = [int(size) for size in args.sizes.split(',') if size.strip()]
+
+    start = time.time()
+    mg = ESMF.Manager()
+    mg.barrier()
+    manager_init = time.time() - start
+
+    results = [record('manager_init', None, 1, 1, (manager_init,) * 3)]
+    results += run_benchmarks(mg, sizes, args.repeat)
+
+    if args.results is not None and ESMF.local_pet() == 0:
+        with open(args.results, 'w') as f:
+            json.dump({'esmf_version': constants._ESMF_VERSION,
+                       'numpy_version': np.__version__,
+                       'results': results}, f, indent=2)
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,162 @@
+# $Id$
+
+"""
+Runs the ESMPy benchmarks and writes the results as JSON.
+
+The time of ``import ESMF`` is measured in fresh Python processes, with and
+without ``ESMPY_LAZY_LOAD``.  benchmark_driver.py is then run once per PET
+count given in ``--pets``, with mpirun for more than one PET.  With
+``--compare`` the results are compared against an earlier results file and
+benchmarks that became slower or faster by more than ``--threshold`` are
+reported, the exit status is 1 if any benchmark became slower.
+"""
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+
+# importing ESMF sets the constants describing the ESMF build
+import ESMF
+import ESMF.api.constants as constants
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# run in a fresh process to time the import of ESMF
+IMPORT_SNIPPET = "import time; start = time.time(); import ESMF; print(time.time() - start)"
+
+
+def time_import(repeat, lazy):
+    """
+    Return the result record for importing ESMF repeat times in new processes.
+    """
+    env = dict(os.environ)
+    env.pop('ESMPY_LAZY_LOAD', None)
+    if lazy:
+        env['ESMPY_LAZY_LOAD'] = '1'
+
+    times = []
+    for _ in range(repeat):
+        out = subprocess.check_output([sys.executable, '-c', IMPORT_SNIPPET], env=env)
+        times.append(float(out.decode().strip().splitlines()[-1]))
+
+    ret = {'name': 'import_esmf_lazy' if lazy else 'import_esmf',
+           'size': None,
+           'pet_count': 1,
+           'repeat': repeat,
+           'number': 1,
+           'min': min(times),
+           'mean': sum(times) / len(times),
+           'max': max(times)}
+    print('{0:<28} size={1!s:<6} pets={2:<4} min={3:.6f}s mean={4:.6f}s'.format(
+          ret['name'], ret['size'], ret['pet_count'], ret['min'], ret['mean']))
+    return ret
+
+
+def run_driver(pets, sizes, repeat):
+    """
+    Run benchmark_driver.py with pets PETs and return its results.
+    """
+    if pets > 1 and constants._ESMF_COMM == constants._ESMF_COMM_MPIUNI:
+        raise ValueError("Cannot run parallel benchmarks when ESMF is built with ESMF_COMM=mpiuni")
+
+    fd, results = tempfile.mkstemp(suffix='.json')
+    os.close(fd)
+    try:
+        cmd = [sys.executable, os.path.join(BENCHMARK_DIR, 'benchmark_driver.py'),
+               '--sizes', sizes, '--repeat', str(repeat), '--results', results]
+        if pets > 1:
+            cmd = [constants._ESMF_MPIRUN, '-n', str(pets)] + cmd
+        subprocess.check_call(cmd)
+        with open(results) as f:
+            return json.load(f)
+    finally:
+        os.remove(results)
+
+
+def compare(results, baseline, threshold):
+    """
+    Print the ratio of the minimum times in results to those in baseline for
+    every benchmark found in both, and return the number of benchmarks that
+    are slower by more than threshold.
+    """
+    def key(r):
+        return r['name'], r['size'], r['pet_count']
+
+    base = dict((key(r), r) for r in baseline['results'])
+    slower = 0
+    print('\nComparison with {0}:'.format(baseline['meta'].get('timestamp')))
+    for r in results['results']:
+        b = base.get(key(r))
+        if b is None or b['min'] <= 0:
+            continue
+        ratio = r['min'] / b['min']
+        if ratio > 1. + threshold:
+            flag = 'SLOWER'
+            slower += 1
+        elif ratio < 1. - threshold:
+            flag = 'FASTER'
+        else:
+            flag = ''
+        print('{0:<28} size={1!s:<6} pets={2:<4} {3:.3f}x {4}'.format(
+              r['name'], r['size'], r['pet_count'], ratio, flag))
+    return slower
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Run the ESMPy benchmarks.')
+    parser.add_argument('--sizes', default='32,64,128',
+                        help='comma separated list of grid sizes, a size of n is an n x n grid')
+    parser.add_argument('--pets', default='1',
+                        help='comma separated list of PET counts')
+    parser.add_argument('--repeat', type=int, default=5,
+                        help='number of times every benchmark is repeated')
+    parser.add_argument('--import-repeat', type=int, default=10,
+                        help='number of processes used to time the import of ESMF')
+    parser.add_argument('--output', default='esmpy_benchmark.json',
+                        help='path of the JSON file receiving the results')
+    parser.add_argument('--compare', default=None,
+                        help='path of an earlier results file to compare against')
+    parser.add_argument('--threshold', type=float, default=0.1,
+                        help='relative change reported as slower or faster by --compare')
+    args = parser.parse_args(argv)
+
+    records = [time_import(args.import_repeat, False),
+               time_import(args.import_repeat, True)]
+    esmf_version = None
+    numpy_version = None
+    for pets in [int(pets) for pets in args.pets.split(',') if pets.strip()]:
+        ret = run_driver(pets, args.sizes, args.repeat)
+        esmf_version = ret['esmf_version']
+        numpy_version = ret['numpy_version']
+        records += ret['results']
+
+    results = {'meta': {'timestamp': datetime.datetime.now().isoformat(),
+                        'esmf_version': esmf_version,
+                        'numpy_version': numpy_version,
+                        'python_version': platform.python_version(),
+                        'platform': platform.platform(),
+                        'node': platform.node(),
+                        'sizes': args.sizes,
+                        'pets': args.pets,
+                        'repeat': args.repeat},
+               'results': records}
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print('\nBenchmark results: ' + args.output)
+
+    if args.compare is not None:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if compare(results, baseline, args.threshold) > 0:
+            return 1
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -7,10 +7,19 @@ source and destination NetCDF files, creates an analytic field across the
 source mesh, regrids the source mesh to the grid of the destination mesh,
 and compares the analytic field of the resulting regridded mesh to that of the
 source mesh.
+
+A subset of the test cases can be selected with ``--cases``, given as a comma
+separated list of 1-based case numbers.  If ``--results`` is given, PET 0
+writes a JSON file with one record per test case.  The ESMF log files are
+read from and cleaned in the current working directory, so concurrent runs
+must be started from separate directories.
 """
 
+import argparse
+import json
 import sys
 import os
+import time
 import traceback
 
 try:
@@ -22,30 +31,47 @@ from ESMF.test.regrid_from_file.run_regrid_from_file_dryrun import cache_data_fi
 from ESMF.test.regrid_from_file.regrid_check import regrid_check
 from ESMF.test.regrid_from_file.read_test_cases_from_control_file import read_control_file
 
-# Start up ESMF and run regrid test for each line of options
-# read from a control file.    Retrieve data files for each test from a remote
-# server if they do not exist locally.
-# Start up ESMF.
-mg = ESMF.Manager(debug=True)
-
-parallel = False
-if ESMF.pet_count() > 1:
-    parallel = True
-
-# Read the test case parameters from the control file.
-
-print('Reading control file...')
-test_cases = read_control_file()
-if (ESMF.local_pet() == 0):
-    # Retrieve the data files needed for the test cases from the remote server.
-    print('Retrieving regrid_from_file data...')
-    status_ok = cache_data_files_for_test_cases(test_cases)
-
-# For each test case line from the control file parse the line and call
-# the test subroutine.
-for ctr, test_case in enumerate(test_cases, start=1):
-    print('Running {0} of {1} regrid_from_file test cases...'.format(ctr, len(test_cases)))
-    (src_fname, dst_fname, regrid_method, options, 
+
+def parse_case_numbers(cases, num_cases):
+    """
+    Convert a comma separated list of 1-based case numbers into a list of
+    integers.  All cases are selected if cases is None.
+    """
+    if cases is None:
+        return list(range(1, num_cases + 1))
+    ret = [int(case) for case in cases.split(',') if case.strip()]
+    for case in ret:
+        if case < 1 or case > num_cases:
+            raise ValueError('test case {0} is not in the range 1 to {1}'.format(case, num_cases))
+    return ret
+
+
+def log_files_skip():
+    """
+    Return True if any PET log file in the current working directory reports
+    that the case cannot run with this ESMF build.
+    """
+    skip = False
+    for i in range(ESMF.pet_count()):
+        logfile = "PET"+str(i)+".ESMF_LogFile"
+        if not os.path.isfile(logfile):
+            continue
+        for line in open(logfile):
+            if "ESMF_NETCDF not defined when lib was compiled" in line or \
+              "File format is not supported" in line:
+              # set skip
+              skip = True
+    return skip
+
+
+def run_test_case(mg, ctr, num_cases, test_case):
+    """
+    Run a single test case and return its result record.
+    """
+    parallel = ESMF.pet_count() > 1
+
+    print('Running {0} of {1} regrid_from_file test cases...'.format(ctr, num_cases))
+    (src_fname, dst_fname, regrid_method, options,
      itrp_mean_err, itrp_max_err, csrv_err) = test_case
     test_str = 'Regrid %s to %s as %s with %s itrp_mean_err=%f, itrp_max_err=%f, and csrv_err=%f' % (src_fname, dst_fname, regrid_method, options, itrp_mean_err, itrp_max_err, csrv_err)
     print ('\n' + test_str + ' - START\n')
@@ -58,36 +84,84 @@ for ctr, test_case in enumerate(test_cases, start=1):
 
     # run the data file retrieval and regridding through try/except
     correct = False
+    start = time.time()
     try:
-        correct = regrid_check(src_fname_full, dst_fname_full, regrid_method, 
+        correct = regrid_check(src_fname_full, dst_fname_full, regrid_method,
                                options, itrp_mean_err, itrp_max_err, csrv_err)
     except:
         print ("Regridding ERROR:\n")
         traceback.print_exc(file=sys.stdout)
+    elapsed = time.time() - start
 
-    skip = False
-    for i in range(ESMF.pet_count()):
-        for line in open("PET"+str(i)+".ESMF_LogFile"):
-            if "ESMF_NETCDF not defined when lib was compiled" in line or \
-              "File format is not supported" in line:
-              # set skip
-              skip = True
+    skip = log_files_skip()
 
     # print the file
     print ('\n***NOTE*** The log files must be deleted in this test case, they are printed below for future reference\n')
     if skip:
-        for line in open("PET"+str(i)+".ESMF_LogFile"):
-            print (line)
-            
+        for i in range(ESMF.pet_count()):
+            for line in open("PET"+str(i)+".ESMF_LogFile"):
+                print (line)
+
     # clean the log files
     for i in range(ESMF.pet_count()):
         os.system("echo ' ' > PET"+str(i)+".ESMF_LogFile")
-        
+
     print ("\nPET: " + str(ESMF.local_pet()) + " - " + test_str + " - FINISH\n")
 
     if skip:
-        print ('RESULT: SKIP\n\n')
+        result = 'SKIP'
     elif correct:
-        print ('RESULT: PASS\n\n')
+        result = 'PASS'
     else:
-        print ('RESULT: FAIL\n\n')
+        result = 'FAIL'
+    print ('RESULT: ' + result + '\n\n')
+
+    return {'case': ctr,
+            'src_fname': src_fname,
+            'dst_fname': dst_fname,
+            'regrid_method': regrid_method,
+            'options': options.strip(),
+            'result': result,
+            'elapsed': elapsed,
+            'pet_count': ESMF.pet_count()}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Run regrid_from_file test cases.')
+    parser.add_argument('--cases', default=None,
+                        help='comma separated list of 1-based test case numbers to run')
+    parser.add_argument('--results', default=None,
+                        help='path of a JSON file receiving the test case results')
+    args = parser.parse_args(argv)
+
+    # Start up ESMF and run regrid test for each line of options
+    # read from a control file.    Retrieve data files for each test from a remote
+    # server if they do not exist locally.
+    # Start up ESMF.
+    mg = ESMF.Manager(debug=True)
+
+    # Read the test case parameters from the control file.
+    print('Reading control file...')
+    test_cases = read_control_file()
+    case_numbers = parse_case_numbers(args.cases, len(test_cases))
+    selected = [test_cases[ctr - 1] for ctr in case_numbers]
+    if (ESMF.local_pet() == 0):
+        # Retrieve the data files needed for the test cases from the remote server.
+        print('Retrieving regrid_from_file data...')
+        status_ok = cache_data_files_for_test_cases(selected)
+
+    # For each test case line from the control file parse the line and call
+    # the test subroutine.
+    results = []
+    for ctr, test_case in zip(case_numbers, selected):
+        results.append(run_test_case(mg, ctr, len(test_cases), test_case))
+
+    if args.results is not None and ESMF.local_pet() == 0:
+        with open(args.results, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
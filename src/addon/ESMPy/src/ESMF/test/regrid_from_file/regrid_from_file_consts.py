@@ -7,7 +7,8 @@ try:
 except:
     raise ImportError('The ESMF library cannot be found!')
 #
-TEST_REGRID_DIR = 'src/ESMF/test/regrid_from_file/'
+# absolute so that test cases may run from isolated working directories
+TEST_REGRID_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '')
 CONTROL_FNAME = 'regrid_test_data.txt'
 DATA_SUBDIR = os.path.join(TEST_REGRID_DIR,'data/')
 DATA_URL_ROOT = 'http://www.earthsystemmodeling.org/download/data'
@@ -1,58 +1,181 @@
 # $Id$
 
+"""
+Runs the regrid_from_file test cases and prints a PASS/FAIL/SKIP report.
+
+By default all test cases run sequentially in a single job.  With
+``--jobs N`` every test case runs as a separate job (an MPI job with
+``--parallel``), up to N at a time, each in its own log directory under
+``--log-dir``.  The results of all test cases are collected into the JSON
+file given by ``--results``.
+"""
+
+import argparse
+import json
 import os
+import subprocess
 import sys
+import time
 
 import ESMF.api.constants as constants
 from ESMF.test.regrid_from_file.regrid_from_file_consts import TEST_REGRID_DIR
+from ESMF.test.regrid_from_file.read_test_cases_from_control_file import read_control_file
+from ESMF.test.regrid_from_file.run_regrid_from_file_dryrun import cache_data_files_for_test_cases
+
+# seconds between polls of the running test case jobs
+POLL_INTERVAL = 0.5
+
+
+def driver_command(parallel, driver_args):
+    """
+    Return the command running the regrid_check_driver with driver_args.
+    """
+    rtestfile = os.path.join(TEST_REGRID_DIR, 'regrid_check_driver.py')
+    cmd = [sys.executable, rtestfile] + driver_args
+    if parallel:
+        cmd = [constants._ESMF_MPIRUN, '-n', str(constants._ESMF_MPIRUN_NP)] + cmd
+    return cmd
+
+
+def run_sequential(rtestoutfile, results):
+    """
+    Run all test cases in a single job and return the result records.
+    """
+    if os.path.isfile(results):
+        os.remove(results)
+
+    rtestfile = os.path.join(TEST_REGRID_DIR, 'regrid_check_driver.py')
+    os.system(constants._ESMF_MPIRUN + " -n " + str(constants._ESMF_MPIRUN_NP) + " " + sys.executable +
+              " " + rtestfile + " --results " + results + " > " + rtestoutfile + " 2>&1")
+
+    if os.path.isfile(results):
+        with open(results) as f:
+            return json.load(f)
+
+    # the driver did not finish, count the results printed to the log
+    ret = []
+    for line in open(rtestoutfile):
+        for result in ['PASS', 'FAIL', 'SKIP']:
+            if 'RESULT: ' + result in line:
+                ret.append({'result': result})
+    return ret
+
+
+def run_concurrent(parallel, jobs, log_dir, test_cases):
+    """
+    Run every test case as a separate job, with at most jobs running at the
+    same time, and return the result records ordered by case number.
+    """
+    if not os.path.isdir(log_dir):
+        os.makedirs(log_dir)
+
+    # retrieve the data once, concurrent jobs would race on the downloads
+    print('Retrieving regrid_from_file data...')
+    cache_data_files_for_test_cases(test_cases)
+
+    pending = list(range(1, len(test_cases) + 1))
+    running = {}
+    records = {}
+    while pending or running:
+        # start new jobs while there are free slots
+        while pending and len(running) < jobs:
+            case = pending.pop(0)
+            case_dir = os.path.abspath(os.path.join(log_dir, 'case_{0:03d}'.format(case)))
+            if not os.path.isdir(case_dir):
+                os.makedirs(case_dir)
+            results = os.path.join(case_dir, 'results.json')
+            if os.path.isfile(results):
+                os.remove(results)
+            log = open(os.path.join(case_dir, 'run.log'), 'w')
+            cmd = driver_command(parallel, ['--cases', str(case), '--results', results])
+            proc = subprocess.Popen(cmd, cwd=case_dir, stdout=log,
+                                    stderr=subprocess.STDOUT)
+            running[case] = (proc, log, results, case_dir, time.time())
+
+        # collect finished jobs
+        for case in list(running):
+            proc, log, results, case_dir, start = running[case]
+            if proc.poll() is None:
+                continue
+            log.close()
+            del running[case]
+
+            if os.path.isfile(results):
+                with open(results) as f:
+                    record = json.load(f)[0]
+            else:
+                # the job failed before the driver wrote its results
+                src_fname, dst_fname, regrid_method, options = test_cases[case - 1][0:4]
+                record = {'case': case,
+                          'src_fname': src_fname,
+                          'dst_fname': dst_fname,
+                          'regrid_method': regrid_method,
+                          'options': options.strip(),
+                          'result': 'FAIL',
+                          'elapsed': time.time() - start}
+            record['returncode'] = proc.returncode
+            record['log_dir'] = case_dir
+            records[case] = record
+            print('Finished {0} of {1} regrid_from_file test cases: case {2} - {3}'.format(
+                  len(records), len(test_cases), case, record['result']))
+
+        if running:
+            time.sleep(POLL_INTERVAL)
+
+    return [records[case] for case in sorted(records)]
 
 
-parallel = False
-if len(sys.argv) > 1:
-    if "--parallel" in sys.argv[1]:
-        parallel = True
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Run the regrid_from_file test cases.')
+    parser.add_argument('--parallel', action='store_true',
+                        help='run each job with {0} processes'.format(constants._ESMF_MPIRUN_NP))
+    parser.add_argument('--jobs', type=int, default=1,
+                        help='number of test cases to run concurrently')
+    parser.add_argument('--log-dir', default='regrid_from_file_logs',
+                        help='directory receiving one log directory per test case when jobs > 1')
+    parser.add_argument('--results', default=None,
+                        help='path of the JSON file receiving the test case results')
+    args = parser.parse_args(argv)
 
-# run utests, pipe to file
-rtestfile=os.path.join(TEST_REGRID_DIR, 'regrid_check_driver.py')
-rtestoutfile='run_regrid_from_file.log'
-num_proc = 1
-if parallel:
-    # make sure we are not in uni mode
-    if constants._ESMF_COMM == constants._ESMF_COMM_MPIUNI:
-        raise ValueError("Cannot run parallel tests when ESMF is built with ESMF_COMM=mpiuni")
+    rtestoutfile = 'run_regrid_from_file.log'
+    if args.parallel:
+        # make sure we are not in uni mode
+        if constants._ESMF_COMM == constants._ESMF_COMM_MPIUNI:
+            raise ValueError("Cannot run parallel tests when ESMF is built with ESMF_COMM=mpiuni")
 
-    # setup the constants
-    rtestoutfile='run_regrid_from_file_parallel.log'
+        # setup the constants
+        rtestoutfile = 'run_regrid_from_file_parallel.log'
 
-constants._ESMF_MPIRUN + " -n "
-os.system(constants._ESMF_MPIRUN + " -n " + constants._ESMF_MPIRUN_NP + " python " + rtestfile + " > " + rtestoutfile + " 2>&1")
+    results = args.results
+    if results is None:
+        results = os.path.splitext(rtestoutfile)[0] + '_results.json'
+    results = os.path.abspath(results)
 
-# traverse output, find number of pass and fail and print report
-RTEST = open(rtestoutfile)
+    if args.jobs > 1:
+        test_cases = read_control_file()
+        records = run_concurrent(args.parallel, args.jobs, args.log_dir, test_cases)
+        with open(results, 'w') as f:
+            json.dump(records, f, indent=2)
+        rtestoutfile = args.log_dir
+    else:
+        records = run_sequential(rtestoutfile, results)
 
-rtpass = 0
-rtfail = 0
-rtskip = 0
+    # count the number of pass, fail and skip and print report
+    rtpass = len([r for r in records if r['result'] == 'PASS'])
+    rtfail = len([r for r in records if r['result'] == 'FAIL'])
+    rtskip = len([r for r in records if r['result'] == 'SKIP'])
 
-for line in RTEST:
-    if 'RESULT: PASS' in line:
-        rtpass=rtpass+1
-    if 'RESULT: FAIL' in line:
-        rtfail=rtfail+1
-    if 'RESULT: SKIP' in line:
-        rtskip=rtskip+1
+    print("Regrid from file test results: "+rtestoutfile)
+    print("PASS  = "+str(int(rtpass)))
+    print("FAIL  = "+str(int(rtfail)))
+    print("SKIP  = "+str(int(rtskip)))
 
-RTEST.close()
+    if rtpass == 0 and rtfail == 0 and rtskip == 0 and os.path.isfile(rtestoutfile):
+        print(rtestoutfile+":")
+        os.system("tail "+rtestoutfile)
 
-rtpass = rtpass/num_proc
-rtfail = rtfail/num_proc
-rtskip = rtskip/num_proc
+    return 0
 
-print("Regrid from file test results: "+rtestoutfile)
-print("PASS  = "+str(int(rtpass)))
-print("FAIL  = "+str(int(rtfail)))
-print("SKIP  = "+str(int(rtskip)))
 
-if rtpass == 0 and rtfail == 0 and rtskip == 0: 
-    print(rtestoutfile+":")
-    os.system("tail "+rtestoutfile)
+if __name__ == '__main__':
+    sys.exit(main())
@@ -71,6 +71,71 @@ class TestField(TestBase):
         del (self.field)
         assert (not hasattr(self, 'field'))
 
+    def test_field_garbage_collected(self):
+        import gc
+        import weakref
+
+        grid = Grid(np.array([10, 10]), coord_sys=CoordSys.CART)
+        field = Field(grid, name='garbage')
+        ref = weakref.ref(field)
+        allocation = weakref.ref(field._allocation)
+
+        # reference counting frees the Field at once, without the cyclic
+        # garbage collector, while the data keeps the ESMF allocation alive
+        gc.disable()
+        try:
+            data = field.data
+            data[...] = 1.
+            del field
+            self.assertIsNone(ref())
+            self.assertFalse(allocation().destroyed)
+            self.assertTrue(np.all(data == 1.))
+
+            # without references the ESMF allocation is released
+            del data
+            self.assertIsNone(allocation())
+        finally:
+            gc.enable()
+
+        grid.destroy()
+
+    def test_field_pool(self):
+        grid = Grid(np.array([10, 10]), coord_sys=CoordSys.CART)
+        pool = FieldPool(max_fields=1)
+
+        with pool.field(grid) as field:
+            self.assertTrue(np.all(field.data == 0))
+            field.data[...] = 1.
+        self.assertEqual(len(pool), 1)
+        self.assertEqual(pool.misses, 1)
+
+        # an idle Field cannot be returned a second time
+        self.assertRaises(ValueError, pool.release, field)
+        self.assertEqual(len(pool), 1)
+
+        # the same Field is handed out again, zeroed on return
+        with pool.field(grid, typekind=TypeKind.R8) as field2:
+            self.assertIs(field2, field)
+            self.assertTrue(np.all(field2.data == 0))
+
+            # a Field with other extra dimensions is a new Field
+            with pool.field(grid, ndbounds=[2]) as field3:
+                self.assertIsNot(field3, field)
+                self.assertEqual(field3.ndbounds, [2])
+        self.assertEqual(pool.hits, 1)
+        self.assertEqual(pool.misses, 2)
+
+        # the pool is full when the outer Field is returned, it is destroyed
+        self.assertEqual(len(pool), 1)
+        self.assertTrue(field.finalized)
+        self.assertFalse(field3.finalized)
+
+        pool.clear()
+        self.assertEqual(len(pool), 0)
+        self.assertTrue(field3.finalized)
+
+        grid.destroy()
+
     @attr('serial')
     def test_numpy_funcs(self):
         field = self.make_field(np.array([10, 10], dtype=np.int32))
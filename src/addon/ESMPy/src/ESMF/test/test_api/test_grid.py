@@ -7,6 +7,7 @@ import ESMF
 from ESMF import *
 from ESMF.interface.cbindings import *
 from ESMF.test.base import TestBase, attr
+import ESMF.util.fingerprint as fingerprint
 
 import numpy as np
 import os
@@ -289,6 +290,42 @@ class TestGrid(TestBase):
                                      name = "cubed_sphere")
             grid.add_item(GridItem.MASK)
             grid.add_item(GridItem.AREA)
+
+            # every local DE holds its own part of a tile
+            local_size = 0
+            for localde in range(grid.local_decount):
+                lb, ub = grid.get_bounds(localde=localde)
+                shape = tuple(ub - lb)
+                self.assertTrue(all(np.array(shape) <= 45))
+                lat = grid.get_coords(1, localde=localde)
+                self.assertEqual(lat.shape, shape)
+                self.assertTrue(np.all(np.abs(lat) <= 90))
+                self.assertEqual(grid.get_item(GridItem.MASK, localde=localde).shape, shape)
+                self.assertEqual(grid.get_item(GridItem.AREA, localde=localde).shape, shape)
+                local_size += np.prod(shape)
+            if pet_count() == 1:
+                self.assertEqual(grid.local_decount, 16)
+                self.assertEqual(local_size, 6 * 45 * 45)
+            self.assertIs(grid.get_coords(0), grid.coords[StaggerLoc.CENTER][0])
+            # a PET without DEs holds empty arrays
+            if grid.local_decount == 0:
+                self.assertEqual(grid.get_coords(1).size, 0)
+                self.assertEqual(grid.get_item(GridItem.MASK).size, 0)
+                self.assertEqual(tuple(grid.get_bounds()[1]), (0, 0))
+            with self.assertRaises(ValueError):
+                grid.get_coords(0, localde=max(grid.local_decount, 1))
+
+            # the Field has the DEs of the Grid, aliased to ESMF memory
+            field = Field(grid)
+            self.assertEqual(field.local_decount, grid.local_decount)
+            for localde in range(grid.local_decount):
+                data = field.get_data(localde=localde)
+                self.assertEqual(data.shape, grid.get_coords(0, localde=localde).shape)
+                data[...] = localde
+            for localde in range(grid.local_decount):
+                self.assertTrue(np.all(field.get_data(localde=localde) == localde))
+            field.destroy()
+
             # # slicing just the first de (slicing doesn't work for multiple des)
             # grid2 = grid[2:10, 4:7]
             # self.examine_grid_attributes(grid)
@@ -552,6 +589,138 @@ class TestGrid(TestBase):
                 for k in range(gridZCoord_check.shape[z]):
                     assert (gridZCoord_check[i, j, k] == float(k))
 
+    def test_grid_corners_from_cf_bounds(self):
+        [x, y] = [0, 1]
+
+        xs = np.linspace(0, 12, 13)
+        ys = np.linspace(-10, 10, 21)
+        xbounds = np.array([xs[:-1], xs[1:]]).T
+        ybounds = np.array([ys[:-1], ys[1:]]).T
+
+        grid = Grid(np.array([12, 20]), coord_sys=CoordSys.CART)
+        grid.set_corners_from_cf_bounds([xbounds, ybounds])
+        assert grid.has_corners
+
+        lb = grid.lower_bounds[StaggerLoc.CORNER]
+        gridXCorner = grid.get_coords(x, staggerloc=StaggerLoc.CORNER)
+        gridYCorner = grid.get_coords(y, staggerloc=StaggerLoc.CORNER)
+        for i in range(gridXCorner.shape[x]):
+            assert np.all(gridXCorner[i, :] == xs[lb[x] + i])
+        for j in range(gridYCorner.shape[y]):
+            assert np.all(gridYCorner[:, j] == ys[lb[y] + j])
+
+        self.assertRaises(ValueError, grid.set_corners_from_cf_bounds,
+                          [xbounds[1:], ybounds])
+
+        grid.destroy()
+
+    def test_grid_fingerprint(self):
+        lon = np.linspace(0.5, 359.5, 36)
+        lat = np.linspace(-85, 85, 18)
+
+        grid = Grid.from_arrays(lon, lat)
+        grid2 = Grid.from_arrays(lon, lat)
+        digest = grid.fingerprint()
+        self.assertEqual(len(digest), 64)
+        self.assertEqual(digest, grid2.fingerprint())
+
+        # the coordinates, the mask and the periodicity are part of the digest
+        grid2.get_coords(0)[...] += 1.
+        self.assertNotEqual(digest, grid2.fingerprint())
+        grid2.destroy()
+
+        grid2 = Grid.from_arrays(lon, lat, mask=np.ones([18, 36], dtype=np.int32))
+        self.assertNotEqual(digest, grid2.fingerprint())
+        grid2.destroy()
+
+        grid2 = Grid.from_arrays(lon, lat, periodic=True)
+        self.assertNotEqual(digest, grid2.fingerprint())
+        grid2.destroy()
+
+        grid.destroy()
+
+    def test_fingerprint_values(self):
+        def digest(value):
+            hasher = fingerprint.new_hasher()
+            fingerprint.update_value(hasher, value)
+            return hasher.hexdigest()
+
+        # NumPy scalars and named constants hash like the Python values, the
+        # encoding does not depend on the NumPy version
+        value = ('Grid', 2, 1, None, 0.5, 'name', True)
+        self.assertEqual(digest(value),
+                         'e9d7856b720e81d860d83ec5535bb0356699fa31bda42fdb6aacec6c751030ee')
+        self.assertEqual(digest((np.int32(2), CoordSys.SPH_DEG)),
+                         digest((2, 1)))
+        self.assertEqual(digest((np.float32(0.5), np.bool_(True))),
+                         digest((0.5, True)))
+        self.assertNotEqual(digest(0), digest(None))
+        self.assertNotEqual(digest(1), digest(1.0))
+        self.assertRaises(TypeError, digest, object())
+
+    def test_grid_from_arrays(self):
+        [x, y] = [0, 1]
+
+        lons = np.linspace(0, 360, 13)
+        lats = np.linspace(-90, 90, 7)
+        lon_bounds = np.array([lons[:-1], lons[1:]]).T
+        lat_bounds = np.array([lats[:-1], lats[1:]]).T
+        lon = lon_bounds.mean(axis=1)
+        lat = lat_bounds.mean(axis=1)
+        mask = np.ones([6, 12], dtype=np.int32)
+        mask[0, :] = 0
+        area = np.arange(72, dtype=np.float64).reshape(6, 12)
+
+        grid = Grid.from_arrays(lon, lat, lon_bounds=lon_bounds,
+                                lat_bounds=lat_bounds, mask=mask, area=area,
+                                periodic=True)
+        assert grid.num_peri_dims == 1
+        assert np.all(grid.max_index == [12, 6])
+
+        lb = grid.lower_bounds[StaggerLoc.CENTER]
+        ub = grid.upper_bounds[StaggerLoc.CENTER]
+        self.assertNumpyAll(grid.get_coords(x),
+                            np.repeat(lon[lb[x]:ub[x]].reshape(-1, 1),
+                                      ub[y] - lb[y], axis=1))
+        self.assertNumpyAll(grid.get_coords(y)[0], lat[lb[y]:ub[y]])
+        self.assertNumpyAll(grid.get_item(GridItem.MASK),
+                            mask.T[lb[x]:ub[x], lb[y]:ub[y]])
+        self.assertNumpyAll(grid.get_item(GridItem.AREA),
+                            area.T[lb[x]:ub[x], lb[y]:ub[y]])
+
+        clb = grid.lower_bounds[StaggerLoc.CORNER]
+        cub = grid.upper_bounds[StaggerLoc.CORNER]
+        self.assertNumpyAll(grid.get_coords(x, staggerloc=StaggerLoc.CORNER)[:, 0],
+                            lons[clb[x]:cub[x]])
+        self.assertNumpyAll(grid.get_coords(y, staggerloc=StaggerLoc.CORNER)[0],
+                            lats[clb[y]:cub[y]])
+        grid.destroy()
+
+        # curvilinear coordinates and vertices in the CF (lat, lon) order
+        lon_corner, lat_corner = np.meshgrid(lons[:7], lats)
+        lon2d, lat2d = np.meshgrid(lon[:6], lat)
+        lon_vertices = np.stack([lon_corner[:-1, :-1], lon_corner[:-1, 1:],
+                                 lon_corner[1:, 1:], lon_corner[1:, :-1]], axis=-1)
+        lat_vertices = np.stack([lat_corner[:-1, :-1], lat_corner[:-1, 1:],
+                                 lat_corner[1:, 1:], lat_corner[1:, :-1]], axis=-1)
+
+        grid = Grid.from_arrays(lon2d, lat2d, lon_bounds=lon_vertices,
+                                lat_bounds=lat_vertices)
+        assert np.all(grid.max_index == [6, 6])
+
+        lb = grid.lower_bounds[StaggerLoc.CENTER]
+        ub = grid.upper_bounds[StaggerLoc.CENTER]
+        self.assertNumpyAll(grid.get_coords(x), lon2d.T[lb[x]:ub[x], lb[y]:ub[y]])
+        self.assertNumpyAll(grid.get_coords(y), lat2d.T[lb[x]:ub[x], lb[y]:ub[y]])
+
+        clb = grid.lower_bounds[StaggerLoc.CORNER]
+        cub = grid.upper_bounds[StaggerLoc.CORNER]
+        self.assertNumpyAll(grid.get_coords(x, staggerloc=StaggerLoc.CORNER),
+                            lon_corner.T[clb[x]:cub[x], clb[y]:cub[y]])
+        self.assertNumpyAll(grid.get_coords(y, staggerloc=StaggerLoc.CORNER),
+                            lat_corner.T[clb[x]:cub[x], clb[y]:cub[y]])
+        grid.destroy()
+
     def test_grid_mask(self):
 
         max_index = np.array([120, 200])
@@ -637,6 +806,15 @@ class TestGrid(TestBase):
 
         self.examine_grid_attributes(grid)
 
+        # the 1D coordinates are broadcast without copies
+        [lon, lat] = [0, 1]
+        gridLon = grid.get_coords(lon)
+        gridLat = grid.get_coords(lat)
+        assert gridLon.shape == tuple(grid.size[StaggerLoc.CENTER])
+        assert gridLon.strides[lat] == 0
+        assert gridLat.strides[lon] == 0
+        assert not gridLon.flags.writeable
+
     @attr('data')
     def test_grid_create_from_file_scrip(self):
         reg_decomp = [pet_count(), 1]
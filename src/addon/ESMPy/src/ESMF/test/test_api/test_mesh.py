@@ -137,6 +137,40 @@ class TestMesh(TestBase):
 
         self.assertNumpyAll(mesh.area, elemArea)
 
+    @attr('serial')
+    def test_mesh_3d_coords(self):
+        # a single hexahedron, the coordinates are interleaved with stride 3
+        mesh = Mesh(parametric_dim=3, spatial_dim=3, coord_sys=CoordSys.CART)
+
+        num_node = 8
+        nodeId = np.arange(1, num_node + 1)
+        nodeCoord = np.array([0.0, 0.0, 0.0,
+                              1.0, 0.0, 0.0,
+                              0.0, 2.0, 0.0,
+                              1.0, 2.0, 0.0,
+                              0.0, 0.0, 3.0,
+                              1.0, 0.0, 3.0,
+                              0.0, 2.0, 3.0,
+                              1.0, 2.0, 3.0])
+        nodeOwner = np.zeros(num_node)
+
+        elemType = np.array([MeshElemType.HEX])
+        elemConn = np.array([0, 1, 3, 2, 4, 5, 7, 6])
+        elemCoord = np.array([0.5, 1.0, 1.5])
+
+        mesh.add_nodes(num_node, nodeId, nodeCoord, nodeOwner)
+        mesh.add_elements(1, np.array([1]), elemType, elemConn,
+                          element_coords=elemCoord)
+
+        self.assertNumpyAll(mesh.nodes_per_elem, np.array([8], dtype=np.int32))
+
+        nodeCoord = nodeCoord.reshape(num_node, 3)
+        for coord_dim in range(3):
+            self.assertNumpyAll(mesh.get_coords(coord_dim),
+                                nodeCoord[:, coord_dim])
+            self.assertNumpyAll(mesh.get_coords(coord_dim, meshloc=element),
+                                elemCoord[coord_dim:coord_dim + 1])
+
     @attr('data')
     def test_mesh_create_from_file_scrip(self):
         try:
@@ -155,6 +189,38 @@ class TestMesh(TestBase):
         except:
             raise NameError('mesh_create_from_file_scrip failed!')
 
+        # connectivity is retrieved from ESMF for meshes created from file
+        self.assertEqual(mesh_from_file.element_conn.dtype, np.int32)
+        self.assertEqual(mesh_from_file.nodes_per_elem.size,
+                         mesh_from_file.size_owned[element])
+        self.assertEqual(mesh_from_file.element_conn.size,
+                         mesh_from_file.nodes_per_elem.sum())
+        self.assertTrue(np.all(mesh_from_file.element_conn >= 0))
+        self.assertTrue(np.all(mesh_from_file.element_conn < mesh_from_file.size[node]))
+
+    @attr('data')
+    def test_mesh_create_from_file_ngons(self):
+        esmfdir = os.path.dirname(inspect.getfile(ESMF))
+        mesh = Mesh(filename=os.path.join(esmfdir, "test/data/ne4np4-pentagons.nc"),
+                    filetype=FileFormat.SCRIP)
+
+        # pentagons are split into triangles internally, the connectivity
+        # still has one entry per element of the file
+        self.assertEqual(mesh.nodes_per_elem.size, mesh.size_owned[element])
+        self.assertEqual(mesh.element_conn.size, mesh.nodes_per_elem.sum())
+        self.assertTrue(np.all(mesh.nodes_per_elem >= 3))
+        self.assertTrue(np.all(mesh.nodes_per_elem <= 5))
+        if constants._ESMF_MPIRUN_NP == 1:
+            self.assertEqual(mesh.nodes_per_elem.size, 866)
+            self.assertEqual(np.bincount(mesh.nodes_per_elem).tolist(),
+                             [0, 0, 0, 8, 714, 144])
+
+        # each element references distinct nodes
+        offsets = np.cumsum(mesh.nodes_per_elem) - mesh.nodes_per_elem
+        for start, count in zip(offsets, mesh.nodes_per_elem):
+            conn = mesh.element_conn[start:start + count]
+            self.assertEqual(np.unique(conn).size, count)
+
     def test_mesh_copy(self):
         parallel = False
         if constants._ESMF_MPIRUN_NP != 4:
@@ -14,6 +14,8 @@ from ESMF.test.base import TestBase, attr
 from ESMF.util.field_utilities import compare_fields
 from ESMF.util.grid_utilities import *
 from ESMF.util.mesh_utilities import *
+from ESMF.util import weight_file
+from ESMF.util.helpers import reduce_val
 
 
 class TestRegrid(TestBase):
@@ -43,6 +45,25 @@ class TestRegrid(TestBase):
 
         return dstfield, srcfracfield, dstfracfield
 
+    def _grid_pair_(self, src_shape=(8, 8), dst_shape=(10, 12)):
+        """Return a source Grid on [0, 4] x [0, 4] and a destination Grid on
+        [0.5, 3.5] x [0.5, 3.5] inside it, with the given numbers of cells."""
+        srcgrid = grid_create_from_bounds([0, 4], [0, 4], *src_shape)
+        dstgrid = grid_create_from_bounds([0.5, 3.5], [0.5, 3.5], *dst_shape)
+        return srcgrid, dstgrid
+
+    def _factor_regrid_(self, srcfield, dstfield, create=Regrid, **kwargs):
+        """Create a regridding operator with ``factors=True`` by calling
+        ``create``, skipping the test if ESMF was built with a compiler that
+        does not support in-memory factors."""
+        try:
+            return create(srcfield, dstfield, factors=True, **kwargs)
+        except RuntimeError:
+            if constants._ESMF_USE_INMEM_FACTORS:
+                raise
+            else:
+                raise SkipTest("compiler does not support in-memory weights")
+
     def test_field_regrid(self):
         # create grids
         max_index = np.array([20, 20])
@@ -187,6 +208,225 @@ class TestRegrid(TestBase):
 
                 rh.destroy()
 
+    @attr('parallel')
+    def test_field_regrid_weights_csr(self):
+        srcgrid, dstgrid = self._grid_pair_()
+
+        srcfield = Field(srcgrid, name='srcfield')
+        dstfield = Field(dstgrid, name='dstfield')
+
+        rh = self._factor_regrid_(srcfield, dstfield,
+                                  regrid_method=RegridMethod.BILINEAR,
+                                  line_type=LineType.CART)
+
+        coo = rh.get_weights_dict()
+        csr = rh.get_weights_dict(csr=True)
+        self.assertEqual(set(csr.keys()), set(['indptr', 'col_src', 'weights']))
+        self.assertIs(rh.get_weights_dict(csr=True)['indptr'], csr['indptr'])
+        self.assertFalse(csr['weights'].flags.writeable)
+        self.assertTrue(rh.get_weights_dict(deep_copy=True, csr=True)['weights'].flags.writeable)
+        if pet_count() == 1:
+            self.assertEqual(csr['indptr'].size, 10 * 12 + 1)
+        self.assertEqual(csr['indptr'][-1], coo['weights'].size)
+
+        # the rows expanded from the pointers give the sorted COO factors
+        rows = np.repeat(np.arange(1, csr['indptr'].size), np.diff(csr['indptr']))
+        order = np.lexsort((coo['col_src'], coo['row_dst']))
+        self.assertNumpyAll(rows, coo['row_dst'][order].astype(rows.dtype))
+        self.assertNumpyAll(csr['col_src'], coo['col_src'][order])
+        self.assertNumpyAll(csr['weights'], coo['weights'][order])
+
+        rh.destroy()
+
+    @attr('serial')
+    def test_field_regrid_apply_sparse(self):
+        try:
+            import scipy
+        except ImportError:
+            raise SkipTest("SciPy is not available")
+
+        srcgrid, dstgrid = self._grid_pair_()
+
+        srcfield = Field(srcgrid, name='srcfield')
+        dstfield = Field(dstgrid, name='dstfield')
+        xctfield = Field(dstgrid, name='xctfield')
+
+        srcfield = initialize_field_grid(srcfield)
+        xctfield = initialize_field_grid(xctfield)
+
+        rh = self._factor_regrid_(srcfield, dstfield,
+                                  regrid_method=RegridMethod.BILINEAR,
+                                  line_type=LineType.CART)
+        dstfield = rh(srcfield, dstfield)
+
+        # the sparse path reproduces the ESMF application
+        actual = rh.apply_sparse(srcfield.data)
+        self.assertEqual(actual.shape, dstfield.data.shape)
+        self.assertNumpyAllClose(actual, dstfield.data)
+
+        # results may be written into an existing array
+        out = np.zeros(dstfield.data.shape)
+        ret = rh.apply_sparse(srcfield.data, out=out)
+        self.assertEqual(id(ret), id(out))
+        self.assertNumpyAllClose(out, dstfield.data)
+
+        # extra dimensions are carried through the multiplication
+        stack = np.zeros(srcfield.data.shape + (3, 2))
+        for lev in range(3):
+            for time in range(2):
+                stack[:, :, lev, time] = srcfield.data * (lev + time + 1)
+        actual = rh.apply_sparse(stack)
+        self.assertEqual(actual.shape, dstfield.data.shape + (3, 2))
+        self.assertNumpyAllClose(actual[:, :, 2, 1], dstfield.data * 4)
+
+        with self.assertRaises(ValueError):
+            rh.apply_sparse(np.zeros((2, 2)))
+
+        rh.destroy()
+
+    @attr('serial')
+    def test_field_regrid_apply_sparse_mesh_ids(self):
+        try:
+            import scipy
+        except ImportError:
+            raise SkipTest("SciPy is not available")
+
+        # the node ids of the Mesh run from 11 to 88 for 64 nodes
+        mesh, nodeCoord, nodeOwner, elemType, elemConn = mesh_create_50()
+        dstgrid = grid_create_from_bounds([0.5, 3.5], [0.5, 3.5], 6, 6)
+
+        srcfield = Field(mesh, name='srcfield', meshloc=MeshLoc.NODE)
+        dstfield = Field(dstgrid, name='dstfield')
+
+        rh = self._factor_regrid_(srcfield, dstfield,
+                                  regrid_method=RegridMethod.BILINEAR)
+
+        with self.assertRaises(ValueError):
+            rh.apply_sparse(srcfield.data)
+
+        rh.destroy()
+
+    @attr('serial')
+    def test_field_regrid_apply_batch(self):
+        srcgrid, dstgrid = self._grid_pair_()
+
+        srcfield = Field(srcgrid, name='srcfield')
+        dstfield = Field(dstgrid, name='dstfield')
+        srcfield = initialize_field_grid(srcfield)
+
+        rh = Regrid(srcfield, dstfield, regrid_method=RegridMethod.BILINEAR,
+                    line_type=LineType.CART)
+
+        levels, times = 3, 5
+        stack = np.zeros(srcfield.data.shape + (levels, times))
+        for lev in range(levels):
+            for time in range(times):
+                stack[:, :, lev, time] = srcfield.data * (lev + 1) + time
+
+        # uneven chunks exercise the cached partial chunk Fields
+        for chunk_size in [None, 2]:
+            actual = rh.apply_batch(stack, chunk_size=chunk_size)
+            self.assertEqual(actual.shape, dstfield.data.shape + (levels, times))
+
+            for lev in range(levels):
+                for time in range(times):
+                    srcfield.data[...] = stack[:, :, lev, time]
+                    dstfield = rh(srcfield, dstfield)
+                    self.assertNumpyAllClose(actual[:, :, lev, time],
+                                             dstfield.data)
+
+        # results may be written into an existing array
+        out = np.zeros(dstfield.data.shape + (levels, times))
+        ret = rh.apply_batch(stack, dst_data=out, chunk_size=4)
+        self.assertEqual(id(ret), id(out))
+        self.assertNumpyAllClose(out, actual)
+
+        with self.assertRaises(ValueError):
+            rh.apply_batch(srcfield.data)
+
+        rh.destroy()
+        self.assertEqual(len(rh._batch_fields), 0)
+
+    @attr('serial')
+    def test_field_regrid_cache(self):
+        srcgrid, dstgrid = self._grid_pair_()
+
+        srcfield = Field(srcgrid, name='srcfield')
+        dstfield = Field(dstgrid, name='dstfield')
+        srcfield = initialize_field_grid(srcfield)
+
+        cache = RegridCache(max_entries=2)
+
+        rh_bilinear = cache(srcfield, dstfield,
+                            regrid_method=RegridMethod.BILINEAR,
+                            line_type=LineType.CART)
+        self.assertEqual((cache.hits, cache.misses), (0, 1))
+
+        # the same request returns the live Regrid
+        rh = cache(srcfield, dstfield, regrid_method=RegridMethod.BILINEAR,
+                   line_type=LineType.CART)
+        self.assertIs(rh, rh_bilinear)
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+        self.assertIn(rh.meta['cache_key'], cache)
+
+        rh_patch = cache(srcfield, dstfield, regrid_method=RegridMethod.PATCH,
+                         line_type=LineType.CART)
+        self.assertEqual(len(cache), 2)
+
+        # a third operator evicts the least recently used one
+        rh_nearest = cache(srcfield, dstfield,
+                           regrid_method=RegridMethod.NEAREST_STOD,
+                           line_type=LineType.CART)
+        self.assertEqual(len(cache), 2)
+        self.assertTrue(rh_bilinear.finalized)
+        self.assertFalse(rh_patch.finalized)
+        self.assertFalse(rh_nearest.finalized)
+
+        # evicted operators are recreated on demand
+        rh = cache(srcfield, dstfield, regrid_method=RegridMethod.BILINEAR,
+                   line_type=LineType.CART)
+        self.assertIsNot(rh, rh_bilinear)
+        self.assertEqual(cache.misses, 4)
+        self.assertTrue(rh_patch.finalized)
+        dstfield = rh(srcfield, dstfield)
+
+        cache.clear()
+        self.assertEqual(len(cache), 0)
+        self.assertTrue(rh.finalized)
+        self.assertTrue(rh_nearest.finalized)
+
+    @attr('serial')
+    def test_field_regrid_cache_bytes(self):
+        srcgrid, dstgrid = self._grid_pair_()
+
+        srcfield = Field(srcgrid, name='srcfield')
+        dstfield = Field(dstgrid, name='dstfield')
+
+        # the batch Fields of one operator exceed the budget
+        cache = RegridCache(max_bytes=dstfield.data.nbytes * 4)
+
+        # the RouteHandle size is estimated from the factor count
+        with self.assertRaises(ValueError):
+            cache(srcfield, dstfield, regrid_method=RegridMethod.BILINEAR,
+                  line_type=LineType.CART)
+
+        rh_bilinear = self._factor_regrid_(srcfield, dstfield, create=cache,
+                                           regrid_method=RegridMethod.BILINEAR,
+                                           line_type=LineType.CART)
+        self.assertGreaterEqual(cache.nbytes,
+                                rh_bilinear.get_factors()[0].size * 32)
+        rh_bilinear.apply_batch(np.zeros(srcfield.data.shape + (8,)))
+        self.assertGreater(cache.nbytes, cache.max_bytes)
+
+        # the most recently used entry is kept even if it exceeds the budget
+        rh_patch = cache(srcfield, dstfield, regrid_method=RegridMethod.PATCH,
+                         line_type=LineType.CART, factors=True)
+        self.assertEqual(len(cache), 1)
+        self.assertTrue(rh_bilinear.finalized)
+        self.assertFalse(rh_patch.finalized)
+
+        cache.clear()
+
     @attr('parallel')
     def test_field_regrid_file1(self):
         mgr = Manager()
@@ -470,6 +710,351 @@ class TestRegrid(TestBase):
             if os.path.isfile(path):
                 os.remove(path)
 
+    @attr('parallel')
+    def test_field_regrid_file_mmap(self):
+        mgr = Manager()
+        filename = 'esmpy_test_field_regrid_file_mmap.nc'
+        path = os.path.join(os.getcwd(), filename)
+        if local_pet() == 0:
+            if os.path.isfile(path):
+                os.remove(path)
+        mgr.barrier()
+
+        srcgrid, dstgrid = self._grid_pair_((16, 12), (10, 14))
+
+        srcfield = Field(srcgrid, name='srcfield')
+        dstfield = Field(dstgrid, name='dstfield')
+        mmapfield = Field(dstgrid, name='mmapfield')
+
+        x = srcgrid.get_coords(0)
+        y = srcgrid.get_coords(1)
+        srcfield.data[...] = 2. + x * y
+
+        _ = Regrid(srcfield, dstfield, filename=filename,
+                   regrid_method=RegridMethod.BILINEAR)
+        mgr.barrier()
+
+        regrid = RegridFromFile(srcfield, dstfield, filename=filename)
+        regrid(srcfield, dstfield)
+        regrid_mmap = RegridFromFile(srcfield, mmapfield, filename=filename,
+                                     mmap=True)
+        regrid_mmap(srcfield, mmapfield)
+        self.assertEqual(regrid_mmap.filename, filename)
+        self.assertNumpyAllClose(dstfield.data, mmapfield.data)
+
+        if pet_count() == 1:
+            with weight_file.WeightFile(filename) as weights:
+                self.assertEqual(weights.n_a, 16 * 12)
+                self.assertEqual(weights.n_b, 10 * 14)
+                factors, rows, cols = weights.read()
+                self.assertEqual(factors.size, weights.n_s)
+                self.assertTrue(np.all((rows >= 1) & (rows <= weights.n_b)))
+                self.assertTrue(np.all((cols >= 1) & (cols <= weights.n_a)))
+
+                # the shares of all PETs cover the factors exactly once
+                shares = [weights.read_local(pet, 3) for pet in range(3)]
+                self.assertNumpyAll(np.concatenate([share[0] for share in shares]),
+                                    factors)
+
+                selected = weights.read_rows(5, 20)
+                select = (rows >= 5) & (rows < 20)
+                self.assertNumpyAll(selected[0], factors[select])
+                self.assertNumpyAll(selected[2], cols[select])
+
+            try:
+                import scipy
+            except ImportError:
+                pass
+            else:
+                actual = regrid.apply_sparse(srcfield.data)
+                self.assertNumpyAllClose(actual, dstfield.data)
+
+        regrid.destroy()
+        regrid_mmap.destroy()
+        mgr.barrier()
+
+        if local_pet() == 0:
+            if os.path.isfile(path):
+                os.remove(path)
+
+    @attr('parallel')
+    def test_field_regrid_compose(self):
+        srcgrid, dstgrid = self._grid_pair_((16, 12), (10, 14))
+        midgrid = grid_create_from_bounds([0.25, 3.75], [0.25, 3.75], 20, 18)
+
+        srcfield = Field(srcgrid, name='srcfield')
+        midfield = Field(midgrid, name='midfield')
+        dstfield = Field(dstgrid, name='dstfield')
+        composedfield = Field(dstgrid, name='composedfield')
+
+        x = srcgrid.get_coords(0)
+        y = srcgrid.get_coords(1)
+        srcfield.data[...] = 2. + x * y
+
+        first = self._factor_regrid_(srcfield, midfield,
+                                     regrid_method=RegridMethod.BILINEAR)
+        second = self._factor_regrid_(midfield, dstfield,
+                                      regrid_method=RegridMethod.BILINEAR)
+
+        first(srcfield, midfield)
+        second(midfield, dstfield)
+
+        composed = first.compose(second)
+        self.assertIs(composed.srcfield, srcfield)
+        self.assertIs(composed.dstfield, dstfield)
+        composed(srcfield, composedfield)
+        self.assertNumpyAllClose(dstfield.data, composedfield.data)
+
+        # every composed weight is the sum over the intermediate points
+        if pet_count() == 1:
+            factors, factor_index_list = composed.get_factors()
+            pairs = set(zip(factor_index_list[:, 0], factor_index_list[:, 1]))
+            self.assertEqual(len(pairs), factors.size)
+
+        with self.assertRaises(ValueError):
+            second.compose(first)
+
+        composed.destroy()
+        first.destroy()
+        second.destroy()
+
+    @attr('serial')
+    def test_field_regrid_submit(self):
+        try:
+            import concurrent.futures
+        except ImportError:
+            raise SkipTest("concurrent.futures is not available")
+
+        srcgrid, dstgrid = self._grid_pair_((16, 12), (10, 14))
+
+        srcfield = Field(srcgrid, name='srcfield')
+        dstfield = Field(dstgrid, name='dstfield')
+        asyncfields = [Field(dstgrid, name='asyncfield') for _ in range(3)]
+
+        x = srcgrid.get_coords(0)
+        y = srcgrid.get_coords(1)
+        srcfield.data[...] = 2. + x * y
+
+        regrid = Regrid(srcfield, dstfield, regrid_method=RegridMethod.BILINEAR)
+        regrid(srcfield, dstfield)
+
+        futures = [regrid.submit(srcfield, asyncfield) for asyncfield in asyncfields]
+        for future, asyncfield in zip(futures, asyncfields):
+            self.assertIs(future.result(), asyncfield)
+            self.assertNumpyAllClose(dstfield.data, asyncfield.data)
+
+        # destroy waits for pending operations
+        future = regrid.submit(srcfield, asyncfields[0])
+        regrid.destroy()
+        self.assertTrue(future.done())
+        self.assertIsNone(future.exception())
+
+    @attr('serial')
+    def test_field_regrid_threads(self):
+        try:
+            from concurrent.futures import ThreadPoolExecutor
+        except ImportError:
+            raise SkipTest("concurrent.futures is not available")
+        if not constants._ESMPY_THREAD_SAFE:
+            raise SkipTest("ESMPY_THREAD_SAFE is not set")
+
+        srcgrid, dstgrid = self._grid_pair_((16, 12), (10, 14))
+
+        x = srcgrid.get_coords(0)
+        y = srcgrid.get_coords(1)
+
+        def run(ii):
+            srcfield = Field(srcgrid, name='srcfield')
+            dstfield = Field(dstgrid, name='dstfield')
+            srcfield.data[...] = ii + x * y
+            regrid = Regrid(srcfield, dstfield,
+                            regrid_method=RegridMethod.BILINEAR)
+            regrid(srcfield, dstfield)
+            ret = dstfield.data.copy()
+            # the second destroy is a no-op
+            regrid.destroy()
+            regrid.destroy()
+            srcfield.destroy()
+            dstfield.destroy()
+            return ret
+
+        expected = [run(ii) for ii in range(8)]
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            actual = list(executor.map(run, range(8)))
+        for ii in range(8):
+            self.assertNumpyAllClose(actual[ii], expected[ii])
+
+    @attr('parallel')
+    def test_field_regrid_to_file(self):
+        mgr = Manager()
+        filename = 'esmpy_test_field_regrid_to_file.nc'
+        path = os.path.join(os.getcwd(), filename)
+
+        srcgrid, dstgrid = self._grid_pair_((16, 12), (10, 14))
+
+        srcfield = Field(srcgrid, name='srcfield')
+        dstfield = Field(dstgrid, name='dstfield')
+        filefield = Field(dstgrid, name='filefield')
+
+        x = srcgrid.get_coords(0)
+        y = srcgrid.get_coords(1)
+        srcfield.data[...] = 2. + x * y
+
+        regrid = self._factor_regrid_(srcfield, dstfield,
+                                      regrid_method=RegridMethod.BILINEAR)
+        regrid(srcfield, dstfield)
+
+        # the chunks cover the factors in order
+        factors, factor_index_list = regrid.get_factors()
+        chunks = list(regrid.iter_factors(chunk_size=7))
+        self.assertTrue(all(chunk[0].size <= 7 for chunk in chunks))
+        if factors.size > 0:
+            self.assertNumpyAll(np.concatenate([chunk[0] for chunk in chunks]),
+                                factors)
+            self.assertNumpyAll(np.concatenate([chunk[1] for chunk in chunks]),
+                                factor_index_list)
+
+        regrid.to_file(filename, chunk_size=7)
+
+        with weight_file.WeightFile(filename) as weights:
+            self.assertEqual(weights.n_a, 16 * 12)
+            self.assertEqual(weights.n_b, 10 * 14)
+            if pet_count() == 1:
+                S, row, col = weights.read()
+                self.assertNumpyAll(S, factors)
+                self.assertNumpyAll(row, factor_index_list[:, 1].copy())
+                self.assertNumpyAll(col, factor_index_list[:, 0].copy())
+
+        regrid_file = RegridFromFile(srcfield, filefield, filename=filename,
+                                     mmap=True)
+        regrid_file(srcfield, filefield)
+        self.assertNumpyAllClose(dstfield.data, filefield.data)
+
+        regrid_file.destroy()
+        regrid.destroy()
+        mgr.barrier()
+
+        if local_pet() == 0:
+            if os.path.isfile(path):
+                os.remove(path)
+
+    @attr('parallel')
+    def test_field_regrid_transpose(self):
+        srcgrid, dstgrid = self._grid_pair_((16, 12), (10, 14))
+
+        srcfield = Field(srcgrid, name='srcfield')
+        dstfield = Field(dstgrid, name='dstfield')
+        adjfield = Field(srcgrid, name='adjfield')
+
+        x = srcgrid.get_coords(0)
+        y = srcgrid.get_coords(1)
+        srcfield.data[...] = 2. + x * y
+
+        regrid = self._factor_regrid_(srcfield, dstfield,
+                                      regrid_method=RegridMethod.BILINEAR)
+
+        regrid(srcfield, dstfield)
+        adjoint = regrid.transpose()
+        self.assertIs(adjoint.srcfield, dstfield)
+        self.assertIs(adjoint.dstfield, srcfield)
+
+        factors, factor_index_list = adjoint.get_factors()
+        self.assertNumpyAll(factors, regrid.get_factors()[0])
+        self.assertNumpyAll(factor_index_list,
+                            regrid.get_factors()[1][:, ::-1].copy())
+
+        # the adjoint satisfies <W x, y> = <x, W^T y>
+        xx = dstgrid.get_coords(0)
+        dst_values = 1. + xx ** 2
+        dstvalues = Field(dstgrid, name='dstvalues')
+        dstvalues.data[...] = dst_values
+        adjoint(dstvalues, adjfield)
+        lhs = reduce_val(np.sum(dstfield.data * dst_values))
+        rhs = reduce_val(np.sum(srcfield.data * adjfield.data))
+        if local_pet() == 0:
+            self.assertAlmostEqual(lhs, rhs)
+
+        adjoint.destroy()
+        regrid.destroy()
+
+    @attr('parallel')
+    def test_field_regrid_write_weights(self):
+        mgr = Manager()
+        filename = 'esmpy_test_field_regrid_write_weights.wgt'
+        path = os.path.join(os.getcwd(), filename)
+
+        srcgrid, dstgrid = self._grid_pair_((16, 12), (10, 14))
+
+        srcfield = Field(srcgrid, name='srcfield')
+        dstfield = Field(dstgrid, name='dstfield')
+        filefield = Field(dstgrid, name='filefield')
+
+        x = srcgrid.get_coords(0)
+        y = srcgrid.get_coords(1)
+        srcfield.data[...] = 2. + x * y
+
+        regrid = self._factor_regrid_(srcfield, dstfield,
+                                      regrid_method=RegridMethod.BILINEAR)
+        regrid(srcfield, dstfield)
+
+        # a small chunk size sends, sorts and converts the factors in pieces
+        for weight_dtype, chunk_size in [(np.float64, 1048576), (np.float32, 7)]:
+            regrid.write_weights(filename, weight_dtype=weight_dtype,
+                                 chunk_size=chunk_size)
+            mgr.barrier()
+
+            self.assertTrue(weight_file.is_compact(filename))
+            with weight_file.CompactWeights(filename) as weights:
+                self.assertEqual(weights.n_a, 16 * 12)
+                self.assertEqual(weights.n_b, 10 * 14)
+                self.assertEqual(weights.indptr[-1], weights.n_s)
+                self.assertTrue(np.all(np.diff(weights.indptr) >= 0))
+                factors, rows, cols = weights.read()
+                self.assertEqual(factors.dtype, np.float64)
+                self.assertTrue(np.all(np.diff(rows) >= 0))
+                self.assertTrue(np.all((cols >= 1) & (cols <= weights.n_a)))
+                self.assertEqual(len(weights.src_fingerprint), 64)
+                if pet_count() == 1:
+                    self.assertEqual(weights.n_s, regrid.get_factors()[0].size)
+
+            regrid_file = RegridFromFile(srcfield, filefield, filename=filename)
+            regrid_file(srcfield, filefield)
+            self.assertNumpyAllClose(dstfield.data, filefield.data)
+            regrid_file.destroy()
+            mgr.barrier()
+
+        regrid.destroy()
+        mgr.barrier()
+
+        if local_pet() == 0:
+            if os.path.isfile(path):
+                os.remove(path)
+
+    @attr('serial')
+    def test_weight_file_compact_deltas(self):
+        filename = 'esmpy_test_weight_file_compact_deltas.wgt'
+        if local_pet() != 0:
+            return
+
+        # a smooth mapping into a large source, the first column of each row
+        # is close to the first column of the previous row
+        n_a, n_b = 1000000, 1000
+        rows = np.repeat(np.arange(1, n_b + 1), 4)
+        cols = 900000 + 3 * rows - 3 + np.tile(np.arange(4), n_b)
+        factors = np.linspace(0, 1, rows.size)
+
+        weight_file.write_compact(filename, factors[::-1], rows[::-1],
+                                  cols[::-1], n_a, n_b)
+        with weight_file.CompactWeights(filename) as weights:
+            self.assertEqual(weights._deltas.dtype, np.uint8)
+            actual_factors, actual_rows, actual_cols = weights.read()
+            self.assertNumpyAll(actual_rows, rows.astype(np.int32))
+            self.assertNumpyAll(actual_cols, cols.astype(np.int32))
+            self.assertNumpyAll(actual_factors, factors)
+            _, actual_rows, actual_cols = weights.read_rows(500, 600)
+            select = (rows >= 500) & (rows < 600)
+            self.assertNumpyAll(actual_cols, cols[select].astype(np.int32))
+        os.remove(filename)
 
     @attr('parallel')
     def test_field_regrid_file4(self):
@@ -566,6 +1151,63 @@ class TestRegrid(TestBase):
             if os.path.isfile(path):
                 os.remove(path)
 
+    def test_field_regrid_file_cache(self):
+        import shutil
+
+        mgr = Manager()
+        directory = os.path.join(os.getcwd(), 'regrid_file_cache')
+        if local_pet() == 0:
+            if os.path.isdir(directory):
+                shutil.rmtree(directory)
+        mgr.barrier()
+
+        srcgrid, dstgrid = self._grid_pair_()
+
+        srcfield = Field(srcgrid, name='srcfield')
+        dstfield = Field(dstgrid, name='dstfield')
+
+        srcfield = initialize_field_grid(srcfield)
+
+        cache = RegridFileCache(directory)
+
+        # the first call computes the weights and writes the RouteHandle
+        rh = cache(srcfield, dstfield, regrid_method=RegridMethod.BILINEAR,
+                   line_type=LineType.CART)
+        self.assertIsInstance(rh, Regrid)
+        self.assertEqual((cache.hits, cache.misses), (0, 1))
+        key = rh.meta['cache_key']
+        self.assertTrue(os.path.isfile(cache.path(key)))
+        dstfield = rh(srcfield, dstfield)
+        expected = dstfield.data.copy()
+        rh.destroy()
+
+        # the second call with the same geometry and options is a hit
+        dstfield.data[...] = 0
+        rh = cache(srcfield, dstfield, regrid_method=RegridMethod.BILINEAR,
+                   line_type=LineType.CART)
+        self.assertIsInstance(rh, Regrid)
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+        self.assertEqual(rh.meta['cache_key'], key)
+        self.assertEqual(rh.regrid_method, RegridMethod.BILINEAR)
+        dstfield = rh(srcfield, dstfield)
+        self.assertNumpyAllClose(dstfield.data, expected)
+        rh.destroy()
+
+        # different options and different coordinates change the key
+        self.assertNotEqual(cache.key(srcfield, dstfield,
+                                      regrid_method=RegridMethod.PATCH,
+                                      line_type=LineType.CART), key)
+        srcgrid.get_coords(0)[...] += 1e-6
+        self.assertNotEqual(cache.key(srcfield, dstfield,
+                                      regrid_method=RegridMethod.BILINEAR,
+                                      line_type=LineType.CART), key)
+
+        cache.clear()
+        self.assertFalse(os.path.isfile(cache.path(key)))
+
+        if local_pet() == 0:
+            shutil.rmtree(directory)
+
     def test_field_regrid_gridmesh(self):
         # create mesh
         parallel = False
@@ -748,6 +1390,118 @@ class TestRegrid(TestBase):
             if (dstarea.data[i] != 0.25):
                 assert (dstarea.data[i] == 0.125)
 
+    @attr('serial')
+    def test_compare_fields_masked(self):
+        grid = grid_create_from_bounds([0, 4], [0, 4], 16, 12, corners=True)
+        mask = grid.add_item(GridItem.MASK)
+        mask[...] = 1
+        mask[2:5, 3:7] = 0
+        mask[10, :] = 2
+
+        uninitval = 422397696.
+        np.random.seed(7)
+        exactfield = Field(grid, name='exactfield')
+        exactfield.data[...] = np.random.uniform(-1, 1, exactfield.data.shape)
+        exactfield.data[0, :] = 0.
+        dstfield = Field(grid, name='dstfield')
+        dstfield.data[...] = exactfield.data + \
+            np.random.uniform(-1e-3, 1e-3, dstfield.data.shape)
+        dstfield.data[5, 5] = uninitval
+        dstfracfield = Field(grid, name='dstfracfield')
+        dstfracfield.data[...] = 1.
+        dstfracfield.data[7, :] = 0.5
+
+        # the error metrics computed one point at a time
+        mask_values = [0, 2]
+        totalErr = 0.0
+        max_error = 0.0
+        num_nodes = 0
+        field1_flat = np.ravel(dstfield.data)
+        field2_flat = np.ravel(exactfield.data)
+        frac_flat = np.ravel(dstfracfield.data)
+        mask_flat = np.ravel(mask)
+        for i in range(field2_flat.size):
+            if ((mask_flat[i] not in mask_values) and
+                (field1_flat[i] != uninitval) and
+                (frac_flat[i] >= 0.999)):
+                err = abs(field1_flat[i]/frac_flat[i] - field2_flat[i])
+                if field2_flat[i] != 0.0:
+                    err = err/abs(field2_flat[i])
+                num_nodes += 1
+                totalErr += err
+                max_error = max(max_error, err)
+
+        meanrel, csrvrel, correct = compare_fields(dstfield, exactfield,
+                                                   1., 1., 10e-15,
+                                                   dstfracfield=dstfracfield,
+                                                   mass1=1., mass2=1.,
+                                                   uninitval=uninitval,
+                                                   mask_values=mask_values)
+
+        self.assertAlmostEqual(meanrel, totalErr/num_nodes, places=14)
+        self.assertEqual(csrvrel, 0.0)
+        # the max error tolerance passes just above and fails just below the
+        # maximum error of the loop
+        meanrel, csrvrel, correct = compare_fields(dstfield, exactfield,
+                                                   1., max_error * 1.000001,
+                                                   10e-15,
+                                                   dstfracfield=dstfracfield,
+                                                   mass1=1., mass2=1.,
+                                                   uninitval=uninitval,
+                                                   mask_values=mask_values)
+        self.assertTrue(correct)
+        meanrel, csrvrel, correct = compare_fields(dstfield, exactfield,
+                                                   1., max_error * 0.999999,
+                                                   10e-15,
+                                                   dstfracfield=dstfracfield,
+                                                   mass1=1., mass2=1.,
+                                                   uninitval=uninitval,
+                                                   mask_values=mask_values)
+        self.assertFalse(correct)
+
+    @attr('serial')
+    def test_initialize_field_mesh_ngons(self):
+        mesh, nodeCoord, nodeOwner, elemType, elemConn = \
+            mesh_create_50_ngons()
+        self.assertTrue(np.any(elemType > MeshElemType.QUAD))
+
+        field = Field(mesh, name='field', meshloc=MeshLoc.ELEMENT)
+        field = initialize_field_mesh(field, nodeCoord, nodeOwner, elemType,
+                                      elemConn)
+
+        # the analytic field computed one element at a time, polygons at the
+        # mean of their nodes
+        offset = 0
+        for i in range(mesh.size_owned[MeshLoc.ELEMENT]):
+            num_nodes = int(elemType[i])
+            nodes = elemConn[offset:offset+num_nodes]
+            if num_nodes == MeshElemType.QUAD:
+                x = (nodeCoord[nodes[0]*2] + nodeCoord[nodes[1]*2]) / 2.0
+                y = (nodeCoord[nodes[1]*2+1] + nodeCoord[nodes[3]*2+1]) / 2.0
+            else:
+                x = np.mean(nodeCoord[nodes*2])
+                y = np.mean(nodeCoord[nodes*2+1])
+            offset += num_nodes
+            self.assertAlmostEqual(field.data[i], 20.0 + x**2 + x*y + y**2)
+
+    @attr('serial')
+    def test_initialize_field_mesh_3d(self):
+        # the HEX value of a 3D mesh is not a polygon with 12 nodes
+        mesh = Mesh(parametric_dim=3, spatial_dim=3, coord_sys=CoordSys.CART)
+        nodeCoord = np.array([0.0, 0.0, 0.0, 1.0, 0.0, 0.0,
+                              0.0, 2.0, 0.0, 1.0, 2.0, 0.0,
+                              0.0, 0.0, 3.0, 1.0, 0.0, 3.0,
+                              0.0, 2.0, 3.0, 1.0, 2.0, 3.0])
+        nodeOwner = np.zeros(8)
+        elemType = np.array([MeshElemType.HEX])
+        elemConn = np.array([0, 1, 3, 2, 4, 5, 7, 6])
+        mesh.add_nodes(8, np.arange(1, 9), nodeCoord, nodeOwner)
+        mesh.add_elements(1, np.array([1]), elemType, elemConn)
+
+        field = Field(mesh, name='field', meshloc=MeshLoc.ELEMENT)
+        self.assertRaises(ValueError, initialize_field_mesh, field, nodeCoord,
+                          nodeOwner, elemType, elemConn)
+
     @attr('parallel')
     def test_field_regrid_periodic(self):
         parallel = False
@@ -4,6 +4,15 @@
 unit test file
 """
 
+try:
+    from unittest import SkipTest
+except ImportError:
+    from nose import SkipTest
+
+import os
+import subprocess
+import sys
+
 from ESMF import *
 from ESMF.interface.cbindings import *
 from ESMF.test.base import TestBase, attr
@@ -28,6 +37,43 @@ class TestCbindings(TestBase):
         print ('\npet_count = {0}\n'.format(petcount))
 
 
+    @attr('serial')
+    def test_lazy_load_thread_safe(self):
+        if pet_count() > 1:
+            raise SkipTest("the library is loaded in a serial subprocess")
+
+        # once loaded, calls must not go through the lazy stand-ins
+        snippet = "\n".join([
+            "import threading",
+            "import ESMF",
+            "from ESMF.interface import loadESMF",
+            "from ESMF.util.grid_utilities import grid_create_from_bounds",
+            "assert isinstance(loadESMF._ESMF, loadESMF._LockedLibrary)",
+            "assert isinstance(loadESMF._ESMF._library, loadESMF._LazyLibrary)",
+            "ESMF.Manager()",
+            "def _load_function_(self, name):",
+            "    raise AssertionError(name + ' called through the stand-in')",
+            "loadESMF._LazyLibrary._load_function_ = _load_function_",
+            "grid = grid_create_from_bounds([0, 4], [0, 4], 8, 8)",
+            "def run():",
+            "    srcfield = ESMF.Field(grid)",
+            "    dstfield = ESMF.Field(grid)",
+            "    srcfield.data[...] = 1.",
+            "    regrid = ESMF.Regrid(srcfield, dstfield,",
+            "                         regrid_method=ESMF.RegridMethod.BILINEAR)",
+            "    regrid(srcfield, dstfield)",
+            "    regrid.destroy()",
+            "    done.append(True)",
+            "done = []",
+            "threads = [threading.Thread(target=run) for _ in range(4)]",
+            "for thread in threads: thread.start()",
+            "for thread in threads: thread.join()",
+            "run()",
+            "assert len(done) == 5",
+        ])
+        env = dict(os.environ, ESMPY_LAZY_LOAD='1', ESMPY_THREAD_SAFE='1')
+        subprocess.check_call([sys.executable, '-c', snippet], env=env)
+
     def test_interfaceint(self):
         Narray = np.array([4,5,6], dtype=np.int32)
         interfaceint = ESMP_InterfaceInt(Narray)
@@ -8,10 +8,14 @@ decorators
 
 import warnings
 import functools
+import threading
 
 from ESMF.api.constants import LogKind, _ESMF_NETCDF
 from ESMF.util.exceptions import NetCDFMissing
 
+# re-entrant lock guarding the Python side state of ESMPy objects
+_lock = threading.RLock()
+
 try:
     import nose
 
@@ -77,10 +81,22 @@ def initialize(func):
     def new_func(*args, **kwargs):
         from ESMF.api import esmpymanager
 
-        esmp = esmpymanager.Manager(debug = False)
+        with _lock:
+            esmp = esmpymanager.Manager(debug = False)
         return func(*args, **kwargs)
     return new_func
 
+def synchronized(func):
+    '''This is a decorator that can be used to run a function while
+    holding the lock that guards the Python side state of ESMPy objects,
+    so that e.g. an object is not destroyed twice by concurrent threads.'''
+
+    @functools.wraps(func)
+    def new_func(*args, **kwargs):
+        with _lock:
+            return func(*args, **kwargs)
+    return new_func
+
 def netcdf(func):
     '''This is a decorator that can be used to error out of functions
     if NetCDF is not available.'''
@@ -11,7 +11,42 @@ import numpy.ma as ma
 import ctypes as ct
 import sys
 
-def ndarray_from_esmf(data, dtype, shape):
+class ESMFAllocation(object):
+    """
+    Handle of the ESMF allocation of an ESMPy object, shared by the object
+    and by the arrays aliasing the ESMF memory.  The handle does not
+    reference the object, so reference counting frees it as soon as neither
+    the object nor any of its arrays is in use, and the allocation is
+    released at that time.
+
+    :param struct: the ESMF struct or routehandle of the allocation
+    :param release: function releasing the allocation, called once with the
+        handle
+    :param parents: handles of allocations that must outlive this one, e.g.
+        the Grid of a Field
+    """
+
+    def __init__(self, struct, release, parents=()):
+        self.struct = struct
+        self._release = release
+        self._parents = tuple(parents)
+
+    def __del__(self):
+        self.destroy()
+
+    @property
+    def destroyed(self):
+        return '_release' not in self.__dict__
+
+    def destroy(self):
+        # popping the function makes concurrent calls release only once
+        release = self.__dict__.pop('_release', None)
+        if release is not None:
+            release(self)
+            self._parents = ()
+
+
+def ndarray_from_esmf(data, dtype, shape, owner=None):
     '''
     :param data: buffer of fortran allocated ESMF array
     :type data: ctypes void_p
@@ -19,6 +54,8 @@ def ndarray_from_esmf(data, dtype, shape):
     :type dtype: ESMF.TypeKind
     :param shape: N-D Python shape corresponding to 1D ESMF allocation
     :type shape: list or tuple
+    :param owner: the :class:`ESMFAllocation` of the ESMF memory, it is kept
+        alive as long as the array or a view of it is referenced
     :return: numpy array representing the data with dtype and shape
     '''
     # find the size of the local coordinates
@@ -26,7 +63,13 @@ def ndarray_from_esmf(data, dtype, shape):
            np.dtype(constants._ESMF2PythonType[dtype]).itemsize
 
     # create a numpy array to point to the ESMF data allocation
-    if sys.version_info[0] >= 3:
+    if sys.version_info[0] >= 3 and owner is not None:
+        # the base of the array holds a reference to the allocation handle,
+        # so the ESMF memory is not released under the array
+        address = ct.cast(data, ct.c_void_p).value or 0
+        buffer = (ct.c_char * int(size)).from_address(address)
+        buffer._owner = owner
+    elif sys.version_info[0] >= 3:
         buffer = ct.pythonapi.PyMemoryView_FromMemory
         buffer.restype = ct.py_object
         buffer = buffer(data, ct.c_int(size), 0x200)
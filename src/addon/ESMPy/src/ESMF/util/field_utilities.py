@@ -43,12 +43,6 @@ def compare_fields(field1, field2, itrp_mean_tol, itrp_max_tol, csrv_tol,
     if dstfracfield is None:
         dstfracfield = ma.ones(field1.data.shape)
 
-    # compute pointwise error measures
-    totalErr = 0.0
-    max_error = 0.0
-    min_error = 1000000.0
-    num_nodes = 0
-
     # allow fields of all dimensions
     field1_flat = np.ravel(field1.data)
     field2_flat = np.ravel(field2.data)
@@ -56,28 +50,30 @@ def compare_fields(field1, field2, itrp_mean_tol, itrp_max_tol, csrv_tol,
     # setup mask, no Mask on a Mesh (yet) so need to look at the type first
     if ((type(field2.grid) is ESMF.Grid) and
         (field2.grid.mask[field2.staggerloc] is not None)):
-        if (field2.grid.mask[field2.staggerloc] is not None):
-            field2mask_flat = [True if x in mask_values else False for x in field2.grid.mask[field2.staggerloc].flatten().tolist()]
+        field2mask_flat = np.isin(field2.grid.mask[field2.staggerloc].ravel(),
+                                  mask_values)
     else:
-        field2mask_flat = np.ravel(np.zeros_like(field2.data))
-
-    for i in range(field2_flat.size):     
-        if ((not field2mask_flat[i]) and 
-            (field1_flat[i] != uninitval) and 
-            (dstfracfield_flat[i] >= 0.999)):
-            if (field2_flat.data[i] != 0.0):
-                err = abs(field1_flat[i]/dstfracfield_flat[i] - \
-                            field2_flat[i])/abs(field2_flat[i])
-            else:
-                err = abs(field1_flat[i]/dstfracfield_flat[i] - \
-                            field2_flat[i])
-            num_nodes += 1
-            totalErr += err
-            if (err > max_error):
-                max_error = err
-            if (err < min_error):
-                min_error = err
+        field2mask_flat = np.zeros(field2_flat.size, dtype=bool)
+
+    # compute pointwise error measures on the points that are not masked,
+    # have been initialized and are fully covered by the source
+    valid = np.logical_not(field2mask_flat)
+    valid &= field1_flat != uninitval
+    valid &= dstfracfield_flat >= 0.999
 
+    exact = field2_flat[valid]
+    err = np.abs(field1_flat[valid]/dstfracfield_flat[valid] - exact)
+    nonzero = exact != 0.0
+    err[nonzero] /= np.abs(exact[nonzero])
+
+    num_nodes = err.size
+    totalErr = float(np.sum(err))
+    max_error = 0.0
+    min_error = 1000000.0
+    if num_nodes > 0:
+        # NaN errors are skipped by the extrema, as in a scalar comparison
+        max_error = max(max_error, float(np.fmax.reduce(err)))
+        min_error = min(min_error, float(np.fmin.reduce(err)))
 
     # gather error on processor 0 or set global variables in serial case
     mass1_global = 0.
@@ -0,0 +1,200 @@
+"""
+Utilities for computing digests of Grid, Mesh and LocStream geometry
+"""
+
+import hashlib
+import numbers
+
+import numpy as np
+
+from ESMF.api.constants import Reduce
+from ESMF.api.esmpymanager import Manager
+
+# number of 32 bit words in a sha256 digest
+_DIGEST_WORDS = 8
+
+# size of the blocks copied when hashing arrays that are not contiguous
+_BLOCK_BYTES = 1 << 22
+
+
+def new_hasher():
+    """
+    Return a new hash object used for all geometry digests.
+    :return: hashlib.sha256 object
+    """
+    return hashlib.sha256()
+
+
+def update_value(hasher, value):
+    """
+    Add a scalar value (or None) to the hash, including its type so that e.g.
+    ``0`` and ``None`` do not collide.  Values are encoded from their number or
+    text rather than their ``repr``, which changed for NumPy scalars in NumPy
+    2.0, so Python and NumPy scalars and named constants of the same value
+    give the same digest across versions.
+    :param hasher: hash object returned by new_hasher()
+    :param value: scalar value, named constant, sequence of scalars or None
+    """
+    if isinstance(value, (list, tuple)):
+        hasher.update(b'seq')
+        hasher.update(str(len(value)).encode())
+        for v in value:
+            update_value(hasher, v)
+    elif value is None:
+        hasher.update(b'None;')
+    elif isinstance(value, (bool, np.bool_)):
+        hasher.update(('bool:%d;' % bool(value)).encode())
+    elif isinstance(value, (numbers.Integral, np.integer)):
+        hasher.update(('int:%d;' % int(value)).encode())
+    elif isinstance(value, (numbers.Real, np.floating)):
+        hasher.update(('float:%s;' % float(value).hex()).encode())
+    elif isinstance(value, (bytes, type(u''))):
+        if not isinstance(value, bytes):
+            value = value.encode('utf-8')
+        hasher.update(('str:%d:' % len(value)).encode())
+        hasher.update(value)
+    else:
+        raise TypeError("cannot hash a value of type {}".format(
+            type(value).__name__))
+
+
+def update_array(hasher, array):
+    """
+    Add an array (or None) to the hash.  The array is hashed in Fortran order
+    without copying when the array already has that layout, which is the case
+    for all arrays that are linked to ESMF allocations.  Other arrays, e.g.
+    slices, are copied and hashed in blocks, which gives the same digest.
+    :param hasher: hash object returned by new_hasher()
+    :param array: numpy array or None
+    """
+    if array is None:
+        hasher.update(b'None')
+        return
+    array = np.asarray(array)
+    update_value(hasher, (array.dtype.str,) + tuple(array.shape))
+    # the transpose of a Fortran ordered array is C contiguous
+    array = array.T
+    if array.flags.c_contiguous:
+        hasher.update(array.data)
+        return
+    rows = max(1, _BLOCK_BYTES // max(1, array[0].nbytes))
+    for start in range(0, array.shape[0], rows):
+        hasher.update(np.ascontiguousarray(array[start:start + rows]).data)
+
+
+def _update_grid_(hasher, grid):
+    update_value(hasher, ('Grid', grid.rank, grid.coord_sys,
+                          grid.num_peri_dims, grid.periodic_dim,
+                          grid.pole_dim))
+    update_array(hasher, grid.max_index)
+    for localde in range(len(grid._coords_de)):
+        # the first DE is hashed as before DEs were distinguished
+        if localde > 0:
+            update_value(hasher, ('de', localde))
+        _update_grid_de_(hasher, grid, localde)
+
+
+def _update_grid_de_(hasher, grid, localde):
+    for stagger in range(len(grid._coords_de[localde])):
+        if not any(coord is not None
+                   for coord in grid._coords_de[localde][stagger]):
+            continue
+        update_value(hasher, stagger)
+        update_array(hasher, grid._lower_bounds_de[localde][stagger])
+        update_array(hasher, grid._upper_bounds_de[localde][stagger])
+        # 1D coordinates are hashed once, not as their broadcast views
+        coords = grid._coords_1d_de[localde][stagger] or \
+                 grid._coords_de[localde][stagger]
+        for coord in coords:
+            update_array(hasher, coord)
+        update_array(hasher, grid._mask_de[localde][stagger])
+        update_array(hasher, grid._area_de[localde][stagger])
+
+
+def _update_mesh_(hasher, mesh):
+    update_value(hasher, ('Mesh', mesh.parametric_dim, mesh.spatial_dim,
+                          mesh.coord_sys))
+    if mesh.node_coords is not None:
+        # Mesh created in memory, use the arrays provided by the user
+        for array in [mesh.node_ids, mesh.node_coords, mesh.node_owners,
+                      mesh.element_ids, mesh.element_types,
+                      mesh.element_conn, mesh.element_mask,
+                      mesh.element_area, mesh.element_coords]:
+            update_array(hasher, array)
+    else:
+        # Mesh created from file, use the coordinates retrieved from ESMF
+        for meshloc in range(len(mesh.coords)):
+            update_value(hasher, meshloc)
+            for coord in mesh.coords[meshloc]:
+                update_array(hasher, coord)
+            update_array(hasher, mesh.mask[meshloc])
+            update_array(hasher, mesh.area[meshloc])
+        update_array(hasher, mesh.element_conn)
+
+
+def _update_locstream_(hasher, locstream):
+    update_value(hasher, ('LocStream', locstream.size))
+    for key in sorted(locstream.keys()):
+        update_value(hasher, key)
+        update_array(hasher, locstream[key])
+
+
+def update_geometry(hasher, geometry):
+    """
+    Add the local piece of a Grid, Mesh or LocStream to the hash.
+    :param hasher: hash object returned by new_hasher()
+    :param geometry: Grid, Mesh or LocStream
+    """
+    # the geometry modules import this module
+    from ESMF.api.grid import Grid
+    from ESMF.api.mesh import Mesh
+    from ESMF.api.locstream import LocStream
+
+    if isinstance(geometry, Grid):
+        _update_grid_(hasher, geometry)
+    elif isinstance(geometry, Mesh):
+        _update_mesh_(hasher, geometry)
+    elif isinstance(geometry, LocStream):
+        _update_locstream_(hasher, geometry)
+    else:
+        raise TypeError("geometry must be a Grid, Mesh or LocStream")
+
+
+def reduce_digest(hasher):
+    """
+    Combine the local digests of all PETs into a single hexadecimal digest
+    that is identical on every PET.  This is a collective call.
+
+    The local digest is salted with the PET number, split into 32 bit words
+    and summed over the VM in double precision, which is exact for any
+    realistic PET count.  The sums are broadcast and hashed again.
+    :param hasher: hash object returned by new_hasher()
+    :return: str
+    """
+    mg = Manager()
+    local = hasher.copy()
+    update_value(local, ('pet', mg.local_pet, mg.pet_count))
+    if mg.pet_count == 1:
+        return local.hexdigest()
+
+    words = np.frombuffer(local.digest(), dtype='>u4')
+    send_buf = np.array(words, dtype=np.float64)
+    recv_buf = np.zeros(_DIGEST_WORDS, dtype=np.float64)
+    mg._reduce_(send_buf, recv_buf, _DIGEST_WORDS, reduceflag=Reduce.SUM)
+    mg._broadcast_(recv_buf, _DIGEST_WORDS)
+
+    combined = new_hasher()
+    update_array(combined, recv_buf)
+    return combined.hexdigest()
+
+
+def digest(geometry):
+    """
+    Return the digest of a Grid, Mesh or LocStream, identical on all PETs.
+    This is a collective call.
+    :param geometry: Grid, Mesh or LocStream
+    :return: str
+    """
+    hasher = new_hasher()
+    update_geometry(hasher, geometry)
+    return reduce_digest(hasher)
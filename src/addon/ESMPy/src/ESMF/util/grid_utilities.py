@@ -75,21 +75,7 @@ def grid_create_from_coordinates(xcoords, ycoords, xcorners=False, ycorners=Fals
 
     # create grid corners in a slightly different manner to account for the bounds format common in CF-like files
     if corners:
-        grid.add_coords([ESMF.StaggerLoc.CORNER])
-        lbx = grid.lower_bounds[ESMF.StaggerLoc.CORNER][x]
-        ubx = grid.upper_bounds[ESMF.StaggerLoc.CORNER][x]
-        lby = grid.lower_bounds[ESMF.StaggerLoc.CORNER][y]
-        uby = grid.upper_bounds[ESMF.StaggerLoc.CORNER][y]
-
-        gridXCorner = grid.get_coords(x, staggerloc=ESMF.StaggerLoc.CORNER)
-        for i0 in range(ubx - lbx - 1):
-            gridXCorner[i0, :] = xcorners[i0+lbx, 0]
-        gridXCorner[i0 + 1, :] = xcorners[i0+lbx, 1]
-
-        gridYCorner = grid.get_coords(y, staggerloc=ESMF.StaggerLoc.CORNER)
-        for i1 in range(uby - lby - 1):
-            gridYCorner[:, i1] = ycorners[i1+lby, 0]
-        gridYCorner[:, i1 + 1] = ycorners[i1+lby, 1]
+        grid.set_corners_from_cf_bounds([xcorners, ycorners])
 
     # add an arbitrary mask
     if domask:
@@ -160,21 +146,7 @@ def grid_create_from_coordinates_periodic(longitudes, latitudes, lon_corners=Fal
 
     # create grid corners in a slightly different manner to account for the bounds format common in CF-like files
     if corners:
-        grid.add_coords([ESMF.StaggerLoc.CORNER])
-        lbx = grid.lower_bounds[ESMF.StaggerLoc.CORNER][lon]
-        ubx = grid.upper_bounds[ESMF.StaggerLoc.CORNER][lon]
-        lby = grid.lower_bounds[ESMF.StaggerLoc.CORNER][lat]
-        uby = grid.upper_bounds[ESMF.StaggerLoc.CORNER][lat]
-
-        gridXCorner = grid.get_coords(lon, staggerloc=ESMF.StaggerLoc.CORNER)
-        for i0 in range(ubx - lbx - 1):
-            gridXCorner[i0, :] = lon_corners[i0+lbx, 0]
-        gridXCorner[i0 + 1, :] = lon_corners[i0+lbx, 1]
-
-        gridYCorner = grid.get_coords(lat, staggerloc=ESMF.StaggerLoc.CORNER)
-        for i1 in range(uby - lby - 1):
-            gridYCorner[:, i1] = lat_corners[i1+lby, 0]
-        gridYCorner[:, i1 + 1] = lat_corners[i1+lby, 1]
+        grid.set_corners_from_cf_bounds([lon_corners, lat_corners])
 
     # add an arbitrary mask
     if domask:
@@ -259,28 +231,7 @@ def grid_create_from_coordinates_3d(xcoords, ycoords, zcoords, xcorners=False, y
 
     # create grid corners in a slightly different manner to account for the bounds format common in CF-like files
     if corners:
-        grid.add_coords([ESMF.StaggerLoc.CORNER_VFACE])
-        lbx = grid.lower_bounds[ESMF.StaggerLoc.CORNER_VFACE][x]
-        ubx = grid.upper_bounds[ESMF.StaggerLoc.CORNER_VFACE][x]
-        lby = grid.lower_bounds[ESMF.StaggerLoc.CORNER_VFACE][y]
-        uby = grid.upper_bounds[ESMF.StaggerLoc.CORNER_VFACE][y]
-        lbz = grid.lower_bounds[ESMF.StaggerLoc.CORNER_VFACE][z]
-        ubz = grid.upper_bounds[ESMF.StaggerLoc.CORNER_VFACE][z]
-
-        gridXCorner = grid.get_coords(x, staggerloc=ESMF.StaggerLoc.CORNER_VFACE)
-        for i0 in range(ubx - lbx - 1):
-            gridXCorner[i0, :, :] = xcorners[i0+lbx, 0]
-        gridXCorner[i0 + 1, :, :] = xcorners[i0+lbx, 1]
-
-        gridYCorner = grid.get_coords(y, staggerloc=ESMF.StaggerLoc.CORNER_VFACE)
-        for i1 in range(uby - lby - 1):
-            gridYCorner[:, i1, :] = ycorners[i1+lby, 0]
-        gridYCorner[:, i1 + 1, :] = ycorners[i1+lby, 1]
-
-        gridZCorner = grid.get_coords(z, staggerloc=ESMF.StaggerLoc.CORNER_VFACE)
-        for i2 in range(ubz - lbz - 1):
-            gridZCorner[:, :, i2] = zcorners[i2+lbz, 0]
-        gridZCorner[:, :, i2 + 1] = zcorners[i2+lbz, 1]
+        grid.set_corners_from_cf_bounds([xcorners, ycorners, zcorners])
 
     # add an arbitrary mask
     if domask:
@@ -367,28 +318,8 @@ def grid_create_from_coordinates_periodic_3d(longitudes, latitudes, heights,
 
     # create grid corners in a slightly different manner to account for the bounds format common in CF-like files
     if corners:
-        grid.add_coords([ESMF.StaggerLoc.CORNER])
-        lbx = grid.lower_bounds[ESMF.StaggerLoc.CORNER][lon]
-        ubx = grid.upper_bounds[ESMF.StaggerLoc.CORNER][lon]
-        lby = grid.lower_bounds[ESMF.StaggerLoc.CORNER][lat]
-        uby = grid.upper_bounds[ESMF.StaggerLoc.CORNER][lat]
-        lbz = grid.lower_bounds[ESMF.StaggerLoc.CORNER][z]
-        ubz = grid.upper_bounds[ESMF.StaggerLoc.CORNER][z]
-
-        gridXCorner = grid.get_coords(lon, staggerloc=ESMF.StaggerLoc.CORNER)
-        for i0 in range(ubx - lbx - 1):
-            gridXCorner[i0, :, :] = lon_corners[i0+lbx, 0]
-        gridXCorner[i0 + 1, :, :] = lon_corners[i0+lbx, 1]
-
-        gridYCorner = grid.get_coords(lat, staggerloc=ESMF.StaggerLoc.CORNER)
-        for i1 in range(uby - lby - 1):
-            gridYCorner[:, i1, :] = lat_corners[i1+lby, 0]
-        gridYCorner[:, i1 + 1, :] = lat_corners[i1+lby, 1]
-
-        gridZCorner = grid.get_coords(z, staggerloc=ESMF.StaggerLoc.CORNER)
-        for i2 in range(ubz - lbz - 1):
-            gridZCorner[:, :, i2] = z_corners[i2+lbz, 0]
-        gridZCorner[:, :, i2 + 1] = z_corners[i2+lbz, 1]
+        grid.set_corners_from_cf_bounds([lon_corners, lat_corners, z_corners],
+                                        staggerloc=ESMF.StaggerLoc.CORNER)
 
     # add an arbitrary mask
     if domask:
@@ -490,24 +421,34 @@ def initialize_field_grid_3d(field, domask=False):
     return field
 
 def compute_mass_grid(valuefield, dofrac=False, fracfield=None,
-                      uninitval=422397696.):
+                      uninitval=422397696., pool=None):
     '''
     PRECONDITIONS: 'fracfield' contains the fractions of each cell
                    which contributed to a regridding operation involving
                    'valuefield.  'dofrac' is a boolean value that gives 
-                   the option to not use the 'fracfield'.\n
+                   the option to not use the 'fracfield'.  The area field
+                   is taken from the FieldPool 'pool' if one is given.\n
     POSTCONDITIONS: The mass of the data field is computed.\n
     RETURN VALUES: float :: mass \n
     '''
     mass = 0.0
-    areafield = ESMF.Field(valuefield.grid, name='areafield')
-    areafield.get_area()
-
-    ind = np.where(valuefield.data != uninitval)
-
-    if dofrac:
-        mass = np.sum(areafield.data[ind] * valuefield.data[ind] * fracfield.data[ind])
+    if pool is None:
+        areafield = ESMF.Field(valuefield.grid, name='areafield')
     else:
-        mass = np.sum(areafield.data[ind] * valuefield.data[ind])
+        areafield = pool.acquire(valuefield.grid)
+    try:
+        areafield.get_area()
+
+        ind = np.where(valuefield.data != uninitval)
+
+        if dofrac:
+            mass = np.sum(areafield.data[ind] * valuefield.data[ind] * fracfield.data[ind])
+        else:
+            mass = np.sum(areafield.data[ind] * valuefield.data[ind])
+    finally:
+        if pool is None:
+            areafield.destroy()
+        else:
+            pool.release(areafield)
 
     return mass
@@ -1338,7 +1338,9 @@ def mesh_create_50_ngons_parallel(domask=False, doarea=False):
 def initialize_field_mesh(field, nodeCoord, nodeOwner, elemType, elemConn,
                           domask=False, elemMask=None):
     '''
-    PRECONDITIONS: A Field has been created on the elements of a Mesh.
+    PRECONDITIONS: A Field has been created on the elements or the nodes of
+                   a Mesh.  'elemType' holds TRI, QUAD or, for polygons,
+                   the number of nodes of each element.
     POSTCONDITIONS: The Field has been initialized to an analytic 
                     field.
     RETURN VALUES: \n Field :: field \n
@@ -1346,56 +1348,69 @@ def initialize_field_mesh(field, nodeCoord, nodeOwner, elemType, elemConn,
 
     [node, element] = [0,1]
 
+    nodeCoord = np.asarray(nodeCoord)
+    xcoord = nodeCoord[0::2]
+    ycoord = nodeCoord[1::2]
+
     if field.staggerloc == element:
-        offset = 0
-        for i in range(field.grid.size_owned[element]):
-            if (elemType[i] == ESMF.MeshElemType.TRI):
-                x1 = nodeCoord[(elemConn[offset])*2]
-                x2 = nodeCoord[(elemConn[offset+1])*2]
-                x3 = nodeCoord[(elemConn[offset+2])*2]
-                y1 = nodeCoord[(elemConn[offset])*2+1]
-                y2 = nodeCoord[(elemConn[offset+1])*2+1]
-                y3 = nodeCoord[(elemConn[offset+2])*2+1]
-                x = (x1 + x2 + x3) / 3.0
-                y = (y1 + y2 + y3) / 3.0
-                offset = offset + 3
-            elif (elemType[i] == ESMF.MeshElemType.QUAD):
-                x1 = nodeCoord[(elemConn[offset])*2]
-                x2 = nodeCoord[(elemConn[offset+1])*2]
-                y1 = nodeCoord[(elemConn[offset+1])*2+1]
-                y2 = nodeCoord[(elemConn[offset+3])*2+1]
-                x = (x1 + x2) / 2.0
-                y = (y1 + y2) / 2.0
-                offset = offset + 4
-            else:
-                raise ValueError("Elem type is not supported.")
-
-            #print ('[{0},{1}] = {2}'.format(x,y,field.data[i]))
-            field.data[i] = 20.0 + x**2 +x*y + y**2
-
-            if domask:
-                # calculate field
-                if (elemMask[i] == 0):
-                    field.data[i] = 0
+        num_elem = field.grid.size_owned[element]
+        elem_type = np.asarray(elemType[:num_elem], dtype=np.int64)
+        # polygons are given by their number of nodes in 2D meshes only, the
+        # TETRA and HEX values of 3D meshes must not be taken as node counts
+        if field.grid.parametric_dim != 2 or \
+                np.any(elem_type < ESMF.MeshElemType.TRI):
+            raise ValueError("Elem type is not supported.")
+
+        # the number of nodes of TRI, QUAD and polygons is the type value,
+        # the connectivity of every element starts at the cumulative offset
+        offsets = np.zeros(num_elem, dtype=np.int64)
+        np.cumsum(elem_type[:-1], out=offsets[1:])
+        conn = np.asarray(elemConn[:int(elem_type.sum())], dtype=np.int64)
+
+        # the centroid of triangles and polygons, the nodes are summed in
+        # the order of the connectivity
+        x = np.zeros(num_elem)
+        y = np.zeros(num_elem)
+        for k in range(int(elem_type.max()) if num_elem > 0 else 0):
+            has = elem_type > k
+            x[has] += xcoord[conn[offsets[has]+k]]
+            y[has] += ycoord[conn[offsets[has]+k]]
+        x /= elem_type
+        y /= elem_type
+
+        # the center of quadrilaterals is taken from opposite sides
+        quad = offsets[elem_type == ESMF.MeshElemType.QUAD]
+        x[elem_type == ESMF.MeshElemType.QUAD] = \
+            (xcoord[conn[quad]] + xcoord[conn[quad+1]]) / 2.0
+        y[elem_type == ESMF.MeshElemType.QUAD] = \
+            (ycoord[conn[quad+1]] + ycoord[conn[quad+3]]) / 2.0
+
+        field.data[:num_elem] = 20.0 + x**2 +x*y + y**2
+
+        if domask:
+            # calculate field
+            mask = np.asarray(elemMask[:num_elem]) == 0
+            field.data[:num_elem][mask] = 0
 
-    
     elif field.staggerloc == node:
-        ind = 0
-        for i in range(field.grid.size[node]):
-            x = nodeCoord[i*2]
-            y = nodeCoord[i*2+1]
-
-            if (nodeOwner[i] == ESMF.local_pet()):
-                if ind > field.grid.size_owned[node]:
-                    raise ValueError("Overstepped the mesh bounds!")
-                field.data[ind] = 20.0 + x**2 +x*y + y**2
-                #print ('[{0},{1}] = {2}'.format(x,y,field.data[ind]))
-                ind += 1
-
-            if domask:
-                # calculate field
-                if (elemMask[i] == 0):
-                    field.data[i] = 0
+        num_node = field.grid.size[node]
+        owned = np.flatnonzero(np.asarray(nodeOwner[:num_node]) == ESMF.local_pet())
+        if owned.size > field.grid.size_owned[node] + 1:
+            raise ValueError("Overstepped the mesh bounds!")
+
+        # the owned nodes are stored in the order of the nodes
+        x = xcoord[owned]
+        y = ycoord[owned]
+        field.data[:owned.size] = 20.0 + x**2 +x*y + y**2
+
+        if domask:
+            # calculate field, the mask is applied by node position and is
+            # overwritten by the value of an owned node stored there later
+            masked = np.flatnonzero(np.asarray(elemMask[:num_node]) == 0)
+            later = np.zeros(masked.size, dtype=bool)
+            stored = masked < owned.size
+            later[stored] = owned[masked[stored]] > masked[stored]
+            field.data[masked[~later]] = 0
 
     else:
         raise ValueError("Field staggerloc is not supported")
@@ -1403,25 +1418,36 @@ def initialize_field_mesh(field, nodeCoord, nodeOwner, elemType, elemConn,
     return field
 
 def compute_mass_mesh(valuefield, dofrac=False, fracfield=None,
-                      uninitval=422397696.):
+                      uninitval=422397696., pool=None):
     '''
     PRECONDITIONS: 'fracfield' contains the fractions of each cell
                    which contributed to a regridding operation involving
                    'valuefield.  'dofrac' is a boolean value that gives 
-                   the option to not use the 'fracfield'.\n
+                   the option to not use the 'fracfield'.  The area field
+                   is taken from the FieldPool 'pool' if one is given.\n
     POSTCONDITIONS: The mass of the data field is computed.\n
     RETURN VALUES: float :: mass \n
     '''
     mass = 0.0
     # mesh area field must be built on elements
-    areafield = ESMF.Field(valuefield.grid, name='areafield',
-                           meshloc=ESMF.MeshLoc.ELEMENT)
-    areafield.get_area()
-
-    ind = np.where(valuefield.data != uninitval)
-    if dofrac:
-        mass = np.sum(areafield.data[ind[0]] * valuefield.data[ind[0]] * fracfield.data[ind[0]])
+    if pool is None:
+        areafield = ESMF.Field(valuefield.grid, name='areafield',
+                               meshloc=ESMF.MeshLoc.ELEMENT)
     else:
-        mass = np.sum(areafield.data[ind[0]] * valuefield.data[ind[0]])
+        areafield = pool.acquire(valuefield.grid,
+                                 meshloc=ESMF.MeshLoc.ELEMENT)
+    try:
+        areafield.get_area()
+
+        ind = np.where(valuefield.data != uninitval)
+        if dofrac:
+            mass = np.sum(areafield.data[ind[0]] * valuefield.data[ind[0]] * fracfield.data[ind[0]])
+        else:
+            mass = np.sum(areafield.data[ind[0]] * valuefield.data[ind[0]])
+    finally:
+        if pool is None:
+            areafield.destroy()
+        else:
+            pool.release(areafield)
 
     return mass
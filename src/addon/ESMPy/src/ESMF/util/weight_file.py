@@ -0,0 +1,944 @@
+"""
+Memory-mapped readers for the factors of netCDF and compact weight files,
+a streaming writer of netCDF weight files and the writer of the compact
+format
+"""
+
+import mmap
+import os
+import struct
+
+import numpy as np
+
+# header tags of the netCDF classic formats
+_NC_DIMENSION = 10
+_NC_VARIABLE = 11
+_NC_ATTRIBUTE = 12
+
+# netCDF external types, all data is stored big-endian
+_NC_DTYPES = {1: 'i1', 2: 'S1', 3: '>i2', 4: '>i4', 5: '>f4', 6: '>f8',
+              7: 'u1', 8: '>u2', 9: '>u4', 10: '>i8', 11: '>u8'}
+
+# number of factors scanned at a time when selecting rows of unsorted files
+_CHUNK = 1 << 20
+
+# the compact format is a fixed size header followed by the number of factors
+# of each destination row, the column deltas and the weights, every section
+# starting at a multiple of _COMPACT_ALIGN bytes. Since version 2 the first
+# delta of a row is the zig-zag encoded difference to the first column of the
+# previous non-empty row, or to the first_col of the header for the first
+# row, in version 1 it was the absolute column.
+_COMPACT_MAGIC = b'ESMPYWGT'
+_COMPACT_VERSION = 2
+_COMPACT_HEADER = np.dtype([('magic', 'S8'), ('version', '<u4'),
+                            ('weight_dtype', 'S4'), ('count_dtype', 'S4'),
+                            ('delta_dtype', 'S4'), ('n_a', '<i8'),
+                            ('n_b', '<i8'), ('n_s', '<i8'),
+                            ('src_fingerprint', 'S64'),
+                            ('dst_fingerprint', 'S64'),
+                            ('first_col', '<i8')])
+_COMPACT_HEADER_SIZE = 256
+_COMPACT_ALIGN = 8
+
+
+def _pad4_(n):
+    return (n + 3) & ~3
+
+
+class _Header(object):
+    """Cursor over the header of a netCDF classic (CDF-1, CDF-2 or CDF-5)
+    file."""
+
+    def __init__(self, buf, version):
+        self.buf = buf
+        self.pos = 4
+        # counts and sizes are 64 bit in CDF-5, offsets in CDF-2 and CDF-5
+        self._count = '>q' if version == 5 else '>i'
+        self._offset = '>q' if version in [2, 5] else '>i'
+
+    def _unpack_(self, fmt):
+        ret = struct.unpack_from(fmt, self.buf, self.pos)[0]
+        self.pos += struct.calcsize(fmt)
+        return ret
+
+    def int32(self):
+        return self._unpack_('>i')
+
+    def count(self):
+        return self._unpack_(self._count)
+
+    def offset(self):
+        return self._unpack_(self._offset)
+
+    def name(self):
+        n = self.count()
+        ret = self.buf[self.pos:self.pos + n].decode('utf-8')
+        self.pos += _pad4_(n)
+        return ret
+
+    def skip_attributes(self):
+        tag = self.int32()
+        n = self.count()
+        if tag not in [0, _NC_ATTRIBUTE]:
+            raise ValueError("invalid netCDF attribute list")
+        for _ in range(n):
+            self.name()
+            nc_type = self.int32()
+            nelems = self.count()
+            self.pos += _pad4_(nelems * np.dtype(_NC_DTYPES[nc_type]).itemsize)
+
+
+class WeightFile(object):
+    """
+    Read-only memory map of the ``S``, ``row`` and ``col`` variables of a
+    netCDF weight file in one of the uncompressed classic formats (CDF-1,
+    CDF-2 or CDF-5), as written by ``ESMF_RegridWeightGen`` or
+    :class:`~ESMF.api.regrid.Regrid` with ``filename``.
+
+    Only the header is read when the file is opened.  The variables are
+    views of the mapped file, so reading a slice of the factors only touches
+    the pages holding that slice.  This allows each PET to read its own share
+    of a large weight file instead of every PET reading the whole file.
+
+    :param str filename: the path of the weight file.
+    """
+
+    def __init__(self, filename):
+        self._filename = filename
+        with open(filename, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic = self._mmap[0:4]
+        if magic[0:3] != b'CDF' or magic[3:4] not in [b'\x01', b'\x02', b'\x05']:
+            if magic == b'\x89HDF':
+                raise ValueError("{0} is a netCDF-4 file which cannot be memory-mapped, "
+                                 "use a classic format weight file".format(filename))
+            raise ValueError("{0} is not a netCDF classic file".format(filename))
+        self._version = ord(magic[3:4])
+
+        header = _Header(self._mmap, self._version)
+        numrecs = header.count()
+
+        self._dims = {}
+        dim_names = []
+        tag = header.int32()
+        ndims = header.count()
+        if tag not in [0, _NC_DIMENSION]:
+            raise ValueError("invalid netCDF dimension list")
+        for _ in range(ndims):
+            name = header.name()
+            dim_names.append(name)
+            self._dims[name] = header.count()
+
+        header.skip_attributes()
+
+        self._variables = {}
+        tag = header.int32()
+        nvars = header.count()
+        if tag not in [0, _NC_VARIABLE]:
+            raise ValueError("invalid netCDF variable list")
+        for _ in range(nvars):
+            name = header.name()
+            dimids = [header.count() for _ in range(header.count())]
+            header.skip_attributes()
+            nc_type = header.int32()
+            header.count()  # vsize
+            begin = header.offset()
+            shape = tuple(self._dims[dim_names[dimid]] for dimid in dimids)
+            # the record dimension has length zero in the header
+            if len(shape) > 0 and shape[0] == 0 and numrecs > 0:
+                shape = None
+            self._variables[name] = (_NC_DTYPES[nc_type], shape, begin)
+
+        for name in ['S', 'row', 'col']:
+            if name not in self._variables:
+                raise ValueError("{0} has no {1} variable".format(filename, name))
+            shape = self._variables[name][1]
+            if shape is None or len(shape) != 1:
+                raise ValueError("the {0} variable must be one-dimensional and "
+                                 "not a record variable".format(name))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __len__(self):
+        return self.n_s
+
+    def __repr__(self):
+        return "WeightFile:\n    filename = {0}\n    version = CDF-{1}\n" \
+               "    n_s = {2}\n    n_a = {3}\n    n_b = {4}\n".format(
+                   self.filename, self.version, self.n_s, self.n_a, self.n_b)
+
+    @property
+    def dims(self):
+        """
+        :rtype: dict
+        :return: The lengths of the dimensions of the file.
+        """
+        return self._dims
+
+    @property
+    def filename(self):
+        """
+        :rtype: str
+        :return: The path of the weight file.
+        """
+        return self._filename
+
+    @property
+    def n_a(self):
+        """
+        :rtype: int
+        :return: The size of the source, ``None`` if the file has no ``n_a``
+            dimension.
+        """
+        return self._dims.get('n_a')
+
+    @property
+    def n_b(self):
+        """
+        :rtype: int
+        :return: The size of the destination, ``None`` if the file has no
+            ``n_b`` dimension.
+        """
+        return self._dims.get('n_b')
+
+    @property
+    def n_s(self):
+        """
+        :rtype: int
+        :return: The number of factors.
+        """
+        return self._variables['S'][1][0]
+
+    @property
+    def version(self):
+        """
+        :rtype: int
+        :return: The netCDF classic format version, 1, 2 or 5.
+        """
+        return self._version
+
+    def close(self):
+        """
+        Release the memory map.  Arrays returned by :meth:`variable` keep the
+        mapping alive until they are garbage collected.
+        """
+        if self._mmap is not None:
+            try:
+                self._mmap.close()
+            except BufferError:
+                # views of the mapping are still referenced
+                pass
+            self._mmap = None
+
+    def variable(self, name):
+        """
+        Return a read-only view of a variable in the mapped file, no data is
+        read until the view is accessed.
+
+        :param str name: the name of the variable.
+        :return: big-endian ndarray
+        """
+        dtype, shape, begin = self._variables[name]
+        if shape is None:
+            raise ValueError("record variables are not supported")
+        count = int(np.prod(shape))
+        return np.frombuffer(self._mmap, dtype=dtype, count=count,
+                             offset=begin).reshape(shape)
+
+    def read(self, start=None, stop=None):
+        """
+        Read the factors ``start`` to ``stop`` (zero-based, exclusive) in file
+        order.
+
+        :param int start: the first factor, defaults to the first.
+        :param int stop: the factor after the last one, defaults to the end.
+        :return: tuple of the ``S`` (float64), ``row`` and ``col`` (int32)
+            arrays, ``row`` and ``col`` are one-based sequence indices.
+        """
+        select = slice(start, stop)
+        return (self.variable('S')[select].astype(np.float64),
+                self.variable('row')[select].astype(np.int32),
+                self.variable('col')[select].astype(np.int32))
+
+    def read_local(self, local_pet, pet_count):
+        """
+        Read the share of the factors of one PET: the factors are split into
+        ``pet_count`` contiguous blocks of the file, so every PET maps a
+        disjoint part of the file.
+
+        :param int local_pet: the PET number.
+        :param int pet_count: the number of PETs.
+        :return: tuple of factor arrays, see :meth:`read`
+        """
+        return self.read(self.n_s * local_pet // pet_count,
+                         self.n_s * (local_pet + 1) // pet_count)
+
+    def read_rows(self, row_start, row_stop, is_sorted=False):
+        """
+        Read the factors of the destination sequence indices ``row_start`` to
+        ``row_stop`` (one-based, exclusive).
+
+        :param int row_start: the first destination sequence index.
+        :param int row_stop: the destination sequence index after the last.
+        :param bool is_sorted: if ``True``, the factors are known to be sorted
+            by ``row`` and are located with a binary search that touches only
+            a few pages outside of the selected factors.  Otherwise the
+            ``row`` variable is scanned in chunks.
+        :return: tuple of factor arrays, see :meth:`read`
+        """
+        row = self.variable('row')
+        if is_sorted:
+            start = int(np.searchsorted(row, row_start, side='left'))
+            stop = int(np.searchsorted(row, row_stop, side='left'))
+            return self.read(start, stop)
+
+        select = []
+        for start in range(0, self.n_s, _CHUNK):
+            chunk = row[start:start + _CHUNK]
+            select.append(np.nonzero((chunk >= row_start) & (chunk < row_stop))[0] + start)
+        select = np.concatenate(select) if select else np.zeros(0, dtype=np.intp)
+        return (self.variable('S')[select].astype(np.float64),
+                row[select].astype(np.int32),
+                self.variable('col')[select].astype(np.int32))
+
+    def sparse_matrix(self, row_start=1, row_stop=None, is_sorted=False):
+        """
+        Return the factors of the destination sequence indices ``row_start``
+        to ``row_stop`` as a SciPy CSR matrix, whose row ``i`` is the
+        destination sequence index ``row_start + i``, for a sparse matrix
+        multiplication without ``ESMF``.
+
+        :param int row_start: the first destination sequence index.
+        :param int row_stop: the destination sequence index after the last,
+            defaults to ``n_b + 1``.
+        :param bool is_sorted: see :meth:`read_rows`.
+        :return: scipy.sparse.csr_matrix of shape
+            ``(row_stop - row_start, n_a)``
+        """
+        try:
+            from scipy.sparse import csr_matrix
+        except ImportError:
+            raise ImportError("WeightFile.sparse_matrix() requires SciPy")
+
+        if self.n_a is None or self.n_b is None:
+            raise ValueError("the n_a and n_b dimensions are required")
+        if row_stop is None:
+            row_stop = self.n_b + 1
+
+        if row_start == 1 and row_stop == self.n_b + 1:
+            S, row, col = self.read()
+        else:
+            S, row, col = self.read_rows(row_start, row_stop, is_sorted=is_sorted)
+
+        return csr_matrix((S, (row - row_start, col - 1)),
+                          shape=(row_stop - row_start, self.n_a))
+
+
+def _netcdf_header_(n_a, n_b, n_s, version):
+    """Return the header of a netCDF classic weight file with the dimensions
+    ``n_a``, ``n_b`` and ``n_s`` and the variables ``S``, ``row`` and
+    ``col``, followed directly by the data of the variables."""
+    count = '>q' if version == 5 else '>i'
+    offset = '>q'
+
+    def name(value):
+        value = value.encode('utf-8')
+        return struct.pack(count, len(value)) + value.ljust(_pad4_(len(value)), b'\0')
+
+    dims = [('n_a', n_a), ('n_b', n_b), ('n_s', n_s)]
+    # name, netCDF type, item size
+    variables = [('S', 6, 8), ('row', 4, 4), ('col', 4, 4)]
+
+    def header(begin):
+        ret = [b'CDF' + struct.pack('>B', version), struct.pack(count, 0),
+               struct.pack('>i', _NC_DIMENSION), struct.pack(count, len(dims))]
+        for dim_name, size in dims:
+            ret += [name(dim_name), struct.pack(count, size)]
+        # no global attributes
+        ret += [struct.pack('>i', 0), struct.pack(count, 0)]
+        ret += [struct.pack('>i', _NC_VARIABLE), struct.pack(count, len(variables))]
+        for var_name, nc_type, itemsize in variables:
+            vsize = _pad4_(n_s * itemsize)
+            if version != 5:
+                # the size of a large last variable is not representable
+                vsize = min(vsize, 2 ** 32 - 1)
+            ret += [name(var_name), struct.pack(count, 1), struct.pack(count, 2),
+                    struct.pack('>i', 0), struct.pack(count, 0),
+                    struct.pack('>i', nc_type), struct.pack(count, vsize),
+                    struct.pack(offset, begin)]
+            begin += _pad4_(n_s * itemsize)
+        return b''.join(ret)
+
+    # the length of the header does not depend on the offsets
+    return header(len(header(0)))
+
+
+def create_netcdf(filename, n_a, n_b, n_s):
+    """
+    Create a netCDF weight file holding ``n_s`` factors with the dimensions
+    and variables read by ``ESMF_FieldSMMStore()`` and :class:`WeightFile`.
+    The factors are written afterwards with :func:`write_netcdf_factors`, so
+    a large set of factors never has to be held in memory at once.  The
+    64-bit offset format (CDF-2) is used unless the weights need more than
+    4 GiB, then the 64-bit data format (CDF-5) is used.
+
+    :param str filename: the path of the file to create.
+    :param int n_a: the size of the source.
+    :param int n_b: the size of the destination.
+    :param int n_s: the number of factors.
+    """
+    version = 5 if n_s * 8 > 2 ** 32 - 4 else 2
+    header = _netcdf_header_(n_a, n_b, n_s, version)
+    with open(filename, 'wb') as f:
+        f.write(header)
+        f.truncate(len(header) + _pad4_(n_s * 8) + 2 * _pad4_(n_s * 4))
+
+
+def write_netcdf_factors(filename, chunks, start=0):
+    """
+    Write chunks of factors into a file created by :func:`create_netcdf`.
+    Every chunk is converted and written before the next one is taken, so
+    the memory used is bounded by the chunk size.
+
+    :param str filename: the path of the weight file.
+    :param chunks: an iterable of tuples of the weights, the one-based
+        destination and source sequence indices of consecutive factors.
+    :param int start: the position of the first factor of the first chunk.
+    :return: the position after the last factor written
+    """
+    with WeightFile(filename) as weights:
+        n_s = weights.n_s
+        # the type and offset of every variable
+        targets = [(dtype, begin) for dtype, _, begin in
+                   [weights._variables[name] for name in ['S', 'row', 'col']]]
+
+    with open(filename, 'r+b') as f:
+        for chunk in chunks:
+            size = np.asarray(chunk[0]).size
+            if start + size > n_s:
+                raise ValueError("more factors than the file holds")
+            for (dtype, begin), array in zip(targets, chunk):
+                dtype = np.dtype(dtype)
+                f.seek(begin + start * dtype.itemsize)
+                f.write(np.asarray(array).astype(dtype).tobytes())
+            start += size
+
+    return start
+
+
+def _align_(n):
+    return (n + _COMPACT_ALIGN - 1) // _COMPACT_ALIGN * _COMPACT_ALIGN
+
+
+def _uint_dtype_(max_value):
+    """Return the smallest little-endian unsigned integer type holding
+    max_value."""
+    for dtype in ['<u1', '<u2', '<u4']:
+        if max_value <= np.iinfo(dtype).max:
+            return np.dtype(dtype)
+    return np.dtype('<u8')
+
+
+def _zigzag_encode_(values):
+    """Map signed integers to unsigned ones, small magnitudes to small
+    values: 0, -1, 1, -2, ... to 0, 1, 2, 3, ..."""
+    values = np.asarray(values, dtype=np.int64)
+    return (values << 1) ^ (values >> 63)
+
+
+def _zigzag_decode_(values):
+    """Invert :func:`_zigzag_encode_`."""
+    values = np.asarray(values, dtype=np.int64)
+    return (values >> 1) ^ -(values & 1)
+
+
+def _encode_deltas_(cols, rows, previous):
+    """Return the deltas of the source indices ``cols`` of factors sorted by
+    destination index ``rows`` and source index. The first delta of a row is
+    the zig-zag encoded difference of its first column to that of the
+    previous row, or to ``previous`` for the first row, the others the
+    difference to the previous column of the row. Also returns the first
+    column of the last row."""
+    deltas = np.empty_like(cols)
+    deltas[1:] = cols[1:] - cols[:-1]
+    first = np.ones(rows.size, dtype=bool)
+    first[1:] = rows[1:] != rows[:-1]
+    first_cols = cols[first]
+    if first_cols.size == 0:
+        return deltas, previous
+    steps = np.empty_like(first_cols)
+    steps[0] = first_cols[0] - previous
+    steps[1:] = first_cols[1:] - first_cols[:-1]
+    deltas[first] = _zigzag_encode_(steps)
+    return deltas, int(first_cols[-1])
+
+
+def _compact_sections_(header):
+    """Return the dtype, length and offset of the counts, deltas and weights
+    sections described by a header."""
+    ret = []
+    offset = _COMPACT_HEADER_SIZE
+    for name, size in [('count_dtype', header['n_b']),
+                       ('delta_dtype', header['n_s']),
+                       ('weight_dtype', header['n_s'])]:
+        dtype = np.dtype(header[name].decode())
+        ret.append((dtype, int(size), offset))
+        offset = _align_(offset + int(size) * dtype.itemsize)
+    return ret
+
+
+def write_compact(filename, factors, rows, cols, n_a, n_b,
+                  weight_dtype=np.float64, src_fingerprint=None,
+                  dst_fingerprint=None):
+    """
+    Write factors to a compact weight file.  The factors are sorted into
+    rows of a CSR matrix, only the number of factors of each destination row
+    is stored and the source indices are stored as differences to the
+    previous index of the same row, or for the first factor of a row to the
+    first index of the previous row, each using the smallest unsigned integer
+    type that holds all values.
+
+    :param str filename: the path of the file to write.
+    :param ndarray factors: the weights.
+    :param ndarray rows: the one-based destination sequence indices.
+    :param ndarray cols: the one-based source sequence indices.
+    :param int n_a: the size of the source.
+    :param int n_b: the size of the destination.
+    :param dtype weight_dtype: ``numpy.float64`` (the default) or
+        ``numpy.float32`` to halve the size of the weights at the cost of
+        precision.
+    :param str src_fingerprint: an optional digest of the source geometry.
+    :param str dst_fingerprint: an optional digest of the destination
+        geometry.
+    """
+    weight_dtype = np.dtype(weight_dtype).newbyteorder('<')
+    if weight_dtype not in [np.dtype('<f4'), np.dtype('<f8')]:
+        raise ValueError("weight_dtype must be float32 or float64")
+
+    factors = np.asarray(factors).ravel()
+    rows = np.asarray(rows, dtype=np.int64).ravel()
+    cols = np.asarray(cols, dtype=np.int64).ravel()
+    if not factors.size == rows.size == cols.size:
+        raise ValueError("factors, rows and cols must have the same size")
+    if rows.size > 0:
+        if rows.min() < 1 or rows.max() > n_b:
+            raise ValueError("rows must be in the range 1 to n_b")
+        if cols.min() < 1 or cols.max() > n_a:
+            raise ValueError("cols must be in the range 1 to n_a")
+
+    order = np.lexsort((cols, rows))
+    factors = factors[order]
+    rows = rows[order]
+    cols = cols[order]
+
+    counts = np.bincount(rows - 1, minlength=n_b)
+    first_col = int(cols[0]) if rows.size > 0 else 0
+    deltas, _ = _encode_deltas_(cols, rows, first_col)
+
+    header = _compact_header_(weight_dtype, counts.max() if n_b > 0 else 0,
+                              deltas.max() if rows.size > 0 else 0,
+                              n_a, n_b, rows.size, src_fingerprint,
+                              dst_fingerprint, first_col)
+
+    with open(filename, 'wb') as f:
+        f.write(header.tobytes().ljust(_COMPACT_HEADER_SIZE, b'\0'))
+        for (dtype, size, offset), array in zip(_compact_sections_(header[0]),
+                                                [counts, deltas, factors]):
+            f.seek(offset)
+            f.write(array.astype(dtype).tobytes())
+        # pad the file to the end of the last section
+        f.truncate(_align_(f.tell()))
+
+
+def write_compact_chunks(filename, chunks, counts, n_a, n_b,
+                         weight_dtype=np.float64, src_fingerprint=None,
+                         dst_fingerprint=None, chunk_size=_CHUNK):
+    """
+    Write chunks of factors in any order to a compact weight file, see
+    :func:`write_compact`.  The factors are placed into their rows in a
+    scratch file next to ``filename`` and sorted and delta encoded in blocks
+    of rows, so the memory used is bounded by the chunk sizes and the number
+    of rows.
+
+    :param str filename: the path of the file to write.
+    :param chunks: an iterable of tuples of the weights, the one-based
+        destination and source sequence indices of factors.
+    :param ndarray counts: the number of factors of every destination row.
+    :param int n_a: the size of the source.
+    :param int n_b: the size of the destination.
+    :param dtype weight_dtype: ``numpy.float64`` (the default) or
+        ``numpy.float32``.
+    :param str src_fingerprint: an optional digest of the source geometry.
+    :param str dst_fingerprint: an optional digest of the destination
+        geometry.
+    :param int chunk_size: the approximate number of factors sorted and
+        converted at once.
+    """
+    weight_dtype = np.dtype(weight_dtype).newbyteorder('<')
+    if weight_dtype not in [np.dtype('<f4'), np.dtype('<f8')]:
+        raise ValueError("weight_dtype must be float32 or float64")
+
+    counts = np.asarray(counts, dtype=np.int64).ravel()
+    if counts.size != n_b:
+        raise ValueError("counts must hold n_b values")
+    indptr = np.concatenate([[0], np.cumsum(counts)])
+    n_s = int(indptr[-1])
+
+    scratch = filename + '.scratch'
+    try:
+        # the source indices and the weights of the factors in row order
+        cols_all = weights_all = None
+        if n_s > 0:
+            cols_all = np.memmap(scratch, dtype=np.int64, mode='w+',
+                                 shape=(n_s,))
+            weights_all = np.memmap(scratch, dtype=np.float64, mode='r+',
+                                    offset=n_s * 8, shape=(n_s,))
+
+        # place every factor after those already placed in its row
+        fill = indptr[:-1].copy()
+        for chunk in chunks:
+            factors, rows, cols = [np.asarray(a).ravel() for a in chunk]
+            if not factors.size == rows.size == cols.size:
+                raise ValueError("factors, rows and cols must have the same size")
+            if rows.size == 0:
+                continue
+            rows = rows.astype(np.int64) - 1
+            if rows.min() < 0 or rows.max() >= n_b:
+                raise ValueError("rows must be in the range 1 to n_b")
+            if cols.min() < 1 or cols.max() > n_a:
+                raise ValueError("cols must be in the range 1 to n_a")
+            order = np.argsort(rows, kind='mergesort')
+            rows = rows[order]
+            rank = np.arange(rows.size) - np.searchsorted(rows, rows)
+            positions = fill[rows] + rank
+            unique_rows, row_counts = np.unique(rows, return_counts=True)
+            fill[unique_rows] += row_counts
+            if np.any(fill[unique_rows] > indptr[unique_rows + 1]):
+                raise ValueError("more factors than counted for a row")
+            cols_all[positions] = cols[order]
+            weights_all[positions] = factors[order]
+        if np.any(fill != indptr[1:]):
+            raise ValueError("fewer factors than counted for a row")
+
+        # sort the factors of blocks of whole rows by source index and replace
+        # the source indices with their differences, the first row of a block
+        # continues from the last row of the previous block
+        max_delta = 0
+        first_col = None
+        row = 0
+        while row < n_b:
+            stop = max(int(np.searchsorted(indptr, indptr[row] + chunk_size,
+                                           side='right')) - 1, row + 1)
+            stop = min(stop, n_b)
+            begin, end = int(indptr[row]), int(indptr[stop])
+            if end > begin:
+                block_rows = np.repeat(np.arange(row, stop), counts[row:stop])
+                cols = np.asarray(cols_all[begin:end])
+                order = np.lexsort((cols, block_rows))
+                cols = cols[order]
+                weights_all[begin:end] = weights_all[begin:end][order]
+                if first_col is None:
+                    first_col = previous = int(cols[0])
+                deltas, previous = _encode_deltas_(cols, block_rows, previous)
+                cols_all[begin:end] = deltas
+                max_delta = max(max_delta, int(deltas.max()))
+            row = stop
+
+        header = _compact_header_(weight_dtype,
+                                  counts.max() if n_b > 0 else 0, max_delta,
+                                  n_a, n_b, n_s, src_fingerprint,
+                                  dst_fingerprint, first_col or 0)
+
+        with open(filename, 'wb') as f:
+            f.write(header.tobytes().ljust(_COMPACT_HEADER_SIZE, b'\0'))
+            for (dtype, size, offset), array in zip(_compact_sections_(header[0]),
+                                                    [counts, cols_all, weights_all]):
+                f.seek(offset)
+                for start in range(0, size, chunk_size):
+                    f.write(np.asarray(array[start:start + chunk_size]).astype(dtype).tobytes())
+            # pad the file to the end of the last section
+            f.truncate(_align_(f.tell()))
+    finally:
+        # release the maps before removing the scratch file
+        cols_all = weights_all = None
+        if os.path.exists(scratch):
+            os.remove(scratch)
+
+
+def _compact_header_(weight_dtype, max_count, max_delta, n_a, n_b, n_s,
+                     src_fingerprint, dst_fingerprint, first_col):
+    """Return the header of a compact weight file."""
+    header = np.zeros(1, dtype=_COMPACT_HEADER)
+    header['magic'] = _COMPACT_MAGIC
+    header['version'] = _COMPACT_VERSION
+    header['weight_dtype'] = weight_dtype.str.encode()
+    header['count_dtype'] = _uint_dtype_(max_count).str.encode()
+    header['delta_dtype'] = _uint_dtype_(max_delta).str.encode()
+    header['n_a'] = n_a
+    header['n_b'] = n_b
+    header['n_s'] = n_s
+    header['src_fingerprint'] = (src_fingerprint or '').encode()
+    header['dst_fingerprint'] = (dst_fingerprint or '').encode()
+    header['first_col'] = first_col
+    return header
+
+
+def is_compact(filename):
+    """
+    :param str filename: the path of a weight file.
+    :return: ``True`` if the file is a compact weight file.
+    """
+    with open(filename, 'rb') as f:
+        return f.read(len(_COMPACT_MAGIC)) == _COMPACT_MAGIC
+
+
+class CompactWeights(object):
+    """
+    Reader of a compact weight file written by :func:`write_compact` or
+    :meth:`~ESMF.api.regrid.Regrid.write_weights`, with the same interface as
+    :class:`WeightFile`.
+
+    The file is loaded as a single byte buffer, either memory-mapped or read
+    with one ``numpy.fromfile`` call, and the sections are views of it.  The
+    rows of a PET's share are located with the row counts, so only the
+    factors of those rows are decoded.
+
+    :param str filename: the path of the compact weight file.
+    :param bool mmap: if ``True`` (the default), memory-map the file instead
+        of reading it.
+    """
+
+    def __init__(self, filename, mmap=True):
+        self._filename = filename
+        if mmap:
+            self._buffer = np.memmap(filename, dtype=np.uint8, mode='r')
+        else:
+            self._buffer = np.fromfile(filename, dtype=np.uint8)
+
+        if self._buffer.size < _COMPACT_HEADER_SIZE:
+            raise ValueError("{0} is not a compact weight file".format(filename))
+        header = self._buffer[0:_COMPACT_HEADER.itemsize].view(_COMPACT_HEADER)[0]
+        if header['magic'] != _COMPACT_MAGIC:
+            raise ValueError("{0} is not a compact weight file".format(filename))
+        if header['version'] > _COMPACT_VERSION:
+            raise ValueError("{0} has the unsupported compact format version "
+                             "{1}".format(filename, header['version']))
+        self._header = header
+
+        sections = []
+        for dtype, size, offset in _compact_sections_(header):
+            stop = offset + size * dtype.itemsize
+            if stop > self._buffer.size:
+                raise ValueError("{0} is truncated".format(filename))
+            sections.append(self._buffer[offset:stop].view(dtype))
+        self._counts, self._deltas, self._weights = sections
+
+        self._indptr = np.zeros(self.n_b + 1, dtype=np.int64)
+        np.cumsum(self._counts, out=self._indptr[1:])
+
+        # the first source index of every row, so that any block of rows can
+        # be decoded on its own
+        nonempty = self._counts > 0
+        first_deltas = self._deltas[self._indptr[:-1][nonempty]].astype(np.int64)
+        self._first_cols = np.zeros(self.n_b, dtype=np.int64)
+        if header['version'] < 2:
+            self._first_cols[nonempty] = first_deltas
+        else:
+            self._first_cols[nonempty] = (int(header['first_col']) +
+                                          np.cumsum(_zigzag_decode_(first_deltas)))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __len__(self):
+        return self.n_s
+
+    def __repr__(self):
+        return "CompactWeights:\n    filename = {0}\n    weight_dtype = {1}\n" \
+               "    n_s = {2}\n    n_a = {3}\n    n_b = {4}\n".format(
+                   self.filename, self._weights.dtype, self.n_s, self.n_a,
+                   self.n_b)
+
+    @property
+    def dst_fingerprint(self):
+        """
+        :rtype: str
+        :return: The digest of the destination geometry, ``None`` if it was
+            not written.
+        """
+        return self._header['dst_fingerprint'].decode() or None
+
+    @property
+    def filename(self):
+        """
+        :rtype: str
+        :return: The path of the weight file.
+        """
+        return self._filename
+
+    @property
+    def indptr(self):
+        """
+        :rtype: ndarray
+        :return: The CSR row pointers, factor ``indptr[i]`` is the first
+            factor of the destination sequence index ``i + 1``.
+        """
+        return self._indptr
+
+    @property
+    def n_a(self):
+        """
+        :rtype: int
+        :return: The size of the source.
+        """
+        return int(self._header['n_a'])
+
+    @property
+    def n_b(self):
+        """
+        :rtype: int
+        :return: The size of the destination.
+        """
+        return int(self._header['n_b'])
+
+    @property
+    def n_s(self):
+        """
+        :rtype: int
+        :return: The number of factors.
+        """
+        return int(self._header['n_s'])
+
+    @property
+    def src_fingerprint(self):
+        """
+        :rtype: str
+        :return: The digest of the source geometry, ``None`` if it was not
+            written.
+        """
+        return self._header['src_fingerprint'].decode() or None
+
+    def close(self):
+        """
+        Release the file buffer.  Arrays returned by the read methods are
+        copies and remain valid.
+        """
+        self._buffer = None
+        self._counts = self._deltas = self._weights = None
+        self._first_cols = None
+
+    def read(self, start=None, stop=None):
+        """
+        Read the factors ``start`` to ``stop`` (zero-based, exclusive) in file
+        order, which is sorted by destination and source index.
+
+        :param int start: the first factor, defaults to the first.
+        :param int stop: the factor after the last one, defaults to the end.
+        :return: tuple of the weights (float64), the one-based destination and
+            source sequence indices (int32)
+        """
+        start, stop, _ = slice(start, stop).indices(self.n_s)
+        if stop <= start:
+            return (np.zeros(0, dtype=np.float64), np.zeros(0, dtype=np.int32),
+                    np.zeros(0, dtype=np.int32))
+
+        # decode the rows holding the factors and cut out the selection
+        row_start = int(np.searchsorted(self._indptr, start, side='right'))
+        row_stop = int(np.searchsorted(self._indptr, stop - 1, side='right')) + 1
+        select = slice(start - self._indptr[row_start - 1],
+                       stop - self._indptr[row_start - 1])
+        return tuple(array[select] for array in self.read_rows(row_start, row_stop))
+
+    def read_local(self, local_pet, pet_count):
+        """
+        Read the share of the factors of one PET: the destination rows are
+        split into ``pet_count`` contiguous blocks.
+
+        :param int local_pet: the PET number.
+        :param int pet_count: the number of PETs.
+        :return: tuple of factor arrays, see :meth:`read`
+        """
+        return self.read_rows(self.n_b * local_pet // pet_count + 1,
+                              self.n_b * (local_pet + 1) // pet_count + 1)
+
+    def read_rows(self, row_start, row_stop, is_sorted=True):
+        """
+        Read the factors of the destination sequence indices ``row_start`` to
+        ``row_stop`` (one-based, exclusive).
+
+        :param int row_start: the first destination sequence index.
+        :param int row_stop: the destination sequence index after the last.
+        :param bool is_sorted: ignored, compact files are always sorted.
+        :return: tuple of factor arrays, see :meth:`read`
+        """
+        row_start = max(row_start, 1)
+        row_stop = max(min(row_stop, self.n_b + 1), row_start)
+        begin = self._indptr[row_start - 1]
+        end = self._indptr[row_stop - 1]
+
+        counts = self._counts[row_start - 1:row_stop - 1].astype(np.int64)
+        rows = np.repeat(np.arange(row_start, row_stop, dtype=np.int32), counts)
+
+        # the deltas restart at the first factor of every row, which holds
+        # the first source index of the row decoded when opening the file
+        deltas = self._deltas[begin:end].astype(np.int64)
+        starts = self._indptr[row_start - 1:row_stop - 1] - begin
+        nonempty = counts > 0
+        deltas[starts[nonempty]] = 0
+        cols = np.cumsum(deltas)
+        base = np.zeros(counts.size, dtype=np.int64)
+        base[nonempty] = (self._first_cols[row_start - 1:row_stop - 1][nonempty] -
+                          cols[starts[nonempty]])
+        cols += np.repeat(base, counts)
+
+        return (self._weights[begin:end].astype(np.float64), rows,
+                cols.astype(np.int32))
+
+    def sparse_matrix(self, row_start=1, row_stop=None, is_sorted=True):
+        """
+        Return the factors of the destination sequence indices ``row_start``
+        to ``row_stop`` as a SciPy CSR matrix, see
+        :meth:`WeightFile.sparse_matrix`.
+
+        :param int row_start: the first destination sequence index.
+        :param int row_stop: the destination sequence index after the last,
+            defaults to ``n_b + 1``.
+        :param bool is_sorted: ignored, compact files are always sorted.
+        :return: scipy.sparse.csr_matrix of shape
+            ``(row_stop - row_start, n_a)``
+        """
+        try:
+            from scipy.sparse import csr_matrix
+        except ImportError:
+            raise ImportError("CompactWeights.sparse_matrix() requires SciPy")
+
+        if row_stop is None:
+            row_stop = self.n_b + 1
+        factors, _, cols = self.read_rows(row_start, row_stop)
+        indptr = self._indptr[row_start - 1:row_stop] - self._indptr[row_start - 1]
+
+        return csr_matrix((factors, cols - 1, indptr),
+                          shape=(row_stop - row_start, self.n_a))
+
+
+def open_weights(filename, mmap=True):
+    """
+    Open a weight file with the reader matching its format.
+
+    :param str filename: the path of a compact weight file or of an
+        uncompressed netCDF classic weight file.
+    :param bool mmap: passed to :class:`CompactWeights`, netCDF files are
+        always memory-mapped.
+    :return: :class:`CompactWeights` or :class:`WeightFile`
+    """
+    if is_compact(filename):
+        return CompactWeights(filename, mmap=mmap)
+    return WeightFile(filename)